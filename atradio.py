@@ -1,56 +1,246 @@
-import subprocess
-import signal
+import bisect
+import collections
 import sys
+import threading
 import time
 import platform
 import curses
-import csv
-from curses import wrapper
 import os
-from datetime import datetime
 import click
-import telnetlib
-from ui.ui_interface import select_file_from_list, get_input, show_confirmation, text_field_unicode, get_valid_url
+# до первого кадра загружается только необходимое: сетевые модули (asyncio, ssl, http)
+# импортируются в фоне или по месту использования
+from player import trace
+from player.backends import BACKENDS, SWITCH_MODES, SubprocessPlayer, create_player, switch_station
+from player.events import BUFFERING, END, ERROR, IMPORT, INDEX, RESIZE, TICK, EventBus
+from player.variants import VariantSelector, primary_url, variant_urls
+from ui.ui_interface import select_file_from_list, get_input, show_confirmation, text_field_unicode, get_valid_url, unread_keys, wait_keys
 from ui.ui_app import *
+from ui.ui_loop import FRAME_TIME, Timers, coalesce_keys
+from ui.ui_screen import Screen
+from storage.paths import cache_path, find_program, socket_path
+from storage.catalog import StationCatalog
+from storage.categories import CategoryIndex
+from storage.search import SearchIndex, SearchView, search_view
+from storage.stations import StationStore, save_stations
 
+STATIONS_FILE = 'data/radio_stations.csv'
+# Ins, Del, F4, F2, F5, g открывают диалоги, которые сами читают клавиатуру и рисуют мимо модели экрана
+DIALOG_KEYS = (331, 330, curses.KEY_F4, curses.KEY_F2, curses.KEY_F5, ord('g'))
+TIMESHIFT_STEP = 10  # сек перемотки за одно нажатие [ или ]
 
 
-def set_vlc_volume(volume: int):
-    try:
-        tn = telnetlib.Telnet("localhost", 5000)
-        tn.write(f"volume {volume}\n".encode())  # Устанавливаем громкость
-        tn.write("quit\n".encode())  # Закрываем соединение
-        tn.close()
-    except ConnectionRefusedError:
-        print("❌ VLC не отвечает. Убедитесь, что запущен с --rc-host")
-
-def load_stations(filename):
-    stations = []
-    with open(filename, mode='r', encoding='utf-8') as file:
-        reader = csv.DictReader(file, delimiter=';')
-        for row in reader:
-            stations.append((row['Name'], row['URL']))
-    return stations
-
-
-def save_stations(filename, stations):
-    with open(filename, mode='w', encoding='utf-8', newline='') as file:
-        writer = csv.writer(file, delimiter=';')
-        writer.writerow(['Name', 'URL'])  # Заголовки
-        for name, url in stations:
-            writer.writerow([name, url])
-
-
-def vlc_open(vlc_prg, name_station:str):
-    # запуск процесса vlc
-    return subprocess.Popen(
-        [vlc_prg, "--intf", "rc", "--rc-host", "localhost:5000", name_station],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
-
-
-def main(stdscr, autoplay):
+def check_vlc_installed(vlc_prg, os_name):
+    # Проверяем, есть ли VLC в системе; возвращает путь к vlc.
+    # Путь запоминается в кэше, при следующем запуске хватает одного stat вместо поиска по PATH
+    if os_name != "Windows":
+        path = find_program(vlc_prg)
+        if path is None:
+            print("❌ VLC не установлен! Установите его:")
+            if os_name == "Linux":
+                print("  sudo apt install vlc  # для Debian/Ubuntu")
+                print("  sudo dnf install vlc  # для Fedora")
+            elif os_name == "Darwin":
+                print("  brew install vlc      # через Homebrew")
+            sys.exit(1)
+        return path
+    else:
+        if not os.path.isfile(vlc_prg):
+            print("❌ VLC не установлен! Установите его:")
+            print("Скачайте по адресу https://www.videolan.org/vlc/")
+            sys.exit(1)
+        return vlc_prg
+
+
+def default_vlc(os_name):
+    return "C:\\Program Files (x86)\\VideoLAN\\VLC\\vlc.exe" if os_name == "Windows" else "vlc"
+
+
+def start_player(backend, vlc_prg, os_name, bus, url=None, connect=None):
+    """
+    Создает плеер и запускает автопроигрывание url в фоновом потоке, пока рисуется первый кадр:
+    холодный старт vlc идет параллельно с интерфейсом. Возвращает функцию, которая дожидается плеера;
+    ошибка запуска (в том числе выход из-за отсутствия vlc) повторяется в вызвавшем ее потоке.
+    connect - сокет демона (atradio serve): вместо своего плеера - плеер демона.
+    """
+    result = {}
+
+    def run():
+        try:
+            if connect:
+                from player.remote import RemotePlayer
+                player = RemotePlayer(connect, bus)
+            else:
+                player = create_player(backend, vlc_prg, bus)
+            if isinstance(player, SubprocessPlayer):
+                player.vlc_prg = check_vlc_installed(vlc_prg, os_name)
+            if url is not None:
+                player.play(url)
+            result["player"] = player
+        except BaseException as error:
+            result["error"] = error
+
+    thread = threading.Thread(target=run, name="atradio-player", daemon=True)
+    thread.start()
+
+    def wait():
+        thread.join()
+        if "error" in result:
+            raise result["error"]
+        return result["player"]
+    return wait
+
+
+def player_status(player):
+    """Краткое состояние плеера для строки состояния"""
+    kind, detail = player.last_event or (None, None)
+    if player.error:
+        return f"ошибка: {player.error}"
+    if player.is_connecting():
+        if kind == BUFFERING and isinstance(detail, int):
+            return f"буферизация {detail}%"
+        return "подключение..."
+    if kind == END:
+        return "поток завершен"
+    if player.start_latency is not None:
+        return f"старт за {player.start_latency * 1000:.0f} мс"
+    return ""
+
+
+def timeshift_status(timeshift):
+    """Пауза и отставание от эфира для строки состояния"""
+    if timeshift is None or timeshift.current is None:
+        return ""
+    seconds = int(timeshift.behind())
+    behind = f"-{seconds // 60}:{seconds % 60:02d}"
+    if timeshift.paused():
+        return f"пауза {behind}"
+    return f"{behind} от эфира" if seconds else ""
+
+
+def import_status(importer):
+    """Ход и итог импорта станций для строки состояния"""
+    if importer is None:
+        return ""
+    if importer.error:
+        return f"импорт: {importer.error}"
+    counts = f"повторов {importer.duplicates}, с ошибкой {importer.invalid}"
+    if importer.done:
+        return f"импорт: добавлено {importer.added} ({counts})"
+    return f"импорт {importer.progress():.0%}: +{importer.added} ({counts})"
+
+
+def watchdog_status(watchdog):
+    """Переподключение после обрыва и обрывы с буферизациями играющей станции для строки состояния"""
+    if watchdog is None or watchdog.station is None:
+        return ""
+    parts = []
+    left = watchdog.left()
+    if left is not None:
+        parts.append(f"{watchdog.reason}: переподключение через {max(left, 0):.0f} с")
+    elif watchdog.attempts:
+        parts.append(f"переподключение, попытка {watchdog.attempts}")
+    drops, rebuffers = watchdog.drops[watchdog.station], watchdog.rebuffers[watchdog.station]
+    if drops or rebuffers:
+        parts.append(f"обрывов {drops}, буферизаций {rebuffers}")
+    return ", ".join(parts)
+
+
+def scan_status(scanner):
+    """Ход обзора станций для строки состояния"""
+    if scanner is None:
+        return ""
+    total = len(scanner.view)
+    return f"обзор {total - scanner.left}/{total}, пропущено {scanner.skipped} (любая клавиша - остановка)"
+
+
+def play_status(player, timeshift=None, importer=None, watchdog=None, scanner=None):
+    parts = (player_status(player), scan_status(scanner), watchdog_status(watchdog), timeshift_status(timeshift),
+             import_status(importer))
+    return " | ".join(part for part in parts if part)
+
+
+def adjacent_urls(stations, row, playing_index=-1, radius=1):
+    """Адреса (поля URL) выделенной станции и ее соседей по убыванию важности, без играющей станции"""
+    rows = [row] + [r for d in range(1, radius + 1) for r in (row + d, row - d)]
+    return [stations[r][1] for r in rows if 0 <= r < len(stations) and r != playing_index]
+
+
+def source_url(url, prefetch=None, timeshift=None, resolver=None):
+    """
+    Адрес для плеера: запись timeshift или предзагруженный поток через ретранслятор,
+    иначе итоговый адрес потока из кэша разбора (без плейлистов и перенаправлений) или сам url
+    """
+    if timeshift:
+        return timeshift.source_url(url, prefetch.take(url) if prefetch else None)
+    if prefetch:
+        source = prefetch.source_url(url)
+        if source != url:
+            return source
+    return resolver.resolve(url) if resolver else url
+
+
+def playing_url(stations, playing_index, variants):
+    """Играющий вариант станции или None"""
+    if not 0 <= playing_index < len(stations):
+        return None
+    return variants.current(stations[playing_index][1])
+
+
+def station_id(stations, row):
+    """Постоянный номер станции строки row (StationCatalog.id_at) или None, если строки нет"""
+    return stations.id_at(row) if 0 <= row < len(stations) else None
+
+
+def remote_row(stations, player):
+    """Строка списка станции, которую играет демон: по номеру из его ответа, иначе поиском адреса"""
+    if player.url is None:
+        return -1
+    index = player.index
+    if index is not None and 0 <= index < len(stations) and player.url in variant_urls(stations[index][1]):
+        return index
+    return next((row for row, (name, url) in enumerate(stations.copy()) if player.url in variant_urls(url)), -1)
+
+
+def station_title(titles, url):
+    """Название песни играющей станции из метаданных потока"""
+    if titles is None or url is None:
+        return ""
+    return titles.title(url) or ""
+
+
+def filter_stations(stations, search, query):
+    """Найденные станции; пока индекс строится - весь список"""
+    return search_view(stations, search, query) or SearchView(stations)
+
+
+def tab_view(stations, categories, tab):
+    """Станции вкладки: весь список или готовые строки категории, без фильтрации"""
+    return SearchView(stations) if tab is None else SearchView(stations, categories.rows_of(tab))
+
+
+def tab_position(view, saved, max_display):
+    """
+    Курсор и прокрутка вкладки по сохраненным (строка списка, строка экрана).
+    Пока вкладка была скрыта, строки могли сдвинуться: курсор встает на ближайшую станцию вкладки.
+    """
+    row, line = saved
+    index = row if view.rows is None else bisect.bisect_left(view.rows, row)
+    index = min(index, max(len(view) - 1, 0))
+    return index, scroll_offset(index, max(index - line, 0), max_display)
+
+
+def search_found(view, search, total):
+    """Сколько станций найдено - для строки поиска"""
+    if not search.ready:
+        return f"индексирование {search.built * 100 // max(total, 1)}%"
+    if view.complete:
+        return f"найдено {len(view)}"
+    return f"найдено около {view.estimate}"
+
+
+def main(stdscr, autoplay, backend="auto", switch_mode="cut", prefetch_stations=True, check_health=True,
+         read_titles=True, journal=False, connect=None, timeshift_minutes=0.0, resolve_urls=True, profile=None,
+         reconnect=True, scan_seconds=5.0):
     # Инициализация цветов (перенесено внутрь main)
     curses.start_color()
     curses.use_default_colors()
@@ -64,80 +254,358 @@ def main(stdscr, autoplay):
         pass
     
     curses.curs_set(0)  # Скрываем курсор
-    stations_file = 'data/radio_stations.csv'
-    stations = load_stations(stations_file)
+    curses.noecho()  # нажатые клавиши не печатаются поверх экрана
+    stations_file = STATIONS_FILE
+    # Изменения списка сохраняются в фоне, интерфейс не ждет диск
+    store = StationStore(stations_file, journal=journal)
+    stations = store.load()
     current_row = 0
     offset = 0
-    vlc_process = None
     playing_index = -1  # Индекс проигрываемой станции (-1 - ничего не играет)
+    # играющая станция по постоянному номеру: ее строка находится заново после перемещений, удаления и правки
+    playing_id = None
     move_mode = False  # Флаг режима перемещения
     moving_index = -1  # Индекс перемещаемой станции
-    original_stations = []
+    move_start = -1  # откуда начато перемещение: для журнала изменений и отмены
     move_mode_playing = False # перемещение станции по спику которая проигрывается
     current_volume = 100  #   громкость воспроизведения
 
-    vlc_prg = ""
     os_name = platform.system()
-    vlc_prg = "C:\\Program Files (x86)\\VideoLAN\\VLC\\vlc.exe" if os_name == "Windows" else "vlc"
-    # Проверяем, есть ли VLC в системе (только для Linux/macOS)
-    if os_name != "Windows":
-        check_installed = subprocess.run(
-            ["which", vlc_prg],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-        if check_installed.returncode != 0:
-            print("❌ VLC не установлен! Установите его:")
-            if os_name == "Linux":
-                print("  sudo apt install vlc  # для Debian/Ubuntu")
-                print("  sudo dnf install vlc  # для Fedora")
-            elif os_name == "Darwin":
-                print("  brew install vlc      # через Homebrew")
-            sys.exit(1)
-    else:
-        if not os.path.isfile(vlc_prg):
-            print("❌ VLC не установлен! Установите его:")
-            print("Скачайте по адресу https://www.videolan.org/vlc/")
-            sys.exit(1)
+    vlc_prg = default_vlc(os_name)
+    # События плеера и фоновых задач будят цикл интерфейса вместе с клавиатурой
+    bus = EventBus()
+    # Плеер живет все время работы программы, при смене станции меняется только поток.
+    # Он создается в фоне, и автопроигрывание подключается, пока рисуется первый кадр
+    autoplay_url = None
+    if autoplay > -1 and autoplay<len(stations):
+        playing_index = autoplay
+        playing_id = station_id(stations, playing_index)
+        autoplay_url = stations[playing_index][1]
+    # Варианты качества станции: лучший, который тянет канал; после остановок на буферизацию - вариант хуже
+    variants = VariantSelector(cache_path("variants.jsonl"))
+    if autoplay_url:
+        autoplay_url = variants.choose(autoplay_url)
+    # Плейлисты и перенаправления станций разбираются один раз: плеер подключается сразу к потоку
+    resolver = None
+    if resolve_urls and not connect:  # демон подключается к станциям сам
+        from player.resolver import StreamResolver
+        resolver = StreamResolver(cache_path("resolved.json"))
+    # Timeshift: играющая станция пишется в кольцевой файл, плеер слушает ее через локальный ретранслятор
+    relay = timeshift = None
+    if timeshift_minutes > 0 and not connect:
+        from player.relay import LocalRelay
+        from player.timeshift import Timeshift
+        relay = LocalRelay()
+        timeshift = Timeshift(relay, timeshift_minutes, estimator=variants, resolver=resolver)
+        if autoplay_url:
+            autoplay_url = timeshift.source_url(autoplay_url)
+    elif autoplay_url and resolver:
+        autoplay_url = resolver.resolve(autoplay_url)
+    timeshift_tick = False  # идут ли раз в секунду обновления отставания от эфира в строке состояния
+    # --profile: этапы от нажатия до звука и длительности операций копятся в гистограммах, при выходе - в файл
+    tracer = trace.enable() if profile else None
+    overlay = False  # строка замеров вместо подзаголовка (клавиша p)
+    if autoplay_url:
+        trace.begin("автозапуск")
+    wait_player = start_player(backend, vlc_prg, os_name, bus, autoplay_url, connect)
 
     stdscr.keypad(True)
+    # Экран рисуется кадрами: в терминал уходят только изменившиеся строки
+    screen = Screen(stdscr)
+    screen.watch_resize(bus)
+    # Первый кадр - до фоновых задач: файл станций только открыт, строки читаются для видимой части
+    frame = screen.frame()
+    screen_ok = full_redraw(frame, stations, 0, 0, playing_index, False, False, current_volume, -1,
+                            "подключение..." if autoplay_url else "")  # терминал не слишком мал
+    screen.show(frame)
 
-    if autoplay > -1 and autoplay<len(stations):
-        playing_index = autoplay
-        # Запускаем  автоматическое проигрывание станции
-        vlc_process = vlc_open(vlc_prg, stations[playing_index][1])
+    # Предзагрузка станций возле курсора, готовый поток отдается плееру через локальный ретранслятор
+    prefetch = None
+    if prefetch_stations and not connect:  # демон подключается к станциям сам
+        from player.prefetch import PrefetchPool
+        from player.relay import LocalRelay
+        prefetch = PrefetchPool(relay or LocalRelay(), estimator=variants, resolver=resolver)
+    prefetch_row = -1  # строка, для которой запрошена предзагрузка
+    # Фоновая проверка доступности станций, значки в списке обновляются по мере готовности
+    health = None
+    if check_health:
+        from player.health import HealthCache, HealthMonitor
+        health = HealthMonitor(HealthCache(cache_path("health.json")), bus)
+        health.start(primary_url(url) for name, url in stations.copy())
+    badge = (lambda url: health.badge(primary_url(url))) if health else None
+    # Названия песен из метаданных потока для строки состояния
+    titles = None
+    if read_titles and not connect:  # названия песен читает демон
+        from player.icy import NowPlaying
+        titles = NowPlaying(bus)
+    # Поиск по мере ввода: индекс строится в фоне и обновляется при правке списка
+    search = SearchIndex(bus)
+    search.start(stations.copy().items())
+    search_query = None  # строка поиска; None - режим поиска выключен
+    search_list = None  # найденные станции
+    search_row = search_offset = 0
+    search_return = (0, 0)  # позиция в списке до поиска, для Esc
+    # Вкладки категорий: у каждой категории готовые строки списка, правки обновляют их на месте
+    categories = CategoryIndex(bus)
+    categories.start(stations)
+    tab = None  # категория открытой вкладки; None - «Все»
+    tab_positions = {}  # вкладка -> (строка списка под курсором, строка экрана) для возврата на нее
+    importer = None  # импорт станций из файла (F5), идет в фоне
+    # к этому времени vlc обычно уже запущен; дальше интерфейсу нужен готовый плеер
+    player = wait_player()
+    # Сторож обрывов: оборвавшаяся станция переподключается сама, с нарастающей паузой между попытками
+    watchdog = None
+    if reconnect and not connect:  # демон следит за своим плеером сам
+        from player.watchdog import Watchdog
+        watchdog = Watchdog(player, bus)
+    scanner = None  # обзор станций (s): станции по очереди звучат scan_seconds сек
+    if connect:
+        # интерфейс - один из клиентов демона: показываем то, что уже играет, и его громкость
+        titles = player if read_titles else None
+        current_volume = player.volume
+        if playing_index < 0:
+            playing_index = remote_row(stations, player)
+            playing_id = station_id(stations, playing_index)
 
     # Флаг, указывающий на необходимость полной перерисовки
     need_redraw = True
+    switch_back = None  # номер станции, которая играет, пока подключается новая
+    # Клавиши читаются пачками: (клавиша, сколько раз подряд); кадр рисуется, когда пачка обработана
+    keys = collections.deque()
+    timers = Timers(bus)
+    last_frame = time.monotonic()  # когда выведен последний кадр
+    key_started = None  # когда началась обработка клавиши (только с --profile)
     
     while True:
+        if key_started is not None:
+            trace.record("клавиша", time.monotonic() - key_started)
+            key_started = None
         try:
-            if need_redraw:
-                if not full_redraw(stdscr, stations, current_row, offset, playing_index, move_mode, move_mode_playing, current_volume, moving_index):
-                    continue
-                need_redraw = False
-            
-            key = stdscr.getch()
+            playing_index = -1 if playing_id is None else stations.index_of(playing_id)
+            if playing_index < 0:
+                playing_id = None  # станцию удалили: не ищем ее заново на каждом шаге
+            # current_row и offset - позиция во вкладке; строка всего списка - view.row(current_row)
+            view = tab_view(stations, categories, tab)
+            if tab is not None and not len(view):
+                # в категории не осталось станций - переходим на «Все»
+                tab = None
+                view = tab_view(stations, categories, tab)
+                current_row, offset = tab_position(view, tab_positions.get(tab, (0, 0)), stdscr.getmaxyx()[0] - 6)
+            if not keys:
+                now = time.monotonic()
+                if need_redraw and now >= last_frame + FRAME_TIME:
+                    frame_started = trace.clock()
+                    frame = screen.frame()
+                    if search_query is not None:
+                        search_list.ensure(search_offset + frame.h - 6)
+                        screen_ok = search_redraw(frame, stations, search_list, search_row, search_offset, current_row, playing_index, current_volume, search_query, search_found(search_list, search, len(stations)), play_status(player, timeshift, importer, watchdog, scanner), badge, station_title(titles, playing_url(stations, playing_index, variants)))
+                    else:
+                        tabs = [None] + categories.names()
+                        screen_ok = full_redraw(frame, stations, current_row, offset, playing_index, move_mode, move_mode_playing, current_volume, moving_index, play_status(player, timeshift, importer, watchdog, scanner), badge, station_title(titles, playing_url(stations, playing_index, variants)),
+                                                view, ["Все"] + tabs[1:] if len(tabs) > 1 else None, tabs.index(tab) if tab in tabs else 0)
+                    if overlay and screen_ok:
+                        draw_overlay(frame, tracer.overlay())
+                    screen.show(frame)
+                    if frame_started is not None:
+                        trace.record("кадр", time.monotonic() - frame_started)
+                    last_frame = now
+                    need_redraw = False
+
+                # Курсор сменил строку: предзагружаем выделенную станцию и ее соседей
+                # (в режиме поиска current_row - строка всего списка)
+                shown = view if search_query is None else SearchView(stations)
+                if prefetch and not move_mode and not scanner and len(shown) and shown.row(current_row) != prefetch_row:
+                    prefetch_row = shown.row(current_row)
+                    prefetch.want([variants.pick(url) for url in adjacent_urls(shown, current_row, shown.index_of(playing_index))])
+
+                # Названия читаются только для играющей станции
+                if titles:
+                    titles.follow(playing_url(stations, playing_index, variants))
+                if timeshift:
+                    timeshift.follow(playing_url(stations, playing_index, variants))
+                if watchdog:
+                    watchdog.follow(stations[playing_index][1] if 0 <= playing_index < len(stations) else None)
+
+                # Ждем клавиш, событий плеера и таймеров; отложенный кадр - не дольше конца бюджета кадра
+                timeout = timers.timeout()
+                if need_redraw:
+                    frame_left = max(last_frame + FRAME_TIME - now, 0)
+                    timeout = frame_left if timeout is None else min(timeout, frame_left)
+                keys.extend(coalesce_keys(wait_keys(stdscr, bus, search_query is not None, timeout)))
+                timers.fire()
+                events = bus.drain()
+                if events:
+                    # Ожидание прервало событие плеера, результат проверки станций или таймер
+                    if any(event.kind == RESIZE for event in events):
+                        screen.resize()
+                    if search_query is not None and any(event.kind == INDEX for event in events):
+                        # индекс достроен - фильтруем по уже набранной строке
+                        search_list, search_row, search_offset = filter_stations(stations, search, search_query), 0, 0
+                    if timeshift_tick and any(event.kind == TICK and event.detail == "timeshift" for event in events):
+                        # отставание от эфира растет на паузе: обновляем его раз в секунду
+                        timeshift_tick = timeshift.paused() or timeshift.behind() >= 1
+                        if timeshift_tick:
+                            timers.call_later(1.0, TICK, "timeshift")
+                    if importer and any(event.kind == IMPORT and event.detail == "done" for event in events):
+                        if importer.rows is not None and importer.base is not stations.rows:
+                            importer.error = "список заменен во время импорта, станции не добавлены"
+                        elif importer.rows is not None:
+                            # новые станции - в конце списка: строки и номера прежних не меняются
+                            first_new = len(stations)
+                            stations.extend_rows(importer.rows)
+                            store.changed(stations)
+                            search.start(stations.copy().items())
+                            categories.start(stations)
+                            if health:
+                                added = stations.copy()
+                                health.start(primary_url(added[row][1]) for row in range(first_new, len(added)))
+                        timers.call_later(10.0, TICK, "import")  # итог импорта виден в строке состояния
+                    if importer and importer.done and any(event.kind == TICK and event.detail == "import" for event in events):
+                        importer = None
+                    if search_query is not None and not search.ready and any(event.kind == TICK for event in events):
+                        timers.call_later(0.5, TICK)  # ход индексирования в строке поиска
+                    if connect and switch_back is None:
+                        # станцию мог сменить или остановить другой клиент демона
+                        shown = variant_urls(stations[playing_index][1]) if 0 <= playing_index < len(stations) else [None]
+                        if player.url not in shown:
+                            playing_index = remote_row(stations, player)
+                            playing_id = station_id(stations, playing_index)
+                    if switch_back is None and not scanner and 0 <= playing_index < len(stations):
+                        # остановки на буферизацию: после нескольких подряд - вариант станции похуже
+                        lower = variants.watch(stations[playing_index][1], events,
+                                               player.start_latency is not None and not player.is_connecting())
+                        if lower:
+                            switch_back = playing_id
+                            switch_station(player, source_url(lower, prefetch, timeshift, resolver), switch_mode)
+                    if watchdog and switch_back is None and not scanner and 0 <= playing_index < len(stations):
+                        # обрыв играющей станции: переподключение через паузу, отсчет идет в строке состояния
+                        delay = watchdog.watch(events, player.start_latency is not None and not player.is_connecting())
+                        if delay is not None:
+                            timers.call_later(min(delay, 1.0), TICK, "reconnect")
+                        if any(event.kind == TICK and event.detail == "reconnect" for event in events):
+                            left = watchdog.left()
+                            if left is not None and left > 0:
+                                timers.call_later(min(left, 1.0), TICK, "reconnect")
+                            elif left is not None:
+                                watchdog.retrying()
+                                # оборванный поток не играет: новый подключается без остановки старого
+                                url = variants.choose(stations[playing_index][1])
+                                player.switch(source_url(url, prefetch, timeshift, resolver))
+                    if scanner:
+                        # обзор: звучащая станция - под курсором, следующая подключается, пока она звучит
+                        row = scanner.update(player.start_latency is not None and not player.is_connecting(),
+                                             player.error is not None)
+                        if scanner.playing is not None and scanner.view.row(scanner.playing) != playing_index:
+                            playing_index = scanner.view.row(scanner.playing)
+                            playing_id = station_id(stations, playing_index)
+                            current_row = scanner.playing
+                            offset = scroll_offset(current_row, offset, stdscr.getmaxyx()[0] - 6)
+                        if row is not None:
+                            url = variants.choose(scanner.view[row][1])
+                            player.switch(source_url(url, prefetch, timeshift, resolver))
+                        if scanner.done:
+                            scanner.close()
+                            scanner = None
+                        else:
+                            delay = scanner.schedule()
+                            if delay is not None:
+                                timers.call_later(delay, TICK, "scan")
+                    if resolver and 0 <= playing_index < len(stations) and any(event.kind == ERROR for event in events):
+                        # поток по запомненному адресу не открылся: в следующий раз адрес разбирается заново
+                        resolver.failed(variants.current(stations[playing_index][1]))
+                    if switch_back is not None and not player.is_connecting():
+                        # новая станция не ответила - продолжает играть прежняя
+                        if player.error and player.url and stations.index_of(switch_back) >= 0:
+                            playing_id = switch_back
+                        switch_back = None
+                    # значки, строка состояния: кадр строится заново, а в терминал попадут только изменения
+                    need_redraw = True
+                continue
+            key, repeat = keys.popleft()
+            key_started = trace.clock() if key not in DIALOG_KEYS else None  # диалоги ждут человека
+            redraw_pending = need_redraw  # кадр уже нужен предыдущим клавишам пачки
             need_redraw = True  # По умолчанию считаем, что перерисовка нужна
+            if key == curses.KEY_RESIZE:
+                screen.resize()
+                continue
+            if not screen_ok and key not in (ord('q'), 274):
+                continue  # терминал слишком мал - ждем, пока его растянут
+            if scanner and key not in (ord('q'), 274):
+                # любая клавиша останавливает обзор на звучащей станции, подключение следующей отменяется
+                player.cancel_switch()
+                scanner.close()
+                scanner = None
+                continue
+            if (key in DIALOG_KEYS or key == ord('/')) and search_query is None and not move_mode:
+                # клавиши, набранные следом, достанутся диалогу или строке поиска (она читает символы, а не коды)
+                unread_keys(keys)
+                keys.clear()
+
+            # Режим поиска: набор фильтрует список, стрелки ходят по найденным станциям
+            if search_query is not None:
+                h, w = stdscr.getmaxyx()
+                max_display = h - 6
+                if key in ('\n', '\r'):
+                    key = 10
+                elif key == '\x1b':
+                    key = 27
+                elif key in ('\x7f', '\b', 127, 8):
+                    key = curses.KEY_BACKSPACE
+                if isinstance(key, str):
+                    if key.isprintable():
+                        search_query += key  # вставленный текст приходит одной строкой и фильтруется один раз
+                        search_list, search_row, search_offset = filter_stations(stations, search, search_query), 0, 0
+                elif key == curses.KEY_BACKSPACE:
+                    search_query = search_query[:-repeat]
+                    search_list, search_row, search_offset = filter_stations(stations, search, search_query), 0, 0
+                elif key in (curses.KEY_UP, curses.KEY_DOWN):
+                    search_list.ensure(search_row + repeat + 1)
+                    step = repeat if key == curses.KEY_DOWN else -repeat
+                    search_row = min(max(search_row + step, 0), max(len(search_list) - 1, 0))
+                    search_offset = scroll_offset(search_row, search_offset, max_display)
+                elif key in (curses.KEY_PPAGE, curses.KEY_NPAGE, curses.KEY_HOME, curses.KEY_END):
+                    # до конца списка найденных приходится досмотреть весь каталог
+                    search_list.ensure(len(stations) if key == curses.KEY_END else search_row + (repeat + 1) * max_display)
+                    for _ in range(repeat if len(search_list) else 0):
+                        search_row, search_offset = page_position(key, search_row, search_offset, max_display, len(search_list))
+                elif key == 27:
+                    current_row, offset = search_return
+                    search_query = None
+                elif key in (curses.KEY_ENTER, 10, 13) and len(search_list):
+                    # станция выбрана: возвращаемся к полному списку на ней и дальше обрабатываем Enter как обычно
+                    if tab is not None:
+                        tab_positions[tab] = (view.row(search_return[0]), search_return[0] - search_return[1])
+                        tab = None
+                        view = tab_view(stations, categories, tab)
+                    current_row = search_list.row(search_row)
+                    offset = scroll_offset(current_row, search_return[1], max_display)
+                    search_query = None
+                    key = 10
+                if search_query is not None:
+                    if len(search_list):
+                        current_row = search_list.row(search_row)
+                    continue
+                if key != 10:
+                    continue
             
             # В режиме перемещения обрабатываем клавиши вверх/вниз
             if move_mode:
                 if key == curses.KEY_UP and moving_index > 0:
-                    stations[moving_index], stations[moving_index-1] = stations[moving_index-1], stations[moving_index]
-                    moving_index -= 1
+                    for _ in range(min(repeat, moving_index)):
+                        stations.swap(moving_index, moving_index-1)
+                        categories.swapped(moving_index, moving_index-1)
+                        moving_index -= 1
                     current_row = moving_index
-                    if playing_index == moving_index:
-                        playing_index += 1
                     # Прокрутка вверх, если текущая строка выше видимой области
                     if current_row < offset:
                         offset = current_row
                         need_redraw = True
                 elif key == curses.KEY_DOWN and moving_index < len(stations)-1:
-                    stations[moving_index], stations[moving_index+1] = stations[moving_index+1], stations[moving_index]
-                    moving_index += 1
+                    for _ in range(min(repeat, len(stations) - 1 - moving_index)):
+                        stations.swap(moving_index, moving_index+1)
+                        categories.swapped(moving_index, moving_index+1)
+                        moving_index += 1
                     current_row = moving_index
-                    if playing_index == moving_index:
-                        playing_index -= 1
                     # Прокрутка вниз, если текущая строка ниже видимой области
                     h, w = stdscr.getmaxyx()
                     max_display = h - 6
@@ -145,66 +613,122 @@ def main(stdscr, autoplay):
                         offset = current_row - max_display + 1
                         need_redraw = True
                 elif key in [curses.KEY_ENTER, 10, 13]:
-                    save_stations(stations_file, stations)
-                    if move_mode_playing:
-                        playing_index = moving_index
+                    store.changed(stations, ("move", move_start, moving_index))
                     move_mode = False
                     moving_index = -1
                     move_mode_playing = False                    
                 elif key == 27:
-                    stations = original_stations.copy()
-                    current_row = moving_index
+                    # возвращаем станцию на исходное место, весь список не копируется
+                    stations.move(moving_index, move_start)
+                    categories.moved(moving_index, move_start)
+                    current_row = move_start
+                    offset = scroll_offset(current_row, offset, stdscr.getmaxyx()[0] - 6)
                     move_mode = False
                     moving_index = -1
                     move_mode_playing = False
                 else:
-                    need_redraw = False  # Неизвестная клавиша в режиме перемещения
+                    need_redraw = redraw_pending  # Неизвестная клавиша в режиме перемещения
             else:
                 if key == curses.KEY_UP and current_row > 0:
-                    current_row -= 1
-                    # Прокрутка вверх, если текущая строка выше видимой области
+                    current_row = max(current_row - repeat, 0)  # серия ↑ из пачки - одним шагом
+                    # Прокрутка вверх, если текущая строка выше видимой области;
+                    # без прокрутки на экране сменятся только две строки списка и строка состояния
                     if current_row < offset:
                         offset = current_row
-                        need_redraw = True
-                        continue
-                    # Частичная перерисовка только списка станций и строк состояния
-                    h, w = stdscr.getmaxyx()
-                    draw_stations_list(stdscr, stations, current_row, offset, playing_index, move_mode, h-6)
-                    draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index)
-                    need_redraw = False
-                elif key == curses.KEY_DOWN and current_row < len(stations)-1:
-                    current_row += 1
+                elif key == curses.KEY_DOWN and current_row < len(view)-1:
+                    current_row = min(current_row + repeat, len(view) - 1)
                     # Прокрутка вниз, если текущая строка ниже видимой области
                     h, w = stdscr.getmaxyx()
                     max_display = h - 6
                     if current_row >= offset + max_display:
                         offset = current_row - max_display + 1
-                        need_redraw = True
-                        continue
+                elif key in (curses.KEY_PPAGE, curses.KEY_NPAGE, curses.KEY_HOME, curses.KEY_END) and len(view):
+                    # Страница вверх/вниз, начало и конец списка: цена не зависит от размера каталога
                     h, w = stdscr.getmaxyx()
-                    draw_stations_list(stdscr, stations, current_row, offset, playing_index, move_mode, h-6)
-                    draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index)
-                    need_redraw = False
+                    for _ in range(repeat):
+                        current_row, offset = page_position(key, current_row, offset, h-6, len(view))
+                elif key in (curses.KEY_LEFT, curses.KEY_RIGHT) and len(categories.names()):
+                    # Соседняя вкладка: ее строки уже готовы, курсор и прокрутка - как при уходе с нее
+                    tabs = [None] + categories.names()
+                    position = tabs.index(tab) if tab in tabs else 0
+                    position = (position + (repeat if key == curses.KEY_RIGHT else -repeat)) % len(tabs)
+                    if len(view):
+                        tab_positions[tab] = (view.row(current_row), current_row - offset)
+                    tab = tabs[position]
+                    view = tab_view(stations, categories, tab)
+                    current_row, offset = tab_position(view, tab_positions.get(tab, (0, 0)), stdscr.getmaxyx()[0] - 6)
+                elif key == ord('/') and stations:
+                    # Поиск станции по названию и адресу
+                    search_query = ""
+                    search_list = SearchView(stations)
+                    search_row, search_offset = current_row, offset
+                    search_return = (current_row, offset)
+                    if not search.ready:
+                        timers.call_later(0.5, TICK)  # ход индексирования в строке поиска
+                elif key == ord('s') and len(view) > 1 and not connect:
+                    # Обзор: станции вкладки после выделенной по очереди звучат scan_seconds сек
+                    from player.scan import Scanner
+                    scanner = Scanner(view, current_row, lambda row, view=view: variants.pick(view[row][1]),
+                                      scan_seconds, health=health.cache if health else None,
+                                      health_key=lambda row, view=view: primary_url(view[row][1]),
+                                      prefetch=prefetch, bus=bus)
+                    timers.call_later(0.0, TICK, "scan")
+                elif key == ord('g') and stations:
+                    # Переход к станции по номеру
+                    h, w = stdscr.getmaxyx()
+                    try:
+                        stdscr.move(h-2, 0)
+                        stdscr.clrtoeol()
+                        answer = get_input(stdscr, f"Перейти к станции (1-{len(stations)}): ", h-2, 0)
+                    except curses.error:
+                        answer = ""
+                    if answer.strip().isdigit():
+                        row = min(max(int(answer) - 1, 0), len(stations) - 1)
+                        if view.index_of(row) < 0:
+                            # станции нет на открытой вкладке - переходим на «Все»
+                            tab_positions[tab] = (view.row(current_row), current_row - offset)
+                            tab = None
+                            view = tab_view(stations, categories, tab)
+                        current_row = view.index_of(row)
+                        offset = scroll_offset(current_row, offset, h-6)
                 elif key == curses.KEY_ENTER or key in [10, 13]:
-                    # Останавливаем предыдущее проигрывание, если есть
-                    if vlc_process and vlc_process.poll() is None:
-                        vlc_process.terminate()
-                        vlc_process.wait()
-                    
-                    # Запускаем новую станцию
-                    playing_index = current_row
-                    vlc_process = vlc_open(vlc_prg, stations[current_row][1])
+                    # Запускаем новую станцию: прежняя играет, пока новая не начнет воспроизведение
+                    trace.begin("Enter", key_started)
+                    switch_back = playing_id if player.is_active() else None
+                    playing_index = view.row(current_row)
+                    playing_id = station_id(stations, playing_index)
+                    url = variants.choose(stations[playing_index][1])
+                    switch_station(player, source_url(url, prefetch, timeshift, resolver), switch_mode)
+                    trace.mark("интерфейс")  # клавиатура снова свободна
                 elif key == 27:  # ESC - остановить проигрывание
-                    if vlc_process and vlc_process.poll() is None:
-                        vlc_process.terminate()
-                        vlc_process.wait()
-                        playing_index = -1
+                    if player.is_active() or timeshift and timeshift.paused():
+                        player.stop()
+                        playing_index, playing_id = -1, None
+                elif key == ord(' ') and timeshift and playing_index >= 0:
+                    # Пауза: плеер останавливается, запись станции продолжается; продолжение - с того же места
+                    if timeshift.paused():
+                        url = timeshift.resume()
+                        if url:
+                            player.play(url)
+                    else:
+                        timeshift.pause()
+                        player.stop()
+                    if not timeshift_tick:
+                        timeshift_tick = True
+                        timers.call_later(1.0, TICK, "timeshift")
+                elif key in (ord('['), ord(']'), ord('l')) and timeshift and playing_index >= 0:
+                    # Перемотка по записи: [ - назад, ] - вперед на TIMESHIFT_STEP сек, l - к эфиру
+                    seconds = -timeshift.behind() if key == ord('l') else TIMESHIFT_STEP * repeat * (1 if key == ord('[') else -1)
+                    url = timeshift.seek(seconds)
+                    if url:
+                        player.switch(url)  # прежнее место играет, пока не начнется новое
+                    if not timeshift_tick:
+                        timeshift_tick = True
+                        timers.call_later(1.0, TICK, "timeshift")
                 elif key in [ord('q'), 274]:
-                    if playing_index >= 0:  # Если что-то играет - только остановить
-                        if vlc_process and vlc_process.poll() is None:
-                            vlc_process.terminate()
-                            vlc_process.wait()
-                        playing_index = -1
+                    if playing_index >= 0 and not connect:  # Если что-то играет - только остановить; демон играет и без интерфейса
+                        player.stop()
+                        playing_index, playing_id = -1, None
                     break
                 elif key == 331:
                     # Добавление новой станции Ins
@@ -227,51 +751,72 @@ def main(stdscr, autoplay):
                         url = get_valid_url(stdscr, url_y, url_x + len(url_prompt), 50)
                         
                         if url and url.strip():
+                            # Категория: по умолчанию - открытой вкладки, пустая - без категории
+                            category_prompt = "Категория: "
+                            category_y = h//2 + 3
+                            category_x = w//2 - len(category_prompt)//2
+                            stdscr.addstr(category_y, category_x, category_prompt)
+                            category = text_field_unicode(stdscr, category_y, category_x + len(category_prompt), 30, tab or "", russian=True)
+                            category = (category or "").strip()
+                            station = (name.strip(), url.strip(), category) if category else (name.strip(), url.strip())
+
                             # Добавляем новую станцию
-                            stations.append((name.strip(), url.strip()))
-                            save_stations(stations_file, stations)
+                            stations.append(station)
+                            store.changed(stations, ("add", *station))
+                            search.add(stations.id_at(len(stations) - 1), name.strip(), url.strip())
+                            categories.added(len(stations) - 1, category)
+                            if health:
+                                health.start([primary_url(url)])
                             
-                            # Обновляем текущую строку
-                            current_row = len(stations) - 1
+                            # Обновляем текущую строку; станция другой категории - переходим на «Все»
+                            if tab is not None and category != tab:
+                                if len(view):
+                                    tab_positions[tab] = (view.row(current_row), current_row - offset)
+                                tab = None
+                                view = tab_view(stations, categories, tab)
+                            current_row = max(view.index_of(len(stations) - 1), 0)
                 elif key == 330:
                     # Удаление текущей станции с подтверждением Del
-                    if len(stations) > 0:
-                        choice = show_confirmation(stdscr, f"Удалить станцию: {stations[current_row][0]}?")
+                    if len(view) > 0:
+                        row = view.row(current_row)
+                        choice = show_confirmation(stdscr, f"Удалить станцию: {stations[row][0]}?")
                         if choice == 0:  # Да
                             # Останавливаем воспроизведение, если удаляем играющую станцию
-                            if playing_index == current_row:
-                                if vlc_process and vlc_process.poll() is None:
-                                    vlc_process.terminate()
-                                    vlc_process.wait()
-                                playing_index = -1
+                            if playing_index == row:
+                                player.stop()
+                                playing_index, playing_id = -1, None
                             
                             # Удаляем станцию
-                            del stations[current_row]
-                            save_stations(stations_file, stations)
+                            removed_id, removed, removed_category = stations.id_at(row), stations[row], stations.category(row)
+                            del stations[row]
+                            store.changed(stations, ("delete", row))
+                            search.remove(removed_id, *removed)
+                            categories.deleted(row, removed_category)
                             
                             # Корректируем позицию курсора
-                            if current_row >= len(stations):
-                                current_row = max(0, len(stations) - 1)
-                            # Корректируем индекс играющей станции
-                            if playing_index > current_row:
-                                playing_index -= 1
+                            if current_row >= len(view):
+                                current_row = max(0, len(view) - 1)
+                elif key == 267 and tab is not None:
+                    need_redraw = redraw_pending  # порядок меняется только на вкладке «Все»
                 elif key == 267: 
                     # Вход в режим перемещения станции F3
                     move_mode = True                    
                     moving_index = current_row
-                    original_stations = stations.copy()  # Сохраняем исходный порядок
+                    move_start = current_row
                     if playing_index == current_row:
                         move_mode_playing = True
                 elif key == curses.KEY_F4:
                     # Редактирование текущей станции
-                    if len(stations) > 0:
+                    if len(view) > 0:
+                        row = view.row(current_row)
                         stdscr.clear()
                         h, w = stdscr.getmaxyx()
                         editing = True
-                        edit_step = 1  # 1 - редактирование названия, 2 - редактирование URL
+                        edit_step = 1  # 1 - редактирование названия, 2 - редактирование URL, 3 - категории
                         
                         # Сохраняем оригинальные значения на случай отмены
-                        original_name, original_url = stations[current_row]
+                        original_name, original_url = stations[row]
+                        original_category = stations.category(row)
                         new_name, new_url = original_name, original_url
 
                         # Шаг 1: Редактирование названия
@@ -287,12 +832,33 @@ def main(stdscr, autoplay):
                         width= len(new_url) if len(new_url)>50 else 50
                         new_url = get_valid_url(stdscr, h//2, w//2 - len(new_url)//2, width, new_url)
 
+                        # Шаг 3: Редактирование категории (пустая - без категории)
+                        new_category = None
                         if new_name and new_url:
+                            stdscr.clear()
+                            prompt = "Редактирование категории (Enter - подтвердить, Esc - отмена):"
+                            stdscr.addstr(h//2 - 2, w//2 - len(prompt)//2, prompt)
+                            new_category = text_field_unicode(stdscr, h//2, w//2 - 15, 30, original_category, russian=True)
+
+                        if new_name and new_url and new_category is not None:
                             # Сохраняем изменения
-                            stations[current_row] = (new_name, new_url)
-                            save_stations(stations_file, stations)
+                            new_category = new_category.strip()
+                            station = (new_name, new_url, new_category) if new_category or original_category else (new_name, new_url)
+                            old_id = stations.id_at(row)
+                            stations[row] = station
+                            store.changed(stations, ("edit", row, *station))
+                            search.remove(old_id, original_name, original_url)
+                            search.add(stations.id_at(row), new_name, new_url)
+                            if playing_id == old_id:
+                                playing_id = stations.id_at(row)  # измененная станция получила новый номер
+                            categories.edited(row, original_category, new_category)
+                            if health:
+                                health.start([primary_url(new_url)])
+                            # станция ушла в другую категорию - курсор остается в пределах вкладки
+                            current_row = min(current_row, max(len(view) - 1, 0))
                 elif key == curses.KEY_F2: 
                     # сохранение станций в файл
+                    from datetime import datetime
                     stdscr.clear()
                     current_date = datetime.now().strftime("%Y%m%d")
                     prompt = "Введите имя файла для сохранения станций:"
@@ -304,20 +870,39 @@ def main(stdscr, autoplay):
                         filename = f"{new_filename}.csv"
                         save_stations(filename, stations)
                 elif key == curses.KEY_F5:  # Загрузка станций из файла
-                    # Получаем список CSV файлов в текущей директории
-                    files = [f for f in os.listdir() if f.endswith('.csv')]
+                    # Файлы станций в текущей директории: CSV можно загрузить вместо списка,
+                    # CSV, M3U, PLS и JSON - добавить к списку (импорт идет в фоне)
+                    from storage.importer import FORMATS, StationImporter
+                    files = sorted(f for f in os.listdir() if os.path.splitext(f)[1].lower() in FORMATS)
                     if files:
                         selected_file = select_file_from_list(stdscr, files)
-                        if selected_file:
+                        replace = False
+                        if selected_file and selected_file.lower().endswith('.csv'):
+                            choice = show_confirmation(stdscr, f"{selected_file[:30]}: добавить к списку?", ["Добавить", "Заменить"])
+                            replace = choice == 1
+                            if choice is None:
+                                selected_file = None
+                        if selected_file and not replace:
+                            if importer and not importer.done:
+                                h, w = stdscr.getmaxyx()
+                                stdscr.addstr(h-1, 0, "Импорт уже идет", curses.A_BOLD | curses.color_pair(1))
+                                stdscr.getch()
+                            else:
+                                importer = StationImporter(selected_file, stations, cache_path("imported.csv"), bus)
+                                importer.start()
+                        elif selected_file:
                             try:
-                                new_stations = load_stations(selected_file)
+                                new_stations = StationCatalog.open(selected_file)
                                 stations = new_stations
-                                save_stations(stations_file, stations)  # Сохраняем в основной файл
-                                current_row = 0  # Сбрасываем позицию курсора
-                                playing_index = -1  # Сбрасываем воспроизведение
-                                if vlc_process and vlc_process.poll() is None:
-                                    vlc_process.terminate()
-                                    vlc_process.wait()
+                                store.changed(stations)  # Сохраняем в основной файл
+                                search.start(stations.copy().items())
+                                categories.start(stations)
+                                tab, tab_positions = None, {}
+                                current_row = offset = 0  # Сбрасываем позицию курсора
+                                if health:
+                                    health.start(primary_url(url) for name, url in stations.copy())
+                                playing_index, playing_id = -1, None  # Сбрасываем воспроизведение
+                                player.stop()
                             except Exception as e:
                                 # Показываем сообщение об ошибке
                                 h, w = stdscr.getmaxyx()
@@ -326,42 +911,216 @@ def main(stdscr, autoplay):
                                 stdscr.getch()
                     else:
                         h, w = stdscr.getmaxyx()
-                        error_msg = "Нет CSV файлов в текущей директории"
+                        error_msg = "Нет файлов станций (CSV, M3U, PLS, JSON) в текущей директории"
                         stdscr.addstr(h-1, 0, error_msg, curses.A_BOLD | curses.color_pair(1))
                         stdscr.getch()
+                elif key == ord("p") and tracer:
+                    overlay = not overlay
                 elif key == ord("+"):
                     if playing_index >= 0:
                         current_volume = min(current_volume + 10, 512)  # +10%
-                        set_vlc_volume(current_volume)
-                        # Обновляем только строку состояния
-                        h, w = stdscr.getmaxyx()
-                        draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index)
-                        need_redraw = False
+                        player.set_volume(current_volume)
                 elif key == ord("-"):
                     if playing_index >= 0:
                         current_volume = max(current_volume - 10, 0)  # -10%
-                        set_vlc_volume(current_volume)
-                        # Обновляем только строку состояния
-                        h, w = stdscr.getmaxyx()
-                        draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index)
-                        need_redraw = False
+                        player.set_volume(current_volume)
                 else:
-                    need_redraw = False  # Неизвестная клавиша - не перерисовываем
+                    need_redraw = redraw_pending  # Неизвестная клавиша - не перерисовываем
+                if key in DIALOG_KEYS:
+                    screen.invalidate()  # диалоги рисуют прямо в окне curses, мимо модели экрана
 
         except KeyboardInterrupt:
-            if vlc_process and vlc_process.poll() is None:
-                vlc_process.terminate()
-                vlc_process.wait()
             break
 
-@click.command()
+    store.close()
+    if not store.error:
+        # станции импорта уже в файле списка; собранный файл импорта больше не нужен
+        try:
+            os.remove(cache_path("imported.csv"))
+        except OSError:
+            pass
+    if watchdog:
+        watchdog.close()
+    if scanner:
+        scanner.close()
+    player.close()
+    if titles and titles is not player:
+        titles.close()
+    if timeshift:
+        timeshift.close()
+    variants.close()
+    if importer:
+        importer.cancel()
+    if resolver:
+        try:
+            resolver.save()
+        except OSError:
+            pass  # без кэша адреса просто разбираются заново
+    bus.close()
+    if tracer:
+        trace.disable()
+        try:
+            tracer.dump(profile)
+        except OSError:
+            pass
+    if prefetch:
+        prefetch.close()  # закрывает и ретранслятор
+        return prefetch.stats()
+    if relay:
+        relay.close()
+
+@click.group(invoke_without_command=True)
 @click.option('--autoplay', default=-1, help='Автопроигрывание номера заданной станции нумерация от 0')
-def _main(autoplay):
+@click.option('--backend', default='auto', type=click.Choice(BACKENDS),
+              help='Движок воспроизведения: libvlc внутри процесса или отдельный процесс vlc')
+@click.option('--switch', 'switch_mode', default='cut', type=click.Choice(SWITCH_MODES),
+              help='Смена станции: cut/crossfade - новая подключается, пока играет старая; stop - сначала остановить старую')
+@click.option('--prefetch/--no-prefetch', default=True, help='Предзагрузка выделенной станции и соседних')
+@click.option('--prefetch-stats', is_flag=True, help='Показать статистику предзагрузки при выходе')
+@click.option('--health/--no-health', default=True, help='Фоновая проверка доступности станций')
+@click.option('--titles/--no-titles', default=True, help='Показывать название песни из метаданных потока')
+@click.option('--journal', is_flag=True, help='Журнал изменений списка: CSV переписывается только при выходе')
+@click.option('--resolve/--no-resolve', default=True,
+              help='Запоминать итоговые адреса потоков: плейлисты и перенаправления разбираются один раз')
+@click.option('--timeshift', 'timeshift_minutes', default=0.0,
+              help='Пауза и перемотка эфира: сколько минут станции держать в кольцевом файле (0 - выключено)')
+@click.option('--connect', is_flag=True, help='Управлять запущенным демоном (atradio serve) вместо своего плеера')
+@click.option('--socket', 'socket_file', default=None, help='Сокет демона для --connect')
+@click.option('--profile', default=None,
+              help='Замеры от нажатия до звука: гистограммы при выходе в этот файл (.json или .csv), p - строка замеров')
+@click.option('--reconnect/--no-reconnect', default=True,
+              help='Переподключать станцию, если поток оборвался или замолчал')
+@click.option('--scan-seconds', default=5.0, help='Сколько секунд звучит каждая станция в обзоре (клавиша s)')
+@click.pass_context
+def _main(ctx, autoplay, backend, switch_mode, prefetch, prefetch_stats, health, titles, journal, resolve,
+          timeshift_minutes, connect, socket_file, profile, reconnect, scan_seconds):
+    if ctx.invoked_subcommand is not None:
+        return
+    stats = None
     try:
         stdscr = curses.initscr()
-        main(stdscr=stdscr, autoplay=autoplay)
+        stats = main(stdscr=stdscr, autoplay=autoplay, backend=backend, switch_mode=switch_mode,
+                     prefetch_stations=prefetch, check_health=health, read_titles=titles, journal=journal,
+                     connect=(socket_file or socket_path()) if connect else None, timeshift_minutes=timeshift_minutes,
+                     resolve_urls=resolve, profile=profile, reconnect=reconnect,
+                     scan_seconds=scan_seconds)
     finally:
         curses.endwin()
+    if prefetch_stats and stats:
+        print("Предзагрузка: " + ", ".join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+                                           for name, value in stats.items()))
+
+
+@_main.command()
+@click.option('--file', 'stations_file', default=STATIONS_FILE, help='Файл со станциями')
+@click.option('--concurrency', default=20, help='Сколько станций проверять одновременно')
+@click.option('--per-host', default=2, help='Сколько одновременных подключений к одному серверу')
+@click.option('--timeout', default=8.0, help='Таймаут подключения и первого байта, сек')
+@click.option('--force', is_flag=True, help='Проверить все станции, не используя кэш')
+def check(stations_file, concurrency, per_host, timeout, force):
+    """Проверка доступности потоков всех станций"""
+    import asyncio
+    from player.health import HealthCache, check_urls
+    stations = StationCatalog.open(stations_file)
+    cache = HealthCache(cache_path("health.json"))
+    # у станции с вариантами качества проверяется каждый вариант
+    every = [url for name, field in stations for url in variant_urls(field)]
+    urls = every if force else cache.stale(every)
+    asyncio.run(check_urls(urls, concurrency, per_host, timeout, on_result=cache.update))
+    cache.save()
+    alive = 0
+    for name, field in stations:
+        results = [cache.get(url) for url in variant_urls(field)]
+        if results[0]["ok"]:
+            alive += 1
+        for number, result in enumerate(results):
+            label = name if number == 0 else f"  вариант {number + 1}"
+            if result["ok"]:
+                bitrate = f"{result['bitrate']} кбит/с" if result["bitrate"] else "-"
+                print(f"● {result['ttfb'] * 1000:6.0f} мс  {result['content_type'] or '-':24} {bitrate:12} {label}")
+            else:
+                print(f"✗ {result['error']:<40} {label}")
+    print(f"Доступно {alive} из {len(stations)}")
+
+
+@_main.command(name="import")
+@click.argument('source', type=click.Path(exists=True, dir_okay=False))
+@click.option('--file', 'stations_file', default=STATIONS_FILE, help='Файл со станциями, к которому добавить новые')
+def import_stations(source, stations_file):
+    """Добавление станций из файла M3U, PLS, JSON или CSV в конец списка"""
+    from storage.importer import StationImporter
+    stations = StationCatalog.open(stations_file)
+    # собранный файл - прежний список и новые станции, им сразу подменяется файл списка
+    importer = StationImporter(source, stations, stations_file)
+    importer.start()
+    while not importer.done:
+        time.sleep(0.5)
+        print(f"\r{importer.progress():6.1%}  прочитано {importer.read}, добавлено {importer.added}", end="", flush=True)
+    print()
+    if importer.error:
+        print(f"Ошибка импорта: {importer.error}")
+        sys.exit(1)
+    print(f"Добавлено {importer.added}, повторов {importer.duplicates}, с ошибкой в адресе {importer.invalid}; "
+          f"{importer.rate():.0f} станций/с")
+
+
+@_main.command()
+@click.option('--file', 'stations_file', default=STATIONS_FILE, help='Файл со станциями')
+@click.option('--seconds', default=60.0, help='Сколько секунд слушать метаданные')
+def titles(stations_file, seconds):
+    """Названия песен всех станций сразу, по мере смены"""
+    from player.icy import NowPlaying
+    stations = [(name, primary_url(url)) for name, url in StationCatalog.open(stations_file)]
+    names = {url: name for name, url in stations}
+    board = NowPlaying(on_title=lambda url, title: print(f"{names[url]}: {title}", flush=True))
+    for name, url in stations:
+        board.watch(url)
+    try:
+        time.sleep(seconds)
+    except KeyboardInterrupt:
+        pass
+    board.close()
+    silent = [name for name, url in stations if board.title(url) is None]
+    print(f"Без названия: {len(silent)} из {len(stations)}")
+
+
+@_main.command()
+@click.option('--file', 'stations_file', default=STATIONS_FILE, help='Файл со станциями')
+@click.option('--socket', 'socket_file', default=None,
+              help='Управляющий сокет (по умолчанию $XDG_RUNTIME_DIR/atradio/atradio.sock)')
+@click.option('--backend', default='auto', type=click.Choice(BACKENDS), help='Движок воспроизведения')
+@click.option('--switch', 'switch_mode', default='cut', type=click.Choice(SWITCH_MODES), help='Смена станции')
+@click.option('--autoplay', default=-1, help='Сразу включить станцию с этим номером, нумерация от 0')
+@click.option('--titles/--no-titles', default=True, help='Читать название песни из метаданных потока')
+def serve(stations_file, socket_file, backend, switch_mode, autoplay, titles):
+    """Плеер без терминала: команды play, stop, volume, list, now, watch по unix-сокету"""
+    import asyncio
+    import signal
+    from player.daemon import PlayerDaemon
+    path = socket_file or socket_path()
+    os_name = platform.system()
+    bus = EventBus()
+    player = start_player(backend, default_vlc(os_name), os_name, bus)()
+    board = None
+    if titles:
+        from player.icy import NowPlaying
+        board = NowPlaying(bus)
+    daemon = PlayerDaemon(player, StationCatalog.open(stations_file), switch_mode, board)
+    if 0 <= autoplay < len(daemon.stations):
+        daemon.execute({"cmd": "play", "station": autoplay})
+    # SIGTERM завершает демон так же, как Ctrl+C: vlc останавливается, сокет удаляется
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"atradio: {len(daemon.stations)} станций, сокет {path}", flush=True)
+    try:
+        asyncio.run(daemon.serve(path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        player.close()
+        if board:
+            board.close()
+        bus.close()
+
 
 if __name__ == "__main__":
     _main()
\ No newline at end of file
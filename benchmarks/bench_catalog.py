@@ -0,0 +1,122 @@
+"""
+Большие каталоги станций: список кортежей из load_stations против ленивого StationCatalog.
+Меряются открытие файла, память, отрисовка экрана списка, прокрутка, PgDn, переход к строке
+и режим перемещения (F3) на 1k, 100k и 1M станций.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_catalog --sizes 1000,100000,1000000
+"""
+import curses
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import click
+
+from storage.catalog import StationCatalog
+from storage.stations import load_stations, save_stations
+from ui.ui_app import draw_stations_list, page_position, scroll_offset
+
+
+class NullScreen:
+    """Экран, который ничего не выводит: меряется только работа со списком"""
+
+    def getmaxyx(self):
+        return 56, 120
+
+    def addstr(self, *args):
+        pass
+
+
+def generate(filename, count):
+    save_stations(filename, ((f"Станция {i} FM", f"http://radio{i % 997}.example.com:8000/live{i}.mp3")
+                             for i in range(count)))
+
+
+def timed(action, repeat=1):
+    """Медиана времени выполнения action в мкс"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1e6
+
+
+def measure(open_list, filename):
+    screen = NullScreen()
+    max_display = screen.getmaxyx()[0] - 6
+    # память отдельным открытием: tracemalloc сильно замедляет создание объектов
+    tracemalloc.start()
+    stations = open_list(filename)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del stations
+    started = time.perf_counter()
+    stations = open_list(filename)
+    opened = time.perf_counter() - started
+    count = len(stations)
+    state = {"row": 0, "offset": 0}
+
+    def draw():
+        draw_stations_list(screen, stations, state["row"], state["offset"], -1, False, max_display)
+
+    def step_down():
+        state["row"] = min(state["row"] + 1, count - 1)
+        state["offset"] = scroll_offset(state["row"], state["offset"], max_display)
+        draw()
+
+    def page_down():
+        state["row"], state["offset"] = page_position(curses.KEY_NPAGE, state["row"], state["offset"],
+                                                      max_display, count)
+        draw()
+
+    def jump():
+        state["row"] = int(count * 0.9)
+        state["offset"] = scroll_offset(state["row"], 0, max_display)
+        draw()
+
+    def move_mode():
+        # вход в F3, 20 шагов вниз и закрепление; список копировался для отмены,
+        # каталог отменяет перемещение без копии. Копия для сохранения нужна обоим
+        row = state["row"]
+        backup = stations.copy() if isinstance(stations, list) else None
+        for i in range(row, min(row + 20, count - 1)):
+            if isinstance(stations, list):
+                stations[i], stations[i + 1] = stations[i + 1], stations[i]
+            else:
+                stations.swap(i, i + 1)
+        snapshot = stations.copy()
+        return backup, snapshot
+
+    return {
+        "открытие, мс": opened * 1000,
+        "память Python, МБ": memory / 1e6,
+        "первый экран, мкс": timed(draw),
+        "строка вниз, мкс": timed(step_down, 200),
+        "PgDn, мкс": timed(page_down, 50),
+        "переход к 90%, мкс": timed(jump),
+        "повторный переход, мкс": timed(jump, 20),
+        "F3: 20 шагов, мкс": timed(move_mode, 5),
+    }
+
+
+@click.command()
+@click.option('--sizes', default='1000,100000,1000000', help='Размеры каталогов через запятую')
+def bench(sizes):
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(size) for size in sizes.split(",")):
+            filename = os.path.join(directory, f"stations-{count}.csv")
+            generate(filename, count)
+            print(f"[{count} станций, файл {os.path.getsize(filename) / 1e6:.1f} МБ]")
+            results = [("list", measure(load_stations, filename)),
+                       ("StationCatalog", measure(StationCatalog.open, filename))]
+            print(f"  {'':24}" + "".join(f"{name:>16}" for name, _ in results))
+            for metric in results[0][1]:
+                print(f"  {metric:24}" + "".join(f"{values[metric]:16.1f}" for _, values in results))
+
+
+if __name__ == "__main__":
+    bench()
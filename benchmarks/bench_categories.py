@@ -0,0 +1,125 @@
+"""
+Вкладки категорий: переключение вкладки и правка списка.
+Готовые строки категорий (CategoryIndex) против фильтрации всего списка по категории при каждом
+переключении и после каждой правки. Время переключения включает первый экран вкладки.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_categories --sizes 1000,100000,1000000
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import click
+
+from atradio import tab_view
+from benchmarks.bench_catalog import NullScreen
+from storage.catalog import StationCatalog
+from storage.categories import CategoryIndex
+from storage.search import SearchView
+from ui.ui_app import draw_stations_list
+
+CATEGORIES = ["Поп", "Рок", "Джаз", "Классика", "Новости", "Юмор", "Детское", "Ретро", "Книги и спектакли",
+              "Национальное", "Шансон", "Электроника"]
+
+
+def generate(filename, count):
+    rng = random.Random(1)
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write("Name;URL;Category\n")
+        for i in range(count):
+            # у части станций категории нет - они видны только на вкладке «Все»
+            category = rng.choice(CATEGORIES) if rng.random() < 0.9 else ""
+            file.write(f"Станция {i} FM;http://radio{i % 997}.example.com/live{i};{category}\n")
+
+
+def build(stations):
+    categories = CategoryIndex()
+    started = time.perf_counter()
+    categories.start(stations)
+    while not categories.ready:
+        time.sleep(0.01)
+    return categories, time.perf_counter() - started
+
+
+def refilter(stations, category):
+    """Как без индекса: строки категории - перебором всего списка"""
+    return SearchView(stations, [row for row in range(len(stations)) if stations.category(row) == category])
+
+
+def timed(action, repeat):
+    """Медиана одного действия в мс"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        action()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+@click.command()
+@click.option('--sizes', default='1000,100000,1000000', help='Размеры каталогов через запятую')
+@click.option('--filter-limit', default=100000, help='Фильтрация меряется только на каталогах не больше этого')
+def bench(sizes, filter_limit):
+    screen = NullScreen()
+    max_display = screen.getmaxyx()[0] - 6
+    rng = random.Random(2)
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(size) for size in sizes.split(",")):
+            filename = os.path.join(directory, f"stations-{count}.csv")
+            generate(filename, count)
+            stations = StationCatalog.open(filename)
+            categories, seconds = build(stations)
+            print(f"[{count} станций, {len(categories.names())} категорий, индекс построен в фоне за {seconds:.2f} с]")
+
+            def switch(find):
+                def action():
+                    view = find(rng.choice(CATEGORIES))
+                    draw_stations_list(screen, view, 0, 0, -1, False, max_display)
+                return action
+
+            print(f"  переключение вкладки: индекс {timed(switch(lambda tab: tab_view(stations, categories, tab)), 50):8.3f} мс", end="")
+            if count <= filter_limit:
+                print(f", фильтрация {timed(switch(lambda tab: refilter(stations, tab)), 5):8.1f} мс")
+            else:
+                print()
+
+            # правки списка: строки берутся случайно, индекс правится на месте
+            def add():
+                stations.append(("Новая FM", "http://new.example.com/live", "Рок"))
+                categories.added(len(stations) - 1, "Рок")
+
+            def delete():
+                row = rng.randrange(len(stations))
+                category = stations.category(row)
+                del stations[row]
+                categories.deleted(row, category)
+
+            def edit():
+                row = rng.randrange(len(stations))
+                old, new = stations.category(row), rng.choice(CATEGORIES)
+                stations[row] = (*stations[row], new)
+                categories.edited(row, old, new)
+
+            def swap():
+                row = rng.randrange(len(stations) - 1)
+                stations.swap(row, row + 1)
+                categories.swapped(row, row + 1)
+
+            def move():
+                source = rng.randrange(len(stations))
+                target = min(max(source + rng.randint(-50, 50), 0), len(stations) - 1)
+                stations.move(source, target)
+                categories.moved(source, target)
+
+            for name, action in (("добавление", add), ("удаление", delete), ("правка категории", edit),
+                                 ("перестановка (F3)", swap), ("отмена перемещения на 50", move)):
+                print(f"  {name:26} {timed(action, 20):8.3f} мс")
+            if count <= filter_limit:
+                print(f"  {'пересчет вкладки фильтром':26} {timed(lambda: refilter(stations, 'Рок'), 5):8.1f} мс")
+
+
+if __name__ == "__main__":
+    bench()
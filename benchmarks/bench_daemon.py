@@ -0,0 +1,138 @@
+"""
+Демон (atradio serve): время ответа на команду и пропускная способность при многих клиентах.
+Демон запускается отдельным процессом, как в жизни; вместо vlc - плеер, который «играет» сразу,
+поэтому меряется только сам демон: сокет, разбор запроса, ответ. Команды в короткой форме и в JSON.
+Пропускная способность - сколько команд now в секунду обслуживают 1, 10, 100 клиентов сразу,
+каждый шлет следующую команду, получив ответ на предыдущую.
+
+Запуск из корня проекта (только Unix):
+    python -m benchmarks.bench_daemon --requests 2000 --clients 1,10,100
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+from player.backends import Player
+
+COMMANDS = [
+    ("now", b"now\n"),
+    ("now (JSON)", b'{"cmd":"now","id":1}\n'),
+    ("volume", b"volume 200\n"),
+    ("list 0 20", b"list 0 20\n"),
+    ("list 0 20 (JSON)", b'{"cmd":"list","offset":0,"limit":20}\n'),
+    ("play", b"play 1\n"),
+]
+
+
+class NullPlayer(Player):
+    """Плеер без звука: поток «начинает играть» сразу"""
+    name = "null"
+    poll_interval = 0.001
+
+    def _start(self, url, volume):
+        return object()
+
+    def _state(self, handle):
+        return "playing"
+
+    def _set_handle_volume(self, handle, volume):
+        pass
+
+    def _stop_handle(self, handle):
+        pass
+
+
+def child(path, count):
+    """Процесс демона"""
+    from player.daemon import PlayerDaemon
+    stations = [(f"Станция {i} FM", f"http://radio{i % 997}.example.com/live{i}") for i in range(count)]
+    daemon = PlayerDaemon(NullPlayer(), stations)
+    try:
+        asyncio.run(daemon.serve(path))
+    except KeyboardInterrupt:
+        pass
+
+
+def start_daemon(path, count, timeout=10.0):
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_daemon", "--child", path,
+                                "--stations", str(count)])
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline or process.poll() is not None:
+            process.kill()
+            raise OSError("демон не запустился")
+        time.sleep(0.01)
+    return process
+
+
+def round_trips(path, line, repeat):
+    """Время от отправки команды до полного ответа, мс"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    file = sock.makefile("rwb")
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        file.write(line)
+        file.flush()
+        if not file.readline():
+            break
+        times.append((time.perf_counter() - started) * 1000)
+    sock.close()
+    return times
+
+
+async def throughput(path, clients, requests):
+    """Команд в секунду: clients клиентов, у каждого requests команд подряд"""
+    async def client():
+        reader, writer = await asyncio.open_unix_connection(path)
+        for _ in range(requests):
+            writer.write(b"now\n")
+            await writer.drain()
+            await reader.readline()
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return clients * requests / (time.perf_counter() - started)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+@click.command()
+@click.option('--requests', default=2000, help='Команд каждого вида для замера времени ответа')
+@click.option('--clients', default='1,10,100', help='Сколько клиентов сразу, через запятую')
+@click.option('--stations', default=100000, help='Станций в списке демона')
+@click.option('--child', 'child_path', default=None, hidden=True)
+def bench(requests, clients, stations, child_path):
+    if child_path:
+        return child(child_path, stations)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "atradio.sock")
+        process = start_daemon(path, stations)
+        try:
+            print(f"[демон: {stations} станций, {requests} команд каждого вида]")
+            for name, line in COMMANDS:
+                times = round_trips(path, line, requests)
+                print(f"  {name:18} медиана {statistics.median(times):7.3f} мс, p99 {percentile(times, 0.99):7.3f} мс")
+            print("  пропускная способность (now):")
+            for count in (int(value) for value in clients.split(",")):
+                rate = asyncio.run(throughput(path, count, max(requests // count, 20)))
+                print(f"    {count:4} клиентов: {rate:9.0f} команд/с")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    bench()
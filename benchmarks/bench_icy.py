@@ -0,0 +1,53 @@
+"""
+Стоимость чтения названий песен: сколько процессорного времени фоновый цикл тратит на разбор
+потоков с метаданными Shoutcast у многих станций сразу. Звук не декодируется, поэтому
+нагрузка на станцию должна быть на порядки меньше, чем у воспроизведения в VLC.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_icy --stations 50 --seconds 5
+"""
+import time
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from player.aioloop import submit
+from player.icy import NowPlaying
+
+
+async def loop_cpu_time():
+    # время процессора только потока asyncio-цикла, без сервера в том же процессе
+    return time.thread_time()
+
+
+@click.command()
+@click.option('--stations', default=50, help='Сколько станций читать одновременно')
+@click.option('--seconds', default=5.0, help='Длительность замера, сек')
+@click.option('--metaint', default=16000, help='Интервал метаданных, байт (обычное значение у станций)')
+@click.option('--burst', default=256, help='Кадров mp3 в начальной пачке каждого потока')
+def bench(stations, seconds, metaint, burst):
+    changes = []
+    with FakeStreamServer(burst_frames=burst, metaint=metaint) as server:
+        board = NowPlaying(on_title=lambda url, title: changes.append(title))
+        cpu_before = submit(loop_cpu_time()).result()
+        started = time.monotonic()
+        for i in range(stations):
+            board.watch(server.url(f"/s{i}"))
+        time.sleep(seconds / 2)
+        server.title = "Silence - Track 2"
+        time.sleep(seconds / 2)
+        cpu = submit(loop_cpu_time()).result() - cpu_before
+        elapsed = time.monotonic() - started
+        readers = list(board.readers.values())
+        board.close()
+        time.sleep(0.2)
+    total = sum(reader.bytes_read for reader in readers) or 1
+    print(f"станций: {stations}, за {elapsed:.1f} с прочитано {total / 1e6:.1f} МБ")
+    print(f"  процессор фонового цикла: {cpu * 1000:.0f} мс всего, {cpu / elapsed * 100:.2f}% одного ядра, "
+          f"{cpu / elapsed / stations * 100:.3f}% на станцию")
+    print(f"  {cpu * 1000 / (total / 1e6):.2f} мс процессора на МБ потока")
+    print(f"  смен названия получено: {len(changes)} из {stations * 2}")
+
+
+if __name__ == "__main__":
+    bench()
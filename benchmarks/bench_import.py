@@ -0,0 +1,115 @@
+"""
+Импорт станций (StationImporter) из больших файлов: станций в секунду и память процесса.
+Генерируется файл нужного размера в формате M3U, PLS, JSON или CSV: у станций свои имена и хосты,
+часть адресов повторяется (--duplicates), часть некорректна (--invalid). Станции дописываются
+к списку data/radio_stations.csv во временном каталоге. Память - пик анонимной памяти процесса
+сверх исходной: файл читается потоком, растет только индекс хэшей уникальных адресов.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_import --megabytes 300 --formats m3u,json
+"""
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import click
+
+from benchmarks.bench_timeshift import anonymous_memory
+from storage.catalog import StationCatalog
+from storage.importer import StationImporter
+
+BASE_FILE = "data/radio_stations.csv"
+
+
+def station(number, duplicates, invalid, rng):
+    """(название, адрес) станции number; повтор - адрес одной из прежних станций"""
+    if number and rng.random() < duplicates:
+        number = rng.randrange(number)
+    if rng.random() < invalid:
+        return f"Станция {number} FM", f"radio{number}.example.com/live"
+    return f"Станция {number} FM", f"http://radio{number % 5000}.example.com:8000/live{number}.mp3"
+
+
+def generate(path, format_name, megabytes, duplicates, invalid, seed):
+    """Пишет файл не меньше megabytes МБ; возвращает число станций"""
+    rng = random.Random(seed)
+    limit = megabytes << 20
+    count = 0
+    with open(path, "w", encoding="utf-8") as file:
+        file.write({"m3u": "#EXTM3U\n", "pls": "[playlist]\n", "json": "[\n", "csv": "Name;URL\n"}[format_name])
+        written = 0
+        while written < limit:
+            lines = []
+            for _ in range(1000):
+                name, url = station(count, duplicates, invalid, rng)
+                count += 1
+                if format_name == "m3u":
+                    lines.append(f'#EXTINF:-1 tvg-id="{count}" group-title="Жанр {count % 40}",{name}\n{url}\n')
+                elif format_name == "pls":
+                    lines.append(f"File{count}={url}\nTitle{count}={name}\nLength{count}=-1\n")
+                elif format_name == "json":
+                    lines.append(f'{"," if count > 1 else ""}{{"name": "{name}", "url": "{url}", '
+                                 f'"tags": "pop,rock", "country": "Россия", "bitrate": 128, "votes": {count % 977}}}\n')
+                else:
+                    lines.append(f"{name};{url}\n")
+            chunk = "".join(lines)
+            file.write(chunk)
+            written += len(chunk.encode("utf-8"))
+        if format_name == "json":
+            file.write("]\n")
+    return count
+
+
+def run_import(source, directory):
+    """Импорт в копию списка станций; возвращает (импорт, пик анонимной памяти сверх исходной, МБ)"""
+    stations_file = os.path.join(directory, "stations.csv")
+    shutil.copyfile(BASE_FILE, stations_file)
+    stations = StationCatalog.open(stations_file)
+    importer = StationImporter(source, stations, os.path.join(directory, "imported.csv"))
+    baseline = anonymous_memory()
+    peak = [baseline]
+    finished = threading.Event()
+
+    def sample():
+        while not finished.wait(0.1):
+            peak[0] = max(peak[0], anonymous_memory())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    importer.run()
+    finished.set()
+    sampler.join()
+    return importer, max(peak[0], anonymous_memory()) - baseline
+
+
+@click.command()
+@click.option('--megabytes', default=300, help='Размер сгенерированного файла, МБ')
+@click.option('--formats', default='m3u,json', help='Форматы через запятую: m3u, pls, json, csv')
+@click.option('--duplicates', default=0.1, help='Доля повторяющихся адресов')
+@click.option('--invalid', default=0.01, help='Доля некорректных адресов')
+@click.option('--seed', default=1)
+def bench(megabytes, formats, duplicates, invalid, seed):
+    with tempfile.TemporaryDirectory() as directory:
+        for format_name in formats.split(","):
+            source = os.path.join(directory, f"catalog.{format_name}")
+            started = time.monotonic()
+            count = generate(source, format_name, megabytes, duplicates, invalid, seed)
+            size = os.path.getsize(source) / (1 << 20)
+            print(f"[{format_name}: {size:.0f} МБ, {count} станций, сгенерирован за {time.monotonic() - started:.1f} с]")
+            importer, memory = run_import(source, directory)
+            if importer.error:
+                print(f"  ошибка: {importer.error}")
+                continue
+            elapsed = importer.finished - importer.started
+            print(f"  {importer.rate():9.0f} станций/с, {size / elapsed:6.1f} МБ/с, всего {elapsed:.1f} с")
+            print(f"  добавлено {importer.added}, повторов {importer.duplicates}, с ошибкой {importer.invalid}")
+            print(f"  пик памяти сверх исходной {memory:.1f} МБ "
+                  f"({memory * (1 << 20) / max(importer.added, 1):.0f} байт на новую станцию)")
+            os.remove(source)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,173 @@
+"""
+Задержка от нажатия до кадра на экране при потоке автоповтора ↓ на медленном терминале.
+Программа со списком станций работает в псевдотерминале; бенчмарк шлет ↓ с заданной частотой
+и читает вывод не быстрее заданной пропускной способности (как SSH на медленном канале).
+После каждого кадра программа выводит строку курсора заголовком окна (OSC 0): время кадра -
+когда этот заголовок дошел до терминала.
+  key   - как было: getch, обработка и кадр на каждую клавишу;
+  batch - wait_keys забирает все накопившиеся клавиши, серия ↓ сливается в один шаг,
+          кадров не больше одного за FRAME_TIME.
+
+Запуск из корня проекта (только Unix):
+    python -m benchmarks.bench_input --keys 300 --rate 60 --throughput 20000
+"""
+import curses
+import fcntl
+import os
+import pty
+import re
+import select
+import statistics
+import struct
+import sys
+import termios
+import threading
+import time
+
+import click
+
+from ui.ui_app import full_redraw, scroll_offset
+from ui.ui_interface import wait_keys
+from ui.ui_loop import FRAME_TIME, coalesce_keys
+from ui.ui_screen import Screen
+
+MODES = ("key", "batch")
+KEY_DOWN = b"\x1bOB"  # ↓ в режиме keypad для TERM=xterm
+
+
+MARK = re.compile(rb"\x1b]0;(\d+)\x07")
+
+
+def drive(stdscr, mode, count):
+    """Цикл программы в псевдотерминале"""
+    curses.start_color()
+    curses.use_default_colors()
+    curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)
+    curses.init_pair(2, curses.COLOR_GREEN, -1)
+    curses.curs_set(0)
+    stations = [(f"Станция {i} FM", f"http://radio{i}.example.com:8000/live.mp3") for i in range(count)]
+    screen = Screen(stdscr)
+    state = {"row": 0, "offset": 0}
+
+    def draw():
+        frame = screen.frame()
+        full_redraw(frame, stations, state["row"], state["offset"], -1, False, False, 100, -1)
+        screen.show(frame)
+        os.write(sys.stdout.fileno(), f"\x1b]0;{state['row']}\x07".encode())
+
+    def down(repeat):
+        state["row"] = min(state["row"] + repeat, count - 1)
+        state["offset"] = scroll_offset(state["row"], state["offset"], stdscr.getmaxyx()[0] - 6)
+
+    draw()
+    if mode == "key":
+        while True:
+            key = stdscr.getch()
+            if key == ord("q"):
+                return
+            if key == curses.KEY_DOWN:
+                down(1)
+                draw()
+    last_frame = 0.0
+    need_redraw = False
+    while True:
+        now = time.monotonic()
+        if need_redraw and now >= last_frame + FRAME_TIME:
+            draw()
+            last_frame, need_redraw = now, False
+        timeout = max(last_frame + FRAME_TIME - now, 0) if need_redraw else None
+        for key, repeat in coalesce_keys(wait_keys(stdscr, None, False, timeout)):
+            if key == ord("q"):
+                return
+            if key == curses.KEY_DOWN:
+                down(repeat)
+                need_redraw = True
+
+
+def measure(mode, count, keys, rate, throughput, rows, columns):
+    pid, fd = pty.fork()
+    if pid == 0:
+        env = dict(os.environ, TERM="xterm")
+        os.execvpe(sys.executable, [sys.executable, "-m", "benchmarks.bench_input", "--child", mode,
+                                    "--stations", str(count)], env)
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+    sent = []
+    frames = []  # (время, строка курсора) по мере прихода в терминал
+    done = threading.Event()
+
+    def read_slowly():
+        # медленный терминал: не больше throughput байт в секунду
+        step = 0.01
+        tail = b""
+        while not done.is_set():
+            ready, _, _ = select.select([fd], [], [], step)
+            if not ready:
+                continue
+            try:
+                data = tail + os.read(fd, max(int(throughput * step), 1))
+            except OSError:
+                return
+            now = time.monotonic()
+            end = 0
+            for match in MARK.finditer(data):
+                frames.append((now, int(match.group(1))))
+                end = match.end()
+            tail = data[max(end, len(data) - 16):]  # метка могла разорваться между чтениями
+            time.sleep(step)
+
+    reader = threading.Thread(target=read_slowly, daemon=True)
+    reader.start()
+    time.sleep(1.0)  # первый кадр
+    for _ in range(keys):
+        sent.append(time.monotonic())
+        os.write(fd, KEY_DOWN)
+        time.sleep(1 / rate)
+    # ждем, пока до терминала не дойдет кадр с последней строкой
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline and not (frames and frames[-1][1] >= min(keys, count - 1)):
+        time.sleep(0.05)
+    os.write(fd, b"q")
+    time.sleep(0.2)
+    done.set()
+    reader.join()
+    os.waitpid(pid, 0)
+    os.close(fd)
+    latencies = []
+    position = 0
+    for i, started in enumerate(sent):
+        # первый кадр, где курсор уже сдвинут i+1 раз
+        while position < len(frames) and frames[position][1] < i + 1:
+            position += 1
+        if position == len(frames):
+            break
+        latencies.append(frames[position][0] - started)
+    return {
+        "кадров": len(frames) - 1,
+        "медиана, мс": statistics.median(latencies) * 1000,
+        "p99, мс": sorted(latencies)[int(len(latencies) * 0.99) - 1] * 1000,
+        "худшая, мс": max(latencies) * 1000,
+        "догоняет после отпускания, мс": (frames[-1][0] - sent[-1]) * 1000,
+    }
+
+
+@click.command()
+@click.option('--stations', default=1000, help='Станций в списке')
+@click.option('--keys', default=300, help='Сколько нажатий ↓ послать')
+@click.option('--rate', default=60, help='Нажатий в секунду (автоповтор)')
+@click.option('--throughput', default=20000, help='Сколько байт в секунду принимает терминал')
+@click.option('--rows', default=40, help='Строк терминала')
+@click.option('--columns', default=120, help='Колонок терминала')
+@click.option('--child', type=click.Choice(MODES), hidden=True)
+def bench(stations, keys, rate, throughput, rows, columns, child):
+    if child:
+        curses.wrapper(drive, child, stations)
+        return
+    results = {mode: measure(mode, stations, keys, rate, throughput, rows, columns) for mode in MODES}
+    print(f"[{keys} нажатий ↓ по {rate}/с, терминал {columns}x{rows}, {throughput} байт/с]")
+    print(f"  {'':32}" + "".join(f"{mode:>10}" for mode in MODES))
+    for metric in results[MODES[0]]:
+        print(f"  {metric:32}" + "".join(f"{results[mode][metric]:10.0f}" for mode in MODES))
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,115 @@
+"""
+Память на станцию: список кортежей из load_stations против StationCatalog (tracemalloc) по ходу работы -
+открытие, перестановка (F3), обратный индекс строк (постоянный номер -> строка, только у каталога),
+индекс поиска SearchIndex (слова, триграммы и начала слов - как строит его программа), просмотр всего списка
+(у каталога - постоянные CACHED_BLOCKS разобранных блоков, сколько бы ни было станций). Память копится
+от этапа к этапу. Для сравнения - обратный индекс строк словарем, как он строился раньше. И поиск строки
+играющей станции по постоянному номеру (index_of): на прежней строке, после перестановки соседей,
+после перемещения далеко; у списка - list.index по кортежу.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_memory --count 1000000
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import click
+
+from benchmarks.bench_catalog import generate, timed
+from storage.catalog import StationCatalog
+from storage.search import SearchIndex
+from storage.stations import load_stations
+
+
+def traced(action):
+    """(сколько байт памяти Python осталось занято после action, результат action)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = action()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+def stages(stations):
+    """Этапы работы со списком: (имя, действие)"""
+    count = len(stations)
+    kept = []  # построенные индексы живут до конца замера
+
+    def reorder():
+        # F3: станция из середины - в начало списка
+        if isinstance(stations, list):
+            stations.insert(0, stations.pop(count // 2))
+        else:
+            stations.move(count // 2, 0)
+
+    def row_index():
+        if isinstance(stations, StationCatalog):
+            stations.positions(range(0, count, 1000))
+
+    def search_index():
+        index = SearchIndex()
+        index.start(stations.copy().items() if isinstance(stations, StationCatalog) else enumerate(stations))
+        while not index.ready:
+            time.sleep(0.05)
+        kept.append(index)
+
+    def walk():
+        for _ in stations:
+            pass
+
+    return [("перестановка (F3)", reorder), ("обратный индекс строк", row_index),
+            ("индекс поиска SearchIndex", search_index), ("просмотр всего списка", walk)]
+
+
+@click.command()
+@click.option('--count', default=1000000, help='Станций в каталоге')
+def bench(count):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "stations.csv")
+        generate(filename, count)
+        print(f"[{count} станций, файл {os.path.getsize(filename) / 1e6:.1f} МБ]")
+        columns = []
+        for open_list in (load_stations, StationCatalog.open):
+            opened, stations = traced(lambda: open_list(filename))
+            total, rows = opened, [("открытие", opened)]
+            for name, action in stages(stations):
+                total += traced(action)[0]
+                rows.append((name, total))
+            columns.append(rows)
+            del stations
+        print(f"  {'всего, МБ / байт на станцию':28}{'list':>22}{'StationCatalog':>22}")
+        for (name, listed), (_, catalog) in zip(*columns):
+            print(f"  {name:28}" + "".join(f"{memory / 1e6:12.1f} {memory / count:9.1f}"
+                                            for memory in (listed, catalog)))
+        catalog = StationCatalog.open(filename)
+        catalog.move(count // 2, 0)
+        index, positions = traced(lambda: dict(zip(catalog.order, range(len(catalog.order)))))
+        del positions
+        print(f"  {'(обратный индекс строк dict)':28}{'':22}{index / 1e6:12.1f} {index / count:9.1f}")
+
+        stations = load_stations(filename)
+        playing = count // 2
+        station, station_id = stations[playing], catalog.id_at(playing)
+        print(f"  {'строка играющей, мкс':28}{'list':>22}{'StationCatalog':>22}")
+        print(f"  {'на прежней строке':28}{timed(lambda: stations.index(station), 5):22.1f}"
+              f"{timed(lambda: catalog.index_of(station_id), 100):22.1f}")
+
+        def neighbours():
+            catalog.swap(playing - 1, playing)
+            catalog.index_of(station_id)
+            catalog.swap(playing - 1, playing)
+            catalog.index_of(station_id)
+
+        def far():
+            catalog.move(0, count - 1)
+            catalog.index_of(station_id)
+        print(f"  {'после перестановки рядом':28}{'':22}{timed(neighbours, 100) / 2:22.1f}")
+        print(f"  {'перемещение далеко и поиск':28}{'':22}{timed(far, 5):22.1f}")
+
+
+if __name__ == "__main__":
+    bench()
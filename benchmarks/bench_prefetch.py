@@ -0,0 +1,70 @@
+"""
+Предзагрузка станций: время до первых байт потока с попаданием в пул и без него,
+счетчики попаданий при случайном перемещении курсора.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_prefetch --stations 40 --moves 30 --delay 0.3
+"""
+import random
+import statistics
+import time
+import urllib.request
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from player.prefetch import PrefetchPool
+from player.relay import LocalRelay
+
+
+def first_bytes(url, size=4096):
+    """Время от запроса до получения первых size байт потока"""
+    start = time.monotonic()
+    with urllib.request.urlopen(url, timeout=10) as response:
+        response.read(size)
+    return time.monotonic() - start
+
+
+def median_ms(values):
+    if not values:
+        return "нет данных"
+    return f"медиана {statistics.median(values) * 1000:.1f} мс, n={len(values)}"
+
+
+@click.command()
+@click.option('--stations', default=40, help='Количество станций в списке')
+@click.option('--moves', default=30, help='Сколько раз курсор останавливается перед Enter')
+@click.option('--delay', default=0.3, help='Имитируемая задержка ответа станции, сек')
+@click.option('--rest', default=1.0, help='Сколько курсор стоит на строке перед Enter, сек')
+@click.option('--seed', default=1)
+def bench(stations, moves, delay, rest, seed):
+    random.seed(seed)
+    with FakeStreamServer(response_delay=delay) as server:
+        urls = [server.url(f"/station{i}") for i in range(stations)]
+        direct = [first_bytes(urls[random.randrange(stations)]) for _ in range(5)]
+
+        pool = PrefetchPool(LocalRelay(), rest_delay=0.05)
+        row = 0
+        prefetched = []
+        missed = []
+        for _ in range(moves):
+            # курсор уходит на несколько строк, останавливается, затем Enter на соседней строке или на ней же
+            row = max(0, min(stations - 1, row + random.randint(-3, 3)))
+            pool.want([urls[r] for r in (row, row + 1, row - 1) if 0 <= r < stations])
+            time.sleep(rest)
+            target = max(0, min(stations - 1, row + random.choice((-1, 0, 0, 1, 5))))
+            hits = pool.hits
+            latency = first_bytes(pool.source_url(urls[target]))
+            (prefetched if pool.hits > hits else missed).append(latency)
+        stats = pool.stats()
+        pool.close()
+
+    print(f"без предзагрузки: {median_ms(direct)}")
+    print(f"попадание в пул: {median_ms(prefetched)}")
+    print(f"промах: {median_ms(missed)}")
+    print(", ".join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+                    for name, value in stats.items()))
+
+
+if __name__ == "__main__":
+    bench()
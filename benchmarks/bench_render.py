@@ -0,0 +1,150 @@
+"""
+Сколько байт уходит в терминал на одно нажатие клавиши.
+Программа рисует экран списка в псевдотерминале, а бенчмарк посылает ей клавиши и считает вывод.
+Сравниваются три способа перерисовки:
+  clear - stdscr.clear() и полная перерисовка (как было изначально), частичная - для стрелок и громкости;
+  erase - то же через stdscr.erase();
+  frame - кадр и модель экрана (ui_screen.Screen): переписываются только изменившиеся строки.
+
+Запуск из корня проекта (только Unix):
+    python -m benchmarks.bench_render --stations 1000
+"""
+import curses
+import fcntl
+import os
+import pty
+import select
+import statistics
+import struct
+import sys
+import termios
+import time
+
+import click
+
+from ui.ui_app import draw_stations_list, draw_status_lines, full_redraw, page_position, scroll_offset
+from ui.ui_screen import Screen
+
+MODES = ("clear", "erase", "frame")
+# клавиша бенчмарка -> действие: j/k - курсор, n - страница вниз, + - громкость, s - событие плеера
+SCRIPT = [("j", 30), ("k", 10), ("n", 5), ("+", 10), ("s", 10)]
+ACTIONS = {"j": "строка вниз", "k": "строка вверх", "n": "PgDn", "+": "громкость", "s": "событие плеера"}
+
+
+def drive(stdscr, mode, count):
+    """Цикл программы в псевдотерминале: рисует экран и ждет клавиши бенчмарка"""
+    curses.start_color()
+    curses.use_default_colors()
+    curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)
+    curses.init_pair(2, curses.COLOR_GREEN, -1)
+    curses.curs_set(0)
+    stations = [(f"Станция {i} FM", f"http://radio{i}.example.com:8000/live.mp3") for i in range(count)]
+    screen = Screen(stdscr) if mode == "frame" else None
+    state = {"row": 0, "offset": 0, "volume": 100, "buffering": 0}
+
+    def info():
+        return f"буферизация {state['buffering']}%" if state["buffering"] else ""
+
+    def redraw():
+        args = (stations, state["row"], state["offset"], 0, False, False, state["volume"], -1, info())
+        if screen is not None:
+            frame = screen.frame()
+            full_redraw(frame, *args)
+            screen.show(frame)
+        else:
+            if mode == "clear":
+                stdscr.clear()
+            full_redraw(stdscr, *args)
+
+    def partial(with_list):
+        # так главный цикл обновлял экран без полной перерисовки
+        if screen is not None:
+            return redraw()
+        h, w = stdscr.getmaxyx()
+        if with_list:
+            draw_stations_list(stdscr, stations, state["row"], state["offset"], 0, False, h - 6)
+        draw_status_lines(stdscr, stations, state["row"], 0, state["volume"], False, False, -1, info())
+        stdscr.refresh()
+
+    redraw()
+    while True:
+        key = stdscr.getch()
+        max_display = stdscr.getmaxyx()[0] - 6
+        if key == ord("q"):
+            return
+        if key in (ord("j"), ord("k")):
+            state["row"] = min(max(state["row"] + (1 if key == ord("j") else -1), 0), count - 1)
+            offset = scroll_offset(state["row"], state["offset"], max_display)
+            if offset != state["offset"]:
+                state["offset"] = offset
+                redraw()
+            else:
+                partial(True)
+        elif key == ord("n"):
+            state["row"], state["offset"] = page_position(curses.KEY_NPAGE, state["row"], state["offset"],
+                                                          max_display, count)
+            redraw()
+        elif key == ord("+"):
+            state["volume"] = min(state["volume"] + 10, 512)
+            partial(False)
+        elif key == ord("s"):
+            state["buffering"] = (state["buffering"] + 10) % 100
+            partial(False)
+
+
+def read_quiet(fd, idle=0.05, limit=2.0):
+    """Читает вывод, пока программа не замолчит на idle сек"""
+    size = 0
+    deadline = time.monotonic() + limit
+    while time.monotonic() < deadline:
+        ready, _, _ = select.select([fd], [], [], idle)
+        if not ready:
+            break
+        try:
+            size += len(os.read(fd, 65536))
+        except OSError:
+            break
+    return size
+
+
+def measure(mode, count, rows, columns):
+    pid, fd = pty.fork()
+    if pid == 0:
+        env = dict(os.environ, TERM="xterm-256color")
+        os.execvpe(sys.executable, [sys.executable, "-m", "benchmarks.bench_render", "--child", mode,
+                                    "--stations", str(count)], env)
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, columns, 0, 0))
+    first = read_quiet(fd, idle=0.5, limit=10)
+    sizes = {}
+    for key, repeat in SCRIPT:
+        for _ in range(repeat):
+            os.write(fd, key.encode())
+            sizes.setdefault(key, []).append(read_quiet(fd))
+    os.write(fd, b"q")
+    read_quiet(fd)
+    os.waitpid(pid, 0)
+    os.close(fd)
+    return first, sizes
+
+
+@click.command()
+@click.option('--stations', default=1000, help='Станций в списке')
+@click.option('--rows', default=40, help='Строк терминала')
+@click.option('--columns', default=120, help='Колонок терминала')
+@click.option('--child', type=click.Choice(MODES), hidden=True)
+def bench(stations, rows, columns, child):
+    if child:
+        curses.wrapper(drive, child, stations)
+        return
+    results = {mode: measure(mode, stations, rows, columns) for mode in MODES}
+    print(f"[{stations} станций, терминал {columns}x{rows}, байт на нажатие]")
+    print(f"  {'':18}" + "".join(f"{mode:>10}" for mode in MODES))
+    print(f"  {'первый экран':18}" + "".join(f"{results[mode][0]:10}" for mode in MODES))
+    for key, _ in SCRIPT:
+        print(f"  {ACTIONS[key]:18}" + "".join(f"{statistics.mean(results[mode][1][key]):10.0f}" for mode in MODES))
+    totals = {mode: sum(map(sum, results[mode][1].values())) for mode in MODES}
+    print(f"  {'всего за сценарий':18}" + "".join(f"{totals[mode]:10}" for mode in MODES))
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,85 @@
+"""
+Разбор адресов станций (StreamResolver): время до первых байт потока без кэша и с кэшем итоговых адресов.
+Поддельная станция отвечает с задержкой --delay на каждый запрос, как далекий сервер: без кэша подключение
+проходит плейлист .pls, перенаправление и мастер-плейлист HLS, с кэшем - сразу итоговый адрес по известному IP.
+С --url меряются настоящие станции (нужна сеть).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_resolve --delay 0.05 --repeat 20
+    python -m benchmarks.bench_resolve --url https://live.bolgarradio.com/b_aac_hifi.m3u8
+"""
+import statistics
+import time
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from player.resolver import StreamResolver
+from player.stream import is_audio
+
+PAGES = {
+    "/station.pls": (200, {"Content-Type": "audio/x-scpls"}, b"[playlist]\nNumberOfEntries=1\nFile1=/redirect\n"),
+    "/redirect": (302, {"Location": "/live"}, b""),
+    "/station.m3u": (200, {"Content-Type": "audio/x-mpegurl"}, b"#EXTM3U\n#EXTINF:-1,Station\n/live\n"),
+    "/master.m3u8": (200, {"Content-Type": "application/vnd.apple.mpegurl"},
+                     b"#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=128000\n/media.m3u8\n"
+                     b"#EXT-X-STREAM-INF:BANDWIDTH=64000\n/media64.m3u8\n"),
+    "/media.m3u8": (200, {"Content-Type": "application/vnd.apple.mpegurl"},
+                    b"#EXTM3U\n#EXT-X-TARGETDURATION:10\n#EXT-X-MEDIA-SEQUENCE:1\n#EXTINF:10,\n/segment1.aac\n"),
+}
+CHAINS = [
+    ("прямой поток", "/live"),
+    ("перенаправление", "/redirect"),
+    (".m3u -> поток", "/station.m3u"),
+    (".pls -> перенаправление -> поток", "/station.pls"),
+    ("мастер HLS -> медиаплейлист", "/master.m3u8"),
+]
+
+
+def first_bytes(resolver, url):
+    """Время до первых байт ответа (звука или медиаплейлиста HLS), сек"""
+    started = time.monotonic()
+    _, response = resolver.open(url, 10.0)
+    try:
+        response.read(1 if not is_audio(response.getheader("Content-Type")) else 4096)
+    finally:
+        response.close()
+    return time.monotonic() - started
+
+
+def measure(url, repeat, requests=None):
+    """Медианы времени до первых байт без кэша и с кэшем (сек) и запросов на подключение по счетчику requests()"""
+    count = requests or (lambda: 0)
+    before = count()
+    cold = [first_bytes(StreamResolver(), url) for _ in range(repeat)]
+    cold_requests = (count() - before) / repeat
+    resolver = StreamResolver()
+    first_bytes(resolver, url)
+    before = count()
+    warm = [first_bytes(resolver, url) for _ in range(repeat)]
+    warm_requests = (count() - before) / repeat
+    return statistics.median(cold), statistics.median(warm), cold_requests, warm_requests
+
+
+@click.command()
+@click.option('--delay', default=0.05, help='Задержка ответа поддельной станции на каждый запрос, сек')
+@click.option('--repeat', default=20, help='Сколько подключений мерить')
+@click.option('--url', 'urls', multiple=True, help='Настоящая станция вместо поддельной (можно несколько)')
+def bench(delay, repeat, urls):
+    if urls:
+        print(f"[настоящие станции, медиана из {repeat}]")
+        for url in urls:
+            cold, warm, _, _ = measure(url, repeat)
+            print(f"  без кэша {cold * 1000:7.1f} мс, с кэшем {warm * 1000:7.1f} мс  {url}")
+        return
+    with FakeStreamServer(response_delay=delay, pages=PAGES) as server:
+        print(f"[до первых байт, станция отвечает за {delay * 1000:.0f} мс, медиана из {repeat}]")
+        for name, path in CHAINS:
+            url = server.url(path).replace("127.0.0.1", "localhost")
+            cold, warm, cold_requests, warm_requests = measure(url, repeat, lambda: len(server.requests))
+            print(f"  {name:34} без кэша {cold * 1000:7.1f} мс ({cold_requests:.0f} запр.), "
+                  f"с кэшем {warm * 1000:7.1f} мс ({warm_requests:.0f} запр.)")
+
+
+if __name__ == "__main__":
+    bench()
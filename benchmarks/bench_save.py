@@ -0,0 +1,85 @@
+"""
+Сохранение списка станций при серии правок: прежняя синхронная перезапись CSV на каждую правку
+против StationStore (отложенная запись в фоне) и StationStore с журналом изменений.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_save --stations 1000 --edits 50
+"""
+import csv
+import os
+import statistics
+import tempfile
+import time
+
+import click
+
+from storage.stations import StationStore, load_stations, save_stations
+
+
+def legacy_save(filename, stations):
+    # прежний способ: перезапись файла на месте прямо в цикле интерфейса
+    with open(filename, mode='w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, delimiter=';')
+        writer.writerow(['Name', 'URL'])
+        for name, url in stations:
+            writer.writerow([name, url])
+
+
+def burst(filename, stations, edits, interval, on_edit):
+    """Серия правок названий; время блокировки интерфейса на правку"""
+    blocked = []
+    for i in range(edits):
+        row = i % len(stations)
+        stations[row] = (f"Станция {i}", stations[row][1])
+        started = time.perf_counter()
+        on_edit(row)
+        blocked.append(time.perf_counter() - started)
+        time.sleep(interval)
+    return blocked
+
+
+def report(name, blocked, writes, settled, edits):
+    print(f"[{name}]")
+    print(f"  блокировка интерфейса на правку: медиана {statistics.median(blocked) * 1e6:.0f} мкс, "
+          f"максимум {max(blocked) * 1e6:.0f} мкс")
+    print(f"  записей на диск: {writes} на {edits} правок, от последней правки до записи: {settled * 1000:.0f} мс")
+
+
+@click.command()
+@click.option('--stations', 'count', default=1000, help='Станций в списке')
+@click.option('--edits', default=50, help='Правок в серии')
+@click.option('--interval', default=0.02, help='Пауза между правками, сек')
+def bench(count, edits, interval):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "stations.csv")
+        original = [(f"Станция {i}", f"http://radio{i % 97}.example.com:8000/stream{i}") for i in range(count)]
+
+        for name, make_save in (("перезапись на правку", lambda: legacy_save),
+                                ("атомарная запись на правку", lambda: save_stations)):
+            save_stations(filename, original)
+            stations = list(original)
+            save = make_save()
+            blocked = burst(filename, stations, edits, interval, lambda row: save(filename, stations))
+            report(name, blocked, edits, 0.0, edits)
+
+        for name, journal in (("StationStore", False), ("StationStore с журналом", True)):
+            save_stations(filename, original)
+            store = StationStore(filename, journal=journal)
+            stations = store.load()
+            blocked = burst(filename, stations, edits, interval,
+                            lambda row: store.changed(stations, ("edit", row, *stations[row])))
+            last_edit = time.monotonic()
+            while store.pending:
+                time.sleep(0.001)
+            settled = time.monotonic() - last_edit
+            journal_writes = store.journal_writes
+            store.close()
+            assert load_stations(filename) == stations
+            writes = store.writes + journal_writes
+            report(name, blocked, writes, settled, edits)
+            if journal:
+                print(f"  из них дозаписей журнала: {journal_writes}, сжатие в CSV при выходе: {store.writes}")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,95 @@
+"""
+Обзор станций (клавиша s, player/scan.py) в программе целиком: поддельный vlc (benchmarks/fake_vlc.py)
+слушает станции локального сервера, который отвечает с задержкой --connect-delay, часть станций (--dead)
+не отвечает вовсе. Меряется время полного обзора против --dwell × число станций и сколько звучала
+каждая станция: следующая подключается, пока звучит текущая, недоступные пропускаются по проверке заранее.
+
+Запуск из корня проекта (только Unix):
+    python -m benchmarks.bench_scan --stations 20 --dead 0.25 --dwell 2 --connect-delay 0.5
+    python -m benchmarks.bench_scan --stations 20 --dead 0.25 --dwell 2 --connect-delay 0.5 --no-prefetch
+"""
+import curses
+import os
+import random
+import socket
+import statistics
+import tempfile
+
+import click
+
+from benchmarks.bench_watchdog import read_log
+from benchmarks.fake_stream import FakeStreamServer
+from benchmarks.suite import duration, offline, run_main
+
+
+def closed_port():
+    """Порт на 127.0.0.1, на котором никто не слушает: подключение сразу отвергается"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def scan_app(directory, server, count, dead, seed):
+    """Каталог программы со списком станций; возвращает его и адреса живых станций по порядку"""
+    rng = random.Random(seed)
+    app = os.path.join(directory, "scan")
+    os.makedirs(os.path.join(app, "data"), exist_ok=True)
+    port = closed_port()
+    alive = []
+    with open(os.path.join(app, "data", "radio_stations.csv"), "w", encoding="utf-8") as file:
+        file.write("Name;URL\n")
+        for i in range(count):
+            if i and rng.random() < dead:
+                url = f"http://127.0.0.1:{port}/dead{i}"
+            else:
+                url = server.url(f"/station{i}")
+                alive.append(url)
+            file.write(f"Станция {i} FM;{url}\n")
+    return app, alive
+
+
+@click.command()
+@click.option('--stations', default=20, help='Станций в списке')
+@click.option('--dead', default=0.25, help='Доля недоступных станций')
+@click.option('--dwell', default=2.0, help='Сколько секунд звучит каждая станция')
+@click.option('--connect-delay', default=0.5, help='Задержка ответа сервера станции, сек')
+@click.option('--prefetch/--no-prefetch', default=True, help='Предзагрузка следующих станций обзора')
+@click.option('--seed', default=1)
+def bench(stations, dead, dwell, connect_delay, prefetch, seed):
+    with tempfile.TemporaryDirectory() as directory, offline(directory):
+        log_path = os.path.join(directory, "vlc.log")
+        os.environ.update(FAKE_VLC_FETCH="1", FAKE_VLC_LOG=log_path)
+        try:
+            with FakeStreamServer(response_delay=connect_delay) as server:
+                app, alive = scan_app(directory, server, stations, dead, seed)
+                # обзор начинается со станции после выделенной и кончается на ней: End - на последнюю строку
+                script = [curses.KEY_END, ord("s"), dwell * stations + 10 * connect_delay + 5.0, curses.KEY_HOME]
+                window = run_main(app, script, scan_seconds=dwell, prefetch_stations=prefetch)
+        finally:
+            del os.environ["FAKE_VLC_FETCH"], os.environ["FAKE_VLC_LOG"]
+        log = read_log(log_path)
+    started = next(moment for moment, key in window.delivered if key == ord("s"))
+    heard = []
+    for moment, text in log:
+        # с предзагрузкой vlc слушает станцию через ретранслятор: в журнале его адрес, а не адрес станции
+        if text.startswith("playing ") and moment >= started:
+            if not heard or heard[-1][1] != text[8:]:
+                heard.append((moment, text[8:]))
+    if not heard:
+        print("станции обзора не заиграли")
+        return
+    sweep = heard[-1][0] + dwell - started
+    audible = [b - a for (a, _), (b, _) in zip(heard, heard[1:])]
+    print(f"[{stations} станций, живых {len(alive)}, звучит {dwell:.1f} с, ответ сервера {connect_delay:.2f} с, "
+          f"предзагрузка {'да' if prefetch else 'нет'}]")
+    print(f"  обзор целиком       {duration(sweep):>10}   "
+          f"dwell × живые {duration(dwell * len(alive)):>10}   dwell × все {duration(dwell * stations):>10}")
+    print(f"  прозвучало станций  {len(heard)} из {len(alive)}")
+    if audible:
+        print(f"  звучала станция     медиана {duration(statistics.median(audible))}, "
+              f"мин {duration(min(audible))}, макс {duration(max(audible))}")
+    print(f"  первая станция      через {duration(heard[0][0] - started)} после s")
+
+
+if __name__ == "__main__":
+    bench()
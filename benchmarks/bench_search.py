@@ -0,0 +1,98 @@
+"""
+Поиск по мере ввода: задержка на каждое нажатие клавиши при наборе запроса по букве.
+Индекс (SearchIndex + search_view) против простого перебора списка с проверкой подстроки.
+Время включает первый экран найденного - то, что видно после нажатия.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_search --sizes 1000,100000,1000000
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import click
+
+from benchmarks.bench_catalog import NullScreen
+from storage.catalog import StationCatalog
+from storage.search import SearchIndex, fold, search_view
+from storage.stations import save_stations
+from ui.ui_app import draw_stations_list
+
+WORDS = ["Радио", "Европа", "Плюс", "Ретро", "Рок", "Джаз", "Шансон", "Казань", "Татар", "Башкорт", "Хит",
+         "Relax", "Rock", "Jazz", "Classic", "Chill", "Lounge", "Dance", "News", "Talk", "Country", "Metal",
+         "Дача", "Маяк", "Юмор", "Детское", "Книга", "Спорт", "Вести", "Энерджи", "Калинка", "Ностальжи"]
+QUERIES = ["радио казань", "rock", "джаз 7", "chill lounge", "zzz"]
+
+
+def generate(filename, count):
+    rng = random.Random(1)
+
+    def station(i):
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        return f"{name} {rng.randint(1, 999)}", f"http://{rng.choice(WORDS).lower()}{i % 997}.example.com/live{i}"
+
+    save_stations(filename, (station(i) for i in range(count)))
+
+
+def linear(stations, query):
+    """Перебор: каждое слово запроса ищется подстрокой в названии"""
+    words = fold(query).split()
+    return [row for row, (name, url) in enumerate(stations) if all(word in fold(name) for word in words)]
+
+
+def type_query(query, find, screen, max_display):
+    """Задержки в мс на каждую набранную букву запроса"""
+    times = []
+    for length in range(1, len(query) + 1):
+        started = time.perf_counter()
+        view = find(query[:length])
+        draw_stations_list(screen, view, 0, 0, -1, False, max_display)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def build(stations):
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.start(stations.items())
+    while not index.ready:
+        time.sleep(0.01)
+    return index, time.perf_counter() - started
+
+
+@click.command()
+@click.option('--sizes', default='1000,100000,1000000', help='Размеры каталогов через запятую')
+@click.option('--linear-limit', default=100000, help='Перебор меряется только на каталогах не больше этого')
+def bench(sizes, linear_limit):
+    screen = NullScreen()
+    max_display = screen.getmaxyx()[0] - 6
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(size) for size in sizes.split(",")):
+            filename = os.path.join(directory, f"stations-{count}.csv")
+            generate(filename, count)
+            stations = StationCatalog.open(filename)
+            index, seconds = build(stations)
+            print(f"[{count} станций, индекс построен в фоне за {seconds:.1f} с]")
+
+            def indexed(query):
+                view = search_view(stations, index, query)
+                view.ensure(max_display)
+                return view
+
+            def scanned(query):
+                return [stations[row] for row in linear(stations, query)]
+
+            print(f"  {'запрос':16}{'индекс: медиана':>18}{'макс, мс':>10}{'перебор: медиана':>19}{'макс, мс':>10}")
+            for query in QUERIES:
+                times = type_query(query, indexed, screen, max_display)
+                line = f"  {query:16}{statistics.median(times):18.2f}{max(times):10.2f}"
+                if count <= linear_limit:
+                    times = type_query(query, scanned, screen, max_display)
+                    line += f"{statistics.median(times):19.2f}{max(times):10.2f}"
+                print(line)
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,98 @@
+"""
+Открытие каталога станций: csv.DictReader (load_stations) против подсчета строк CsvRows и открытия
+по двоичному снимку индекса (storage/snapshot.py). Холодное открытие - файлы вытеснены из кэша ОС
+(posix_fadvise, только Linux), теплое - файлы в кэше. Отдельно: открытие с первым экраном (50 строк),
+запись снимка в фоне и пересборка после сохранения списка.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_snapshot --sizes 100000,1000000
+"""
+import os
+import statistics
+import tempfile
+import time
+
+import click
+
+from benchmarks.bench_catalog import generate
+from benchmarks.suite import duration
+from storage.catalog import CsvRows, StationCatalog
+from storage.snapshot import load_snapshot, refresh_snapshot, snapshot_path
+from storage.stations import load_stations
+
+SCREEN_ROWS = 50
+
+
+def evict(*paths):
+    """Вытесняет файлы из кэша ОС; False - так нельзя"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for path in paths:
+        if os.path.exists(path):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+
+def median_time(action, rounds, before=None):
+    """Медиана времени action, сек; before вызывается перед каждым повтором вне замера"""
+    times = []
+    for _ in range(rounds):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        action()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def first_screen(open_rows):
+    stations = StationCatalog(open_rows())
+    return stations[:SCREEN_ROWS]
+
+
+@click.command()
+@click.option('--sizes', default='100000,1000000', help='Размеры каталогов через запятую')
+@click.option('--rounds', default=5, help='Повторов каждого замера')
+def bench(sizes, rounds):
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["XDG_CACHE_HOME"] = os.path.join(directory, "cache")  # снимки - во временном каталоге
+        for count in (int(size) for size in sizes.split(",")):
+            filename = os.path.join(directory, f"stations-{count}.csv")
+            generate(filename, count)
+            index = snapshot_path(filename)
+            started = time.perf_counter()
+            refresh_snapshot(filename)
+            built = time.perf_counter() - started
+            print(f"[{count} станций, файл {os.path.getsize(filename) / 1e6:.1f} МБ, "
+                  f"снимок {os.path.getsize(index) / 1e3:.1f} КБ, пересборка {duration(built)}]")
+            cases = [("csv.DictReader", lambda: load_stations(filename)),
+                     ("подсчет строк", lambda: CsvRows(filename, snapshot=False)),
+                     ("по снимку", lambda: CsvRows(filename))]
+            screens = [("подсчет строк", lambda: first_screen(lambda: CsvRows(filename, snapshot=False))),
+                       ("по снимку", lambda: first_screen(lambda: CsvRows(filename)))]
+            cold = evict(filename, index)
+            print(f"  {'':32}{'холодное':>14}{'теплое':>14}")
+            for name, action in [*cases, *((f"{name} + экран", action) for name, action in screens)]:
+                warm = median_time(action, rounds)
+                chilled = median_time(action, rounds, lambda: evict(filename, index)) if cold else None
+                print(f"  {name:32}{duration(chilled) if cold else '-':>14}{duration(warm):>14}")
+            # снимок устарел: файл дописан - открытие считает строки, новый снимок пишется в фоне
+            with open(filename, "a", encoding="utf-8") as file:
+                file.write("Новая станция;http://new.example.com/live\n")
+            started = time.perf_counter()
+            rows = CsvRows(filename)
+            stale = time.perf_counter() - started
+            deadline = time.monotonic() + 10
+            while time.monotonic() < deadline and load_snapshot(filename, rows.sign) is None:
+                time.sleep(0.001)
+            print(f"  {'после правки файла':32}{'':14}{duration(stale):>14}   "
+                  f"снимок пересобран через {duration(time.perf_counter() - started)}")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,160 @@
+"""
+Запуск программы: время до первого кадра и до начала звука с --autoplay, плюс разбивка `-X importtime`.
+Программа запускается целиком в псевдотерминале со списком из --stations станций; вместо vlc -
+подделка (benchmarks/fake_vlc.py), чей rc-интерфейс поднимается через --vlc-delay сек, как при холодном старте vlc.
+Первый кадр - когда до терминала дошел заголовок списка, звук - когда в строке состояния появилось «старт за».
+Первый запуск идет с пустым кэшем (поиск vlc по PATH), остальные - с заполненным.
+
+--app задает каталог с другой версией программы (например, git worktree прошлого релиза) для сравнения,
+--history дописывает результат строкой JSON в файл, чтобы следить за временем запуска от релиза к релизу.
+
+Запуск из корня проекта (только Unix):
+    python -m benchmarks.bench_startup --runs 5 --stations 100000 --history startup_history.jsonl
+"""
+import datetime
+import json
+import os
+import pty
+import re
+import select
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+from benchmarks.fake_vlc import install_vlc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_FRAME = "Список радиостанций".encode()
+FIRST_AUDIO = "старт за".encode()
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def prepare(directory, count):
+    """Рабочий каталог программы со списком станций и подделка vlc в PATH"""
+    os.makedirs(os.path.join(directory, "data"))
+    with open(os.path.join(directory, "data", "radio_stations.csv"), "w", encoding="utf-8") as file:
+        file.write("Name;URL\n")
+        for i in range(count):
+            file.write(f"Станция {i} FM;http://radio{i % 997}.example.com/live{i}\n")
+    return install_vlc(os.path.join(directory, "bin"))
+
+
+def launch(app, directory, bin_directory, cache, vlc_delay, timeout=30.0):
+    """Один запуск: секунды до первого кадра и до начала звука"""
+    env = dict(os.environ, TERM="xterm", PATH=f"{bin_directory}:{os.environ['PATH']}", XDG_CACHE_HOME=cache,
+               FAKE_VLC_DELAY=str(vlc_delay))
+    started = time.monotonic()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.chdir(directory)
+        os.execvpe(sys.executable, [sys.executable, os.path.join(app, "atradio.py"), "--autoplay", "0",
+                                    "--backend", "subprocess", "--no-health", "--no-titles", "--no-prefetch"], env)
+    output = b""
+    first_frame = first_audio = None
+    deadline = started + timeout
+    while first_audio is None and time.monotonic() < deadline:
+        ready, _, _ = select.select([fd], [], [], 0.01)
+        if not ready:
+            continue
+        try:
+            output += os.read(fd, 65536)
+        except OSError:
+            break
+        now = time.monotonic() - started
+        if first_frame is None and FIRST_FRAME in output:
+            first_frame = now
+        if FIRST_AUDIO in output:
+            first_audio = now
+    os.write(fd, b"q")
+    while True:
+        # вывод надо дочитывать, иначе программа не сможет выйти
+        ready, _, _ = select.select([fd], [], [], 0.1)
+        try:
+            if ready and not os.read(fd, 65536):
+                break
+        except OSError:
+            break
+        if os.waitpid(pid, os.WNOHANG)[0]:
+            pid = None
+            break
+    if pid:
+        os.waitpid(pid, 0)
+    os.close(fd)
+    return first_frame, first_audio
+
+
+def import_times(app):
+    """Общее время `import atradio` и модули, загруженные им напрямую: {модуль: мс с учетом вложенных}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import atradio"], cwd=app,
+                            capture_output=True, text=True)
+    # строки вложенных модулей идут до строки импортировавшего их модуля, уровень виден по отступу;
+    # модули верхнего уровня до atradio загружает сам интерпретатор (site)
+    total, modules = 0.0, {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        if indent == 1:
+            if name == "atradio":
+                total = cumulative
+                break
+            modules = {}
+        elif indent == 3:
+            modules[name] = cumulative
+    return total, dict(sorted(modules.items(), key=lambda item: -item[1]))
+
+
+def milliseconds(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) * 1000 if values else float("nan")
+
+
+def revision(app):
+    result = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=app, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+@click.command()
+@click.option('--runs', default=5, help='Сколько запусков (первый - с пустым кэшем)')
+@click.option('--stations', default=1000, help='Станций в списке')
+@click.option('--vlc-delay', default=0.3, help='Холодный старт поддельного vlc, сек')
+@click.option('--app', default=ROOT, help='Каталог программы (по умолчанию - этот)')
+@click.option('--top', default=10, help='Сколько модулей показать в разбивке импорта')
+@click.option('--history', default=None, help='Дописать результат строкой JSON в этот файл')
+def bench(runs, stations, vlc_delay, app, top, history):
+    app = os.path.abspath(app)
+    with tempfile.TemporaryDirectory() as directory:
+        bin_directory = prepare(directory, stations)
+        cache = os.path.join(directory, "cache")
+        results = [launch(app, directory, bin_directory, cache, vlc_delay) for _ in range(runs)]
+    cold, warm = results[0], results[1:] or results
+    total, modules = import_times(app)
+    print(f"[{app}, {stations} станций, холодный старт vlc {vlc_delay * 1000:.0f} мс, {runs} запусков]")
+    print(f"  {'':28}{'первый запуск':>16}{'медиана':>10}")
+    print(f"  {'первый кадр, мс':28}{milliseconds([cold[0]]):16.0f}{milliseconds([r[0] for r in warm]):10.0f}")
+    print(f"  {'начало звука, мс':28}{milliseconds([cold[1]]):16.0f}{milliseconds([r[1] for r in warm]):10.0f}")
+    print(f"  import atradio: {total:.1f} мс, из них:")
+    for name, cost in list(modules.items())[:top]:
+        print(f"    {name:28}{cost:8.1f} мс")
+    if history:
+        record = {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": revision(app),
+            "stations": stations,
+            "vlc_delay": vlc_delay,
+            "first_frame_ms": round(milliseconds([r[0] for r in warm]), 1),
+            "first_audio_ms": round(milliseconds([r[1] for r in warm]), 1),
+            "import_ms": round(total, 1),
+            "imports_ms": {name: round(cost, 1) for name, cost in modules.items()},
+        }
+        with open(history, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,84 @@
+"""
+Сравнение задержки переключения станций для бэкендов libvlc и subprocess
+и способов переключения (stop - сначала остановить старую, cut/crossfade - без паузы).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_switch --switches 20
+"""
+import statistics
+import time
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from player.backends import SWITCH_MODES, LibVlcPlayer, SubprocessPlayer, switch_station
+
+
+def wait_started(player, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while player.is_connecting() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return player.start_latency
+
+
+def measure(player, server, switches, mode):
+    blocked = []  # сколько переключение держит поток интерфейса
+    requested = []  # от нажатия Enter до запроса нового потока к серверу
+    started = []  # от нажатия Enter до начала звука
+    silence = []  # пауза без звука при переключении
+    player.play(server.url("/warmup"))
+    wait_started(player)
+    for i in range(switches):
+        path = f"/station{i % 2}"
+        start = time.monotonic()
+        switch_station(player, server.url(path), mode)
+        blocked.append(time.monotonic() - start)
+        moment = server.wait_request(path, start)
+        if moment is not None:
+            requested.append(moment - start)
+        latency = wait_started(player)
+        if latency is not None:
+            started.append(latency)
+            # при stop старая станция замолкает сразу, при cut/crossfade играет до старта новой
+            silence.append(latency if mode == "stop" else 0.0)
+    player.close()
+    return {
+        "блокировка интерфейса": blocked,
+        "до запроса нового потока": requested,
+        "от Enter до звука": started,
+        "тишина при переключении": silence,
+    }
+
+
+def report(name, values):
+    if not values:
+        return f"{name}: нет данных"
+    values_ms = sorted(v * 1000 for v in values)
+    p95 = values_ms[min(len(values_ms) - 1, int(len(values_ms) * 0.95))]
+    return f"{name}: медиана {statistics.median(values_ms):.1f} мс, p95 {p95:.1f} мс, n={len(values_ms)}"
+
+
+@click.command()
+@click.option('--switches', default=20, help='Количество переключений станций')
+@click.option('--vlc', 'vlc_prg', default='vlc', help='Путь к исполняемому файлу vlc')
+def bench(switches, vlc_prg):
+    factories = {
+        "libvlc": LibVlcPlayer,
+        "subprocess": lambda: SubprocessPlayer(vlc_prg),
+    }
+    with FakeStreamServer() as server:
+        for name, factory in factories.items():
+            for mode in SWITCH_MODES:
+                try:
+                    player = factory()
+                    results = measure(player, server, switches, mode)
+                except Exception as e:
+                    print(f"[{name}] пропущен: {e}")
+                    break
+                print(f"[{name}, {mode}]")
+                for metric, values in results.items():
+                    print("  " + report(metric, values))
+
+
+if __name__ == "__main__":
+    bench()
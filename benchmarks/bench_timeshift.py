@@ -0,0 +1,126 @@
+"""
+Timeshift: запись потока в кольцевой файл и продолжение после паузы.
+Запись - процессорное время на мегабайт потока: readinto прямо в отображенный файл против
+read1 с копированием байт в кольцо. Память - долгая запись (поддельная станция отдает поток быстрее
+реального времени, часы эфира за секунды): куча Python и анонимная память процесса не растут.
+Продолжение после паузы и перемотка - время до первых байт из кольца через ретранслятор
+против нового подключения к станции с задержкой ответа --delay.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_timeshift --megabytes 512 --seconds 20 --delay 0.3
+"""
+import statistics
+import time
+import tracemalloc
+import urllib.request
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from player.relay import LocalRelay
+from player.stream import open_stream
+from player.timeshift import CHUNK_SIZE, RingFile, Timeshift
+
+
+def fill_readinto(ring, response, total):
+    readinto = response.fp.readinto1
+    while ring.written < total:
+        ring.fill(readinto)
+
+
+def fill_copy(ring, response, total):
+    """Как без readinto: каждый кусок - новый объект bytes, затем копия в кольцо"""
+    while ring.written < total:
+        ring.write(response.read1(CHUNK_SIZE))
+
+
+def write_cost(server, fill, megabytes):
+    """Процессорное время потока записи на мегабайт, мс"""
+    _, response = open_stream(server.url("/write"))
+    ring = RingFile(8 << 20)
+    started = time.thread_time()
+    fill(ring, response, megabytes << 20)
+    cost = (time.thread_time() - started) * 1000 / megabytes
+    response.close()
+    ring.close()
+    return cost
+
+
+def anonymous_memory():
+    """Анонимная память процесса (Linux), МБ; страницы кольца сюда не входят - их держит кэш файлов"""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def first_bytes(url, size=4096):
+    started = time.monotonic()
+    with urllib.request.urlopen(url, timeout=10) as response:
+        response.read(size)
+    return time.monotonic() - started
+
+
+@click.command()
+@click.option('--megabytes', default=512, help='Сколько мегабайт потока записать для замера записи')
+@click.option('--seconds', default=20, help='Сколько секунд писать поток быстрее реального времени для замера памяти')
+@click.option('--minutes', default=30.0, help='Длина кольца, мин')
+@click.option('--delay', default=0.3, help='Задержка ответа станции при новом подключении, сек')
+@click.option('--repeat', default=10, help='Сколько раз мерить продолжение после паузы')
+def bench(megabytes, seconds, minutes, delay, repeat):
+    with FakeStreamServer(burst_frames=0, realtime=False) as server:
+        copy = write_cost(server, fill_copy, megabytes)
+        direct = write_cost(server, fill_readinto, megabytes)
+        print(f"[запись {megabytes} МБ]")
+        print(f"  read1 + копия в кольцо: {copy:7.3f} мс процессора на МБ")
+        print(f"  readinto в mmap:        {direct:7.3f} мс процессора на МБ")
+
+        relay = LocalRelay()
+        timeshift = Timeshift(relay, minutes)
+        tracemalloc.start()
+        url = server.url("/long")
+        timeshift.source_url(url)
+        timeshift.follow(url)
+        recording = timeshift.current
+        recording.wait_ready()
+        print(f"[долгая запись, кольцо {recording.ring.size >> 20} МБ на {minutes:g} мин при {recording.bitrate} кбит/с]")
+        for second in range(1, seconds + 1):
+            time.sleep(1)
+            if second in (1, 2, 5) or second % 5 == 0:
+                heap = tracemalloc.get_traced_memory()[0] / 1024
+                hours = recording.ring.written / recording.rate() / 3600
+                print(f"  {second:3} с: записано {recording.ring.written >> 20:6} МБ ({hours:6.1f} ч эфира), "
+                      f"куча Python {heap:8.1f} КБ, анонимная память {anonymous_memory():7.1f} МБ")
+        tracemalloc.stop()
+        timeshift.close()
+        relay.close()
+
+    with FakeStreamServer(response_delay=delay) as server:
+        relay = LocalRelay()
+        timeshift = Timeshift(relay, minutes)
+        url = server.url("/station")
+        first_bytes(timeshift.source_url(url))
+        timeshift.follow(url)
+        time.sleep(2)
+        resumed, rewound, reconnected = [], [], []
+        for _ in range(repeat):
+            timeshift.pause()
+            time.sleep(0.2)
+            resumed.append(first_bytes(timeshift.resume()))
+            rewound.append(first_bytes(timeshift.seek(1.0)))
+            reconnected.append(first_bytes(url))
+        print(f"[до первых байт, станция отвечает за {delay * 1000:.0f} мс]")
+        print(f"  продолжение после паузы: {statistics.median(resumed) * 1000:7.1f} мс")
+        print(f"  перемотка назад:         {statistics.median(rewound) * 1000:7.1f} мс")
+        print(f"  новое подключение:       {statistics.median(reconnected) * 1000:7.1f} мс")
+        print(f"  подключений к станции у timeshift: 1 из {1 + 2 * repeat} запусков потока")
+        timeshift.close()
+        relay.close()
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,80 @@
+"""
+Замеры --profile: цена точки замера и что они показывают.
+Цена - вызов trace.mark, trace.span и trace.clock с выключенными и включенными замерами, за вычетом пустого вызова.
+Разбивка - программа целиком на окне curses в памяти переключает станции на локальном сервере через
+поддельный vlc, который читает поток (с предзагрузкой и ретранслятором), и пишет гистограммы при выходе,
+как с --profile; печатаются этапы от Enter до звука, длительности операций и строка замеров с экрана.
+
+Запуск из корня проекта (разбивка - только Unix):
+    python -m benchmarks.bench_trace --calls 1000000 --switches 10
+"""
+import curses
+import json
+import os
+import signal
+import tempfile
+import time
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from benchmarks.suite import SWITCH_PAUSE, offline, player_app, run_main
+from player import trace
+
+
+def per_call(action, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        action()
+    return (time.perf_counter() - started) / calls
+
+
+def span():
+    with trace.span("операция"):
+        pass
+
+
+def costs(calls):
+    """Цена точки замера, нс: {вызов: (выключено, включено)}"""
+    cases = {"mark": lambda: trace.mark("этап"), "span": span, "clock": trace.clock}
+    result = {}
+    for enabled in (False, True):
+        if enabled:
+            trace.enable().begin("Enter")
+        empty = per_call(lambda: None, calls)
+        for name, action in cases.items():
+            result.setdefault(name, []).append(max(per_call(action, calls) - empty, 0.0) * 1e9)
+    trace.disable()
+    return result
+
+
+@click.command()
+@click.option('--calls', default=1000000, help='Вызовов на замер цены')
+@click.option('--switches', default=10, help='Переключений станций в разбивке')
+def bench(calls, switches):
+    print(f"[цена точки замера, нс, {calls} вызовов]")
+    for name, (disabled, enabled) in costs(calls).items():
+        print(f"  trace.{name:6} выключено {disabled:7.1f}   включено {enabled:7.1f}")
+    if not hasattr(signal, "SIGWINCH"):
+        return
+    with tempfile.TemporaryDirectory() as directory, offline(directory), FakeStreamServer() as server:
+        profile = os.path.join(directory, "profile.json")
+        os.environ["FAKE_VLC_FETCH"] = "1"
+        try:
+            window = run_main(player_app(directory, server, switches + 1, "localhost"),
+                              [10, SWITCH_PAUSE] + [curses.KEY_DOWN, 10, SWITCH_PAUSE] * switches + [ord("p"), 0.1],
+                              prefetch_stations=True, resolve_urls=True, profile=profile)
+        finally:
+            del os.environ["FAKE_VLC_FETCH"]
+        with open(profile, encoding="utf-8") as file:
+            dump = json.load(file)
+    print(f"[разбивка: {switches + 1} переключений, законченных трасс {dump['traces']}, оборванных {dump['abandoned']}]")
+    for name, histogram in sorted(dump["histograms"].items(), key=lambda item: item[1]["p50"]):
+        print(f"  {name:28} n={histogram['count']:5}  p50 {histogram['p50'] * 1000:8.2f} мс  "
+              f"p90 {histogram['p90'] * 1000:8.2f} мс  макс {histogram['max'] * 1000:8.2f} мс")
+    print("[строка замеров на экране]")
+    print("  " + "".join(text for x, text, attr in window.rows[1]))
+
+
+if __name__ == "__main__":
+    bench()
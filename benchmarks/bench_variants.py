@@ -0,0 +1,112 @@
+"""
+Выбор варианта качества (VariantSelector) на медленном канале: остановки звука и средний битрейт.
+Сессии прослушивания идут по виртуальным часам, секунда за шагом: станция отдает эфир со скоростью битрейта,
+канал пропускает не больше --links кбит/с (своя скорость на каждую сессию), у плеера буфер в секундах звука,
+звук начинается и продолжается после остановки, когда в буфере --prebuffer сек. Замеры скорости соединения
+каждые 10 сек - как у записи timeshift. Сравнение: всегда лучший вариант против выбора по замерам.
+Журнал решений выбора пишется во временный файл и печатается в конце.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_variants --links 1000,200,200,150,1000 --minutes 5
+"""
+import os
+import tempfile
+
+import click
+
+import player.variants
+from player.events import BUFFERING, PLAYING, PlayerEvent
+from player.timeshift import SAMPLE_SECONDS
+from player.variants import VariantSelector
+
+FIELD = "http://radio.example.com/live320.mp3 http://radio.example.com/live128.mp3 http://radio.example.com/live64.mp3"
+
+
+class VirtualClock:
+    """Подменяет модуль time в player.variants: решения принимаются по часам симуляции"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def strftime(self, format):
+        return f"+{self.now:.0f}s"
+
+
+def listen(selector, clock, link, seconds, prebuffer):
+    """Одна сессия: Enter на станции и seconds сек прослушивания. Возвращает (остановки, сек без звука, кбит)"""
+    url = selector.choose(FIELD, "старт") if selector else FIELD.split()[0]
+    backlog = buffer = 0.0
+    started = playing = False
+    stalls = silent = played = 0
+    sampled, since = 0, clock.now
+    for _ in range(seconds):
+        clock.now += 1
+        bitrate = player.variants.variant_bitrate(url)
+        backlog += bitrate  # эфир, который станция уже отдала, но канал еще не донес
+        got = min(link, backlog)
+        backlog -= got
+        buffer += got / bitrate
+        sampled += got * 125
+        events = []
+        if playing:
+            buffer -= 1
+            played += bitrate
+            if buffer < 0:
+                buffer, playing = 0.0, False
+                stalls += 1
+                events.append(PlayerEvent(BUFFERING, 0, clock.now))
+        else:
+            silent += 1
+            if buffer >= prebuffer:
+                playing = started = True
+                events.append(PlayerEvent(PLAYING, None, clock.now))
+        if selector is None:
+            continue
+        if clock.now - since >= SAMPLE_SECONDS:
+            selector.sample(url, sampled, clock.now - since, bitrate)
+            sampled, since = 0, clock.now
+        lower = selector.watch(FIELD, events, started)
+        if lower:
+            # новое соединение: буфер пуст, звук начнется заново
+            url, backlog, buffer, started, playing = lower, 0.0, 0.0, False, False
+            sampled, since = 0, clock.now
+    return stalls, silent, played / max(seconds - silent, 1)
+
+
+@click.command()
+@click.option('--links', default='1000,200,200,150,1000', help='Скорость канала в каждой сессии, кбит/с, через запятую')
+@click.option('--minutes', default=5.0, help='Длина сессии прослушивания, мин')
+@click.option('--prebuffer', default=2.0, help='Сколько секунд звука плеер набирает перед началом')
+def bench(links, minutes, prebuffer):
+    clock = VirtualClock()
+    real_time, player.variants.time = player.variants.time, clock
+    links = [int(value) for value in links.split(",")]
+    seconds = int(minutes * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "variants.jsonl")
+        print(f"[{len(links)} сессий по {minutes:g} мин, варианты 320/128/64 кбит/с]")
+        for name, selector in (("всегда лучший", None), ("выбор по замерам", VariantSelector(log_path))):
+            clock.now = 0.0
+            total_stalls = total_silent = 0
+            print(f"  {name}:")
+            for link in links:
+                stalls, silent, average = listen(selector, clock, link, seconds, prebuffer)
+                total_stalls += stalls
+                total_silent += silent
+                print(f"    канал {link:5} кбит/с: остановок {stalls:4}, без звука {silent:4} с, "
+                      f"в среднем {average:5.0f} кбит/с")
+            print(f"    всего: остановок {total_stalls}, без звука {total_silent} с")
+            if selector:
+                selector.close()
+        print("[журнал решений]")
+        with open(log_path, encoding="utf-8") as log:
+            for line in log:
+                print("  " + line.rstrip())
+    player.variants.time = real_time
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,66 @@
+"""
+Задержка от нажатия +/- до изменения громкости: подключение к rc-интерфейсу на каждое нажатие
+(как было с telnetlib) против постоянного соединения RcClient со слиянием команд.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_volume --presses 30 --interval 0.03
+"""
+import socket
+import statistics
+import time
+
+import click
+
+from benchmarks.fake_vlc import FakeRcServer
+from player.rc_control import RcClient
+
+
+def connect_per_press(port, volume):
+    # прежний способ: новое соединение, команда и закрытие на каждое нажатие
+    with socket.create_connection(("127.0.0.1", port), timeout=1.0) as sock:
+        sock.sendall(f"volume {volume}\nquit\n".encode())
+
+
+def burst(server, presses, interval, send):
+    """Серия нажатий как при удержании клавиши; время блокировки интерфейса и до применения последнего значения"""
+    blocked = []
+    commands_before = len(server.commands)
+    volume = 0
+    last_press = 0.0
+    for i in range(presses):
+        volume = 100 + i * 10
+        last_press = time.monotonic()
+        send(volume)
+        blocked.append(time.monotonic() - last_press)
+        time.sleep(interval)
+    applied = server.wait_command(f"volume {volume}", last_press)
+    commands = sum(1 for _, command in server.commands[commands_before:] if command.startswith("volume"))
+    return blocked, (applied - last_press if applied else None), commands
+
+
+def report(name, blocked, applied, commands, presses):
+    print(f"[{name}]")
+    print(f"  блокировка интерфейса на нажатие: медиана {statistics.median(blocked) * 1e6:.0f} мкс, "
+          f"максимум {max(blocked) * 1e6:.0f} мкс")
+    print("  от последнего нажатия до применения: "
+          + (f"{applied * 1000:.2f} мс" if applied is not None else "не применено"))
+    print(f"  команд volume получено: {commands} на {presses} нажатий")
+
+
+@click.command()
+@click.option('--presses', default=30, help='Нажатий в серии')
+@click.option('--interval', default=0.03, help='Интервал между нажатиями, сек (автоповтор клавиши)')
+def bench(presses, interval):
+    with FakeRcServer() as server:
+        report("соединение на нажатие", *burst(server, presses, interval,
+                                               lambda volume: connect_per_press(server.port, volume)), presses)
+    with FakeRcServer() as server:
+        client = RcClient(server.port, "127.0.0.1")
+        client.query("is_playing")  # дождаться подключения
+        report("RcClient", *burst(server, presses, interval, client.set_volume), presses)
+        report("RcClient без пауз", *burst(server, presses, 0.0, client.set_volume), presses)
+        client.close()
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,81 @@
+"""
+Сторож обрывов (player/watchdog.py) в программе целиком: поддельный vlc (benchmarks/fake_vlc.py) слушает
+станцию на локальном сервере, который обрывает поток каждые --drop-after сек. Меряется, через сколько
+после обрыва запускается новый vlc и начинается звук, и время ответа интерфейса на клавиши (↓ и ↑ раз в
+--key-pause сек) все это время: переподключение не должно задерживать клавиши.
+С --crash процесс vlc при обрыве выходит, как упавший, иначе остается и сообщает «stop state» в rc.
+
+Запуск из корня проекта (только Unix):
+    python -m benchmarks.bench_watchdog --seconds 20 --drop-after 3
+    python -m benchmarks.bench_watchdog --seconds 20 --drop-after 3 --crash
+"""
+import curses
+import os
+import statistics
+import tempfile
+
+import click
+
+from benchmarks.fake_stream import FakeStreamServer
+from benchmarks.suite import duration, key_times, offline, player_app, run_main
+
+
+def read_log(path):
+    """Журнал поддельного vlc: (monotonic время, запись)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [(float(moment), text) for moment, _, text in (line.rstrip("\n").partition(" ") for line in file)]
+
+
+def after(log, prefix, moment):
+    return next((at for at, text in log if text.startswith(prefix) and at >= moment), None)
+
+
+def line(name, times):
+    if not times:
+        return f"  {name:34} нет замеров"
+    return (f"  {name:34} медиана {duration(statistics.median(times)):>10}  макс {duration(max(times)):>10}"
+            f"  замеров {len(times)}")
+
+
+@click.command()
+@click.option('--seconds', default=20.0, help='Сколько секунд слушать станцию')
+@click.option('--drop-after', default=3.0, help='Через сколько секунд после подключения сервер обрывает поток')
+@click.option('--key-pause', default=0.1, help='Пауза между клавишами, сек')
+@click.option('--crash', is_flag=True, help='При обрыве процесс vlc выходит, а не остается без потока')
+def bench(seconds, drop_after, key_pause, crash):
+    with tempfile.TemporaryDirectory() as directory, offline(directory):
+        log_path = os.path.join(directory, "vlc.log")
+        os.environ.update(FAKE_VLC_FETCH="1", FAKE_VLC_LOG=log_path)
+        if crash:
+            os.environ["FAKE_VLC_EXIT"] = "1"
+        presses = int(seconds / key_pause)
+        script = [10] + [step for i in range(presses)
+                         for step in (key_pause, curses.KEY_DOWN if i % 2 == 0 else curses.KEY_UP)]
+        try:
+            with FakeStreamServer(drop_after=drop_after) as server:
+                window = run_main(player_app(directory, server, 3), script)
+                drops = [moment for moment, path in server.drops]
+        finally:
+            for name in ("FAKE_VLC_FETCH", "FAKE_VLC_LOG", "FAKE_VLC_EXIT"):
+                os.environ.pop(name, None)
+        log = read_log(log_path)
+    restart, audio = [], []
+    for moment in drops:
+        started = after(log, "start ", moment)
+        playing = after(log, "playing ", moment)
+        if started is not None:
+            restart.append(started - moment)
+        if playing is not None:
+            audio.append(playing - moment)
+    keys = key_times(window)
+    print(f"[обрывов {len(drops)} за {seconds:.0f} с, vlc {'выходит' if crash else 'остается'}]")
+    print(line("обрыв -> запуск нового vlc", restart))
+    print(line("обрыв -> звук", audio))
+    print(line("клавиша (во время обрывов)", keys))
+    print(f"  обрывов, после которых звук не вернулся до конца замера: {len(drops) - len(audio)}")
+
+
+if __name__ == "__main__":
+    bench()
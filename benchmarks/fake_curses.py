@@ -0,0 +1,167 @@
+import collections
+import contextlib
+import curses
+import socket
+import sys
+import threading
+import time
+
+from ui.ui_screen import Frame
+
+# окно curses в памяти для бенчмарков: программа рисует и читает клавиши без терминала
+
+
+class FakeWindow(Frame):
+    """
+    Окно curses без терминала: вывод ложится в строки кадра (как Frame), клавиши берутся из сценария.
+    Сценарий - коды клавиш (int) и символы (str); число с точкой - пауза в секундах перед следующей клавишей,
+    как у человека, который ждет звука. Пауза отсчитывается от запроса клавиши; как у терминала, getch
+    без ожидания (timeout(0)) на паузе отвечает «клавиши нет», а fileno() становится готов к чтению,
+    когда клавиша «нажата»: программа тем временем работает. Между клавишами getch один раз отвечает
+    «клавиши нет»: каждая клавиша приходит отдельным нажатием, а не пачкой. Сценарий кончился -
+    KeyboardInterrupt, так программа не останется ждать ввода, которого не будет.
+    """
+
+    def __init__(self, h=56, w=120, script=()):
+        super().__init__(h, w)
+        self.script = collections.deque(script)
+        self.delivered = []  # (monotonic время, клавиша) - когда программа получила клавишу
+        self.asked = []  # когда программа попросила каждую клавишу: до этого она была занята предыдущей
+        self.writes = 0  # вызовов addstr
+        self.refreshes = 0
+        self._gap = False
+        self._delay = -1  # как у окна curses: -1 - getch ждет клавишу, 0 - не ждет, иначе мс
+        self._asked = None  # когда программа попросила следующую клавишу
+        self._due = 0.0  # когда следующая клавиша будет «нажата»
+        self._presses = 0
+        self._ready, self._press = socket.socketpair()  # готов к чтению - клавиша нажата
+        self._ready.setblocking(False)
+
+    def fileno(self):
+        return self._ready.fileno()
+    def addstr(self, y, x, text, attr=0):
+        self.writes += 1
+        super().addstr(y, x, text, attr)
+
+    def clear(self):
+        self.erase()
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def noutrefresh(self):
+        self.refreshes += 1
+
+    def keypad(self, flag):
+        pass
+
+    def timeout(self, delay):
+        self._delay = delay
+
+    def nodelay(self, flag):
+        self._delay = 0 if flag else -1
+
+    def getch(self):
+        key = self._next()
+        if isinstance(key, str):
+            return ord(key) if len(key) == 1 else -1
+        return key
+
+    def get_wch(self):
+        key = self._next()
+        if key == -1:
+            raise curses.error("no input")
+        return key
+
+    def getstr(self, *args):
+        text = []
+        while True:
+            key = self._next()
+            if key in (-1, 10, "\n"):
+                return "".join(text).encode("utf-8")
+            text.append(key if isinstance(key, str) else chr(key))
+
+    def unget(self, key):
+        self.script.appendleft(key)
+        self._gap = False
+
+    def _next(self):
+        if self._gap:
+            self._gap = False
+            return -1
+        if self._asked is None:
+            self._asked = time.monotonic()
+            pause = 0.0
+            while self.script and isinstance(self.script[0], float):
+                pause += self.script.popleft()
+            self._due = self._asked + pause
+            self._presses += 1
+            self._unpress()
+            if pause > 0:
+                # без паузы клавиша отдается сразу; оставшийся байт держал бы select готовым на всей паузе
+                timer = threading.Timer(pause, self._pressed, args=(self._presses,))
+                timer.daemon = True
+                timer.start()
+        wait = self._due - time.monotonic()
+        if wait > 0 and self._delay != 0:
+            time.sleep(wait if self._delay < 0 else min(wait, self._delay / 1000))
+            wait = self._due - time.monotonic()
+        if wait > 0:
+            return -1
+        if not self.script:
+            raise KeyboardInterrupt
+        key = self.script.popleft()
+        self.delivered.append((time.monotonic(), key))
+        self.asked.append(self._asked)
+        self._asked = None
+        self._gap = True
+        self._unpress()
+        return key
+
+    def _pressed(self, number):
+        if number == self._presses:  # таймер прежней клавиши, отданной раньше срока, не будит select
+            self._press.send(b"\0")
+
+    def _unpress(self):
+        try:
+            while self._ready.recv(4096):
+                pass
+        except OSError:
+            pass
+
+
+@contextlib.contextmanager
+def installed(window):
+    """
+    Подменяет функции модуля curses, которым нужен настоящий терминал (initscr):
+    цвета, курсор, вывод и возврат клавиш. Возвращенные клавиши попадают в сценарий window.
+    sys.stdin на это время - window: ожидание клавиатуры через select ждет клавиш сценария.
+    """
+    replacements = {
+        "initscr": lambda: window,
+        "newwin": lambda *args: window,
+        "endwin": lambda: None,
+        "start_color": lambda: None,
+        "use_default_colors": lambda: None,
+        "init_pair": lambda *args: None,
+        "color_pair": lambda number: number << 8,
+        "curs_set": lambda visibility: 1,
+        "echo": lambda: None,
+        "noecho": lambda: None,
+        "doupdate": lambda: None,
+        "ungetch": window.unget,
+        "unget_wch": window.unget,
+        "is_term_resized": lambda lines, columns: False,
+        "resizeterm": lambda lines, columns: None,
+        "update_lines_cols": lambda: None,
+    }
+    saved = {name: getattr(curses, name) for name in replacements}
+    for name, replacement in replacements.items():
+        setattr(curses, name, replacement)
+    stdin, sys.stdin = sys.stdin, window
+    try:
+        yield window
+    finally:
+        sys.stdin = stdin
+        for name, original in saved.items():
+            setattr(curses, name, original)
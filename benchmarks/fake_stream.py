@@ -0,0 +1,130 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# локальный поддельный сервер потокового радио для бенчмарков
+
+# кадр MPEG-1 Layer III 128 кбит/с, 44.1 кГц, моно, без данных - декодируется как тишина
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC0]) + bytes(417 - 4)
+FRAME_SECONDS = 1152 / 44100
+
+
+def icy_block(title):
+    """Блок метаданных Shoutcast: байт длины в 16-байтных единицах и StreamTitle, дополненный нулями"""
+    payload = f"StreamTitle='{title}';".encode("utf-8")[:255 * 16]
+    length = (len(payload) + 15) // 16
+    return bytes([length]) + payload.ljust(length * 16, b"\0")
+
+
+class IcyWriter:
+    """Вставляет блок метаданных после каждых metaint байт звука"""
+
+    def __init__(self, wfile, metaint, title):
+        self.wfile = wfile
+        self.metaint = metaint
+        self.title = title  # функция, возвращающая текущее название
+        self.left = metaint
+
+    def write(self, data):
+        while data:
+            part = data[:self.left]
+            self.wfile.write(part)
+            self.left -= len(part)
+            data = data[len(part):]
+            if self.left == 0:
+                self.wfile.write(icy_block(self.title()))
+                self.left = self.metaint
+
+
+class FakeStreamServer:
+    """
+    HTTP-сервер на 127.0.0.1, который бесконечно отдает тишину в формате mp3.
+    Запоминает время прихода каждого запроса, чтобы мерить задержку переключения станций.
+    С metaint ведет себя как Shoutcast: на запрос с Icy-MetaData: 1 вставляет в поток название из title.
+    С realtime=False отдает поток так быстро, как его читают: часы эфира за секунды.
+    pages - ответы не потоком: путь -> (статус, заголовки, тело), например плейлисты и перенаправления.
+    drop_after - поток обрывается через столько секунд после запроса, как у станции со сбоями.
+    """
+
+    def __init__(self, burst_frames=64, response_delay=0.0, metaint=0, title="Silence - Track 1", realtime=True,
+                 pages=None, drop_after=None):
+        self.requests = []  # (monotonic время, путь)
+        self.burst_frames = burst_frames
+        self.response_delay = response_delay  # имитация задержки сети и сервера, сек
+        self.metaint = metaint
+        self.title = title  # можно менять на ходу, клиенты увидят новое название в следующем блоке
+        self.realtime = realtime
+        self.pages = pages or {}
+        self.drop_after = drop_after
+        self.drops = []  # (monotonic время, путь) оборванных потоков
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def do_GET(self):
+                server.requests.append((time.monotonic(), self.path))
+                time.sleep(server.response_delay)
+                if self.path in server.pages:
+                    status, headers, body = server.pages[self.path]
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("icy-br", "128")
+                out = self.wfile
+                if server.metaint and self.headers.get("Icy-MetaData") == "1":
+                    self.send_header("icy-metaint", str(server.metaint))
+                    out = IcyWriter(self.wfile, server.metaint, lambda: server.title)
+                self.end_headers()
+                deadline = time.monotonic() + server.drop_after if server.drop_after else None
+                try:
+                    # как icecast: сначала пачка кадров, потом в реальном времени
+                    out.write(MP3_FRAME * server.burst_frames)
+                    while not server.stopped.is_set():
+                        if deadline is not None and time.monotonic() >= deadline:
+                            server.drops.append((time.monotonic(), self.path))
+                            return
+                        if server.realtime:
+                            out.write(MP3_FRAME)
+                            time.sleep(FRAME_SECONDS)
+                        else:
+                            out.write(MP3_FRAME * 64)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.stopped = threading.Event()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path="/stream"):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def wait_request(self, path, since, timeout=10.0):
+        """Ждет запрос по пути path, пришедший после since, и возвращает его время"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for moment, request_path in self.requests:
+                if request_path == path and moment >= since:
+                    return moment
+            time.sleep(0.001)
+        return None
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,152 @@
+import os
+import socket
+import sys
+import threading
+import time
+
+# поддельный rc-интерфейс VLC для бенчмарков
+
+
+class FakeRcServer:
+    """
+    TCP-сервер с поведением rc-интерфейса VLC: обслуживает одного клиента за раз,
+    отвечает на is_playing и volume, запоминает время получения каждой команды.
+    log - файл, куда команды дописываются строками «monotonic время команда» (для других процессов).
+    """
+
+    def __init__(self, port=0, log=None):
+        self.commands = []  # (monotonic время, команда)
+        self.volume = 256
+        self.connections = 0
+        self.log = log
+        self.playing = threading.Event()  # is_playing отвечает 1; без потока - сразу
+        self.playing.set()
+        self.client = None  # подключенный клиент rc: ему уходят строки «status change»
+        self.sock = socket.create_server(("127.0.0.1", port))
+        self.port = self.sock.getsockname()[1]
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+
+    def _serve(self):
+        while not self.stopped.is_set():
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self.client = client
+            with client:
+                client.sendall(b"VLC media player 3.0.0 (fake)\r\nCommand Line Interface initialized.\r\n> ")
+                self._session(client.makefile("rb"), client)
+
+    def _session(self, reader, client):
+        for raw in reader:
+            command = raw.decode(errors="replace").strip()
+            self.commands.append((time.monotonic(), command))
+            if self.log is not None:
+                self.log.write(f"{self.commands[-1][0]:.6f} {command}\n")
+            name, _, argument = command.partition(" ")
+            try:
+                if name in ("quit", "logout"):
+                    return
+                if name == "volume" and argument:
+                    self.volume = int(argument)
+                    client.sendall(b"> ")
+                elif name == "volume":
+                    client.sendall(f"{self.volume}\r\n> ".encode())
+                elif name == "is_playing":
+                    client.sendall(b"1\r\n> " if self.playing.is_set() else b"0\r\n> ")
+                else:
+                    client.sendall(b"> ")
+            except OSError:
+                return
+
+    def announce(self, line):
+        """Строка состояния rc-интерфейса, как у vlc при смене состояния потока"""
+        try:
+            if self.client is not None:
+                self.client.sendall(f"{line}\r\n".encode())
+        except OSError:
+            pass
+
+    def wait_command(self, command, since, timeout=5.0):
+        """Ждет команду, полученную после since, и возвращает время ее получения"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for moment, received in reversed(self.commands):
+                if received == command and moment >= since:
+                    return moment
+            time.sleep(0.0005)
+        return None
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.sock.close()
+
+
+def install_vlc(directory):
+    """Исполняемый `vlc` в directory, запускающий эту подделку (только Unix); каталог ставят в начало PATH"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.makedirs(directory, exist_ok=True)
+    vlc = os.path.join(directory, "vlc")
+    with open(vlc, "w") as file:
+        file.write(f'#!/bin/sh\nPYTHONPATH="{root}" exec "{sys.executable}" -m benchmarks.fake_vlc "$@"\n')
+    os.chmod(vlc, 0o755)
+    return directory
+
+
+def listen(url, server):
+    """
+    Читает поток, как плеер: is_playing отвечает 1 с первых байт звука. Поток кончился - is_playing 0
+    и «stop state» в rc, как у vlc; с FAKE_VLC_EXIT=1 процесс выходит, как упавший vlc.
+    """
+    from urllib.request import urlopen
+    try:
+        with urlopen(url, timeout=10) as response:
+            response.read(4096)
+            server.playing.set()
+            if server.log is not None:
+                server.log.write(f"{time.monotonic():.6f} playing {url}\n")
+            while response.read(65536):
+                pass
+    except OSError:
+        pass
+    server.playing.clear()
+    if server.log is not None:
+        server.log.write(f"{time.monotonic():.6f} stopped {url}\n")
+    if os.environ.get("FAKE_VLC_EXIT"):
+        os._exit(1)
+    server.announce("status change: ( stop state: 5 )")
+
+
+def main(argv):
+    """
+    Подделка процесса `vlc --intf rc --rc-host host:port url` для бенчмарков, запускающих программу целиком:
+    rc-интерфейс поднимается через FAKE_VLC_DELAY сек (холодный старт vlc), дальше поток сразу «играет».
+    С FAKE_VLC_FETCH=1 поток читается с сервера и «играет» с первых байт; FAKE_VLC_LOG - файл журнала
+    запуска, команд rc и начала звука с временем monotonic, общим для всех процессов.
+    """
+    port = int(argv[argv.index("--rc-host") + 1].rsplit(":", 1)[1])
+    url = argv[-1] if argv and not argv[-1].startswith("-") else None
+    log = None
+    if os.environ.get("FAKE_VLC_LOG"):
+        log = open(os.environ["FAKE_VLC_LOG"], "a", buffering=1, encoding="utf-8")
+        log.write(f"{time.monotonic():.6f} start {url}\n")
+    time.sleep(float(os.environ.get("FAKE_VLC_DELAY", "0")))
+    with FakeRcServer(port, log) as server:
+        if os.environ.get("FAKE_VLC_FETCH") and url and url.startswith("http"):
+            server.playing.clear()
+            threading.Thread(target=listen, args=(url, server), daemon=True).start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
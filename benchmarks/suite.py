@@ -0,0 +1,256 @@
+"""
+Набор бенчмарков горячих путей без терминала, VLC и сети: сравнение до и после изменения, в том числе в CI.
+Списки из --sizes станций генерируются заново. Меряются:
+  load_stations, StationCatalog.open, save_stations - чтение и запись файла списка;
+  draw_stations_list, full_redraw - экран списка в окне curses в памяти (benchmarks/fake_curses.py);
+  main - цикл интерфейса целиком: клавиши сценария (↓, PgDn, End, ←/→ по вкладкам) приходят по одной
+         раз в FRAME_TIME, время клавиши - от ее получения до запроса следующей, вместе с кадром;
+  switch, volume - от Enter до запроса потока и до звука, от + до команды volume в vlc. Вместо vlc - подделка
+         (benchmarks/fake_vlc.py), которая читает поток с локального сервера (benchmarks/fake_stream.py).
+Каждый замер повторяется, пока не наберется --min-rounds повторов и --max-time сек.
+--json сохраняет результат, --compare сравнивает медианы с сохраненным раньше, -k выбирает замеры по имени.
+
+Запуск из корня проекта (main, switch и volume - только Unix):
+    python -m benchmarks.suite --sizes 10,1000,100000,1000000 --json before.json
+    python -m benchmarks.suite --sizes 10,1000,100000,1000000 --compare before.json
+"""
+import contextlib
+import curses
+import datetime
+import json
+import os
+import platform
+import signal
+import statistics
+import sys
+import tempfile
+import time
+
+import click
+
+import atradio
+from benchmarks.fake_curses import FakeWindow, installed
+from benchmarks.fake_stream import FakeStreamServer
+from benchmarks.fake_vlc import install_vlc
+from storage.catalog import StationCatalog
+from storage.stations import load_stations, save_stations
+from ui.ui_app import draw_stations_list, full_redraw
+from ui.ui_loop import FRAME_TIME
+
+SCREEN = (56, 120)
+CATEGORIES = 12
+MAIN_KEYS = ([curses.KEY_DOWN] * 60 + [curses.KEY_NPAGE] * 10 + [curses.KEY_END, curses.KEY_HOME]
+             + [curses.KEY_RIGHT, curses.KEY_LEFT] * 5 + [curses.KEY_UP] * 20
+             + [curses.KEY_NPAGE, curses.KEY_PPAGE] * 5)
+MAIN_SCRIPT = [step for key in MAIN_KEYS for step in (FRAME_TIME, key)]  # кадр успевает нарисоваться после каждой
+SWITCH_PAUSE = 1.0  # сек после Enter: звук успевает начаться
+VOLUME_PAUSE = 0.3
+PLAYER_CASES = ("switch: Enter -> запрос потока", "switch: Enter -> звук", "volume: + -> команда vlc")
+
+
+def generate(filename, count):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write("Name;URL;Category\n")
+        for i in range(count):
+            file.write(f"Станция {i} FM;http://radio{i % 997}.example.com:8000/live{i}.mp3;Жанр {i % CATEGORIES}\n")
+
+
+def repeat(action, min_rounds, max_time):
+    """Времена выполнения action, сек: не меньше min_rounds повторов и не меньше max_time сек в сумме"""
+    action()  # прогрев: файл в кэше ОС, строки каталога разобраны
+    times = []
+    started = time.perf_counter()
+    while len(times) < min_rounds or (time.perf_counter() - started < max_time and len(times) < 100000):
+        begin = time.perf_counter()
+        action()
+        times.append(time.perf_counter() - begin)
+    return times
+
+
+def summary(times):
+    return {"min": min(times), "max": max(times), "mean": statistics.fmean(times),
+            "median": statistics.median(times), "stddev": statistics.pstdev(times), "rounds": len(times)}
+
+
+def file_cases(path):
+    catalog = StationCatalog.open(path)
+    yield "load_stations", lambda: load_stations(path)
+    yield "StationCatalog.open", lambda: StationCatalog.open(path)
+    yield "save_stations", lambda: save_stations(f"{path}.out", catalog)
+
+
+def screen_cases(path):
+    stations = StationCatalog.open(path)
+    window = FakeWindow(*SCREEN)
+    max_display = SCREEN[0] - 6
+    row = len(stations) // 2
+    offset = max(row - max_display // 2, 0)
+
+    def draw_list():
+        window.erase()
+        draw_stations_list(window, stations, row, offset, 0, False, max_display)
+
+    def redraw():
+        full_redraw(window, stations, row, offset, 0, False, False, 100, -1, "играет")
+
+    yield "draw_stations_list", draw_list
+    yield "full_redraw", redraw
+
+
+@contextlib.contextmanager
+def offline(directory):
+    """Кэш программы - в directory, вместо vlc в PATH - подделка (только Unix); окружение восстанавливается"""
+    saved = {name: os.environ.get(name) for name in ("PATH", "XDG_CACHE_HOME")}
+    os.environ["XDG_CACHE_HOME"] = os.path.join(directory, "cache")
+    if hasattr(signal, "SIGWINCH"):
+        os.environ["PATH"] = f"{install_vlc(os.path.join(directory, 'bin'))}{os.pathsep}{os.environ['PATH']}"
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def run_main(directory, script, **options):
+    """Цикл интерфейса (atradio.main) на окне в памяти со сценарием клавиш; q в конце - выход"""
+    window = FakeWindow(*SCREEN, script=list(script) + [ord("q")])
+    previous = os.getcwd()
+    resize_handler = signal.getsignal(signal.SIGWINCH) if hasattr(signal, "SIGWINCH") else None
+    os.chdir(directory)
+    try:
+        with installed(window):
+            atradio.main(window, -1, **{"backend": "subprocess", "prefetch_stations": False, "check_health": False,
+                                        "read_titles": False, "resolve_urls": False, **options})
+    finally:
+        os.chdir(previous)
+        if resize_handler is not None:
+            signal.signal(signal.SIGWINCH, resize_handler)
+    return window
+
+
+def key_times(window):
+    """Время обработки каждой клавиши: от ее получения до запроса следующей"""
+    return [asked - delivered for (delivered, key), asked in zip(window.delivered, window.asked[1:])]
+
+
+def player_app(directory, server, count, host="127.0.0.1"):
+    """Каталог программы со списком из count станций на локальном сервере: /station0, /station1, ..."""
+    app = os.path.join(directory, "player")
+    os.makedirs(os.path.join(app, "data"), exist_ok=True)
+    with open(os.path.join(app, "data", "radio_stations.csv"), "w", encoding="utf-8") as file:
+        file.write("Name;URL\n")
+        for i in range(count):
+            file.write(f"Станция {i} FM;{server.url(f'/station{i}').replace('127.0.0.1', host)}\n")
+    return app
+
+
+def player_times(directory, switches, presses):
+    """Задержки переключения станций и громкости через поддельный vlc, который читает поток с локального сервера"""
+    log_path = os.path.join(directory, "vlc.log")
+    os.environ.update(FAKE_VLC_FETCH="1", FAKE_VLC_LOG=log_path)
+    script = [10, SWITCH_PAUSE] + [curses.KEY_DOWN, 10, SWITCH_PAUSE] * switches + [ord("+"), VOLUME_PAUSE] * presses
+    try:
+        with FakeStreamServer() as server:
+            window = run_main(player_app(directory, server, switches + 1), script)
+            requests = list(server.requests)
+            urls = [server.url(f"/station{i}") for i in range(switches + 1)]
+    finally:
+        del os.environ["FAKE_VLC_FETCH"], os.environ["FAKE_VLC_LOG"]
+    log = []
+    if os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as file:
+            log = [(float(moment), text) for moment, _, text in (line.rstrip("\n").partition(" ") for line in file)]
+    switch_request, switch_audio, volume = PLAYER_CASES
+    results = {name: [] for name in PLAYER_CASES}
+    row = 0
+    for moment, key in window.delivered:
+        if key == curses.KEY_DOWN:
+            row += 1
+        elif key == 10:
+            path = f"/station{row}"
+            request = next((at for at, requested in requests if requested == path and at >= moment), None)
+            audio = next((at for at, text in log if text == f"playing {urls[row]}" and at >= moment), None)
+            if request is not None:
+                results[switch_request].append(request - moment)
+            if audio is not None:
+                results[switch_audio].append(audio - moment)
+        elif key == ord("+"):
+            command = next((at for at, text in log if text.startswith("volume ") and at >= moment), None)
+            if command is not None:
+                results[volume].append(command - moment)
+    return results
+
+
+def duration(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} мкс"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} мс"
+    return f"{seconds:.2f} с"
+
+
+def report(name, stats, baseline=None):
+    line = (f"  {name:42} мин {duration(stats['min']):>11}  медиана {duration(stats['median']):>11}  "
+            f"среднее {duration(stats['mean']):>11}  макс {duration(stats['max']):>11}  "
+            f"повт. {stats['rounds']:6}  {1 / stats['mean'] if stats['mean'] else 0:10.1f} оп/с")
+    if baseline:
+        line += f"  медиана {(stats['median'] / baseline['median'] - 1) * 100:+6.1f}%"
+    print(line)
+
+
+def revision():
+    import subprocess
+    result = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+@click.command()
+@click.option('--sizes', default='10,1000,100000,1000000', help='Размеры списков станций через запятую')
+@click.option('--min-rounds', default=3, help='Не меньше стольких повторов каждого замера')
+@click.option('--max-time', default=1.0, help='Не меньше стольких секунд на замер')
+@click.option('--switches', default=5, help='Переключений станций в замере switch')
+@click.option('--presses', default=5, help='Нажатий + в замере volume')
+@click.option('-k', 'keyword', default=None, help='Только замеры, в имени которых есть эта строка')
+@click.option('--json', 'json_path', default=None, help='Сохранить результат в файл JSON')
+@click.option('--compare', default=None, help='Сравнить медианы с результатом, сохраненным через --json')
+def bench(sizes, min_rounds, max_time, switches, presses, keyword, json_path, compare):
+    baseline = {}
+    if compare:
+        with open(compare, encoding="utf-8") as file:
+            baseline = json.load(file)["benchmarks"]
+    results = {}
+
+    def record(name, times):
+        if times and (keyword is None or keyword in name):
+            results[name] = summary(times)
+            report(name, results[name], baseline.get(name))
+
+    unix = hasattr(signal, "SIGWINCH")
+    with tempfile.TemporaryDirectory() as directory, offline(directory):
+        for size in (int(value) for value in sizes.split(",")):
+            print(f"[{size} станций]")
+            app = os.path.join(directory, str(size))
+            path = os.path.join(app, "data", "radio_stations.csv")
+            generate(path, size)
+            for name, action in [*file_cases(path), *screen_cases(path)]:
+                if keyword is None or keyword in f"{name}[{size}]":
+                    record(f"{name}[{size}]", repeat(action, min_rounds, max_time))
+            if unix and (keyword is None or keyword in f"main[{size}]"):
+                record(f"main[{size}]", key_times(run_main(app, MAIN_SCRIPT)))
+        if unix and (keyword is None or any(keyword in name for name in PLAYER_CASES)):
+            print("[плеер: поддельный vlc и локальный сервер потока]")
+            for name, times in player_times(directory, switches, presses).items():
+                record(name, times)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as file:
+            json.dump({"datetime": datetime.datetime.now().isoformat(timespec="seconds"), "revision": revision(),
+                       "python": sys.version.split()[0], "machine": platform.platform(), "benchmarks": results},
+                      file, ensure_ascii=False, indent=1)
+
+
+if __name__ == "__main__":
+    bench()
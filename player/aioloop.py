@@ -0,0 +1,22 @@
+import asyncio
+import threading
+
+# общий asyncio-цикл в фоновом потоке для сетевых задач плеера
+
+_loop = None
+_lock = threading.Lock()
+
+
+def background_loop():
+    """Возвращает фоновый цикл, запуская его при первом обращении"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="atradio-asyncio", daemon=True).start()
+    return _loop
+
+
+def submit(coro):
+    """Запускает корутину в фоновом цикле, возвращает concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, background_loop())
@@ -0,0 +1,405 @@
+import subprocess
+import threading
+import time
+
+from player import trace
+from player.events import BUFFERING, END, ERROR, PLAYING, STATE, EventBus, OutputDrain, parse_vlc_line
+
+# бэкенды воспроизведения: долгоживущий libvlc внутри процесса и запасной вариант через процесс vlc
+
+RC_HOST = "localhost"
+RC_PORT = 5000
+
+
+def vlc_open(vlc_prg, name_station: str, rc_port: int = RC_PORT):
+    # запуск процесса vlc
+    return subprocess.Popen(
+        [vlc_prg, "--intf", "rc", "--rc-host", f"{RC_HOST}:{rc_port}", name_station],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+class Player:
+    """
+    Общая логика бэкендов: переключение «сначала подключить новый поток, потом отключить старый»
+    и замер времени от нажатия Enter до начала звука.
+    Бэкенд реализует _start, _state, _set_handle_volume и _stop_handle.
+    """
+    name = ""
+    poll_interval = 0.05  # период опроса состояния нового потока, сек
+    start_timeout = 20.0  # сколько ждать начала воспроизведения, сек
+    fade_steps = 10
+
+    def __init__(self, bus=None):
+        self.bus = bus if bus is not None else EventBus()
+        self.last_event = None  # последнее событие играющего или подключаемого потока
+        self.handle = None  # играющий поток
+        self.pending = None  # поток, который подключается при переключении
+        self.url = None
+        self.pending_url = None
+        self.volume = None  # None - громкость VLC по умолчанию
+        self.start_latency = None  # от нажатия Enter до начала звука, сек
+        self.playing_latency = None  # start_latency играющего потока, пока подключается новый
+        self.error = None
+        self.version = 0  # увеличивается при каждом изменении состояния
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def play(self, url: str):
+        """Останавливает текущий поток и запускает новый"""
+        started = time.monotonic()
+        with self._lock:
+            self._drop_pending()
+            if self.handle is not None:
+                self._stop_handle(self.handle)
+            self.handle = self._start(url, self.volume)
+            self.url = url
+            generation = self._begin()
+        self._watch(self.handle, started, generation)
+
+    def switch(self, url: str, crossfade: float = 0.0):
+        """
+        Запускает новый поток в фоне, старый продолжает играть,
+        пока новый не начнет воспроизведение. Потом обрыв или плавный переход за crossfade сек.
+        """
+        if self.handle is None:
+            return self.play(url)
+        started = time.monotonic()
+        with self._lock:
+            if self.pending is None:
+                self.playing_latency = self.start_latency
+            self._drop_pending()
+            self.pending = self._start(url, 0 if crossfade > 0 else self.volume)
+            self.pending_url = url
+            generation = self._begin()
+        self._watch(self.pending, started, generation, handover=True, crossfade=crossfade)
+
+    def cancel_switch(self) -> bool:
+        """Отменяет переключение, пока новый поток не заиграл: играть остается прежний"""
+        with self._lock:
+            if self.pending is None:
+                return False
+            self._drop_pending()
+            self._begin()  # ожидание нового потока больше не нужно
+            self.start_latency = self.playing_latency
+            if self.volume is not None:
+                # плавный переход мог успеть приглушить прежний поток
+                self._set_handle_volume(self.handle, self.volume)
+            return True
+
+    def stop(self):
+        with self._lock:
+            self._drop_pending()
+            if self.handle is not None:
+                self._stop_handle(self.handle)
+            self.handle = None
+            self.url = None
+            self._begin()
+
+    def is_active(self) -> bool:
+        return self.handle is not None
+
+    def is_connecting(self) -> bool:
+        """Идет подключение к станции: звук нового потока еще не начался"""
+        return (self.pending is not None
+                or (self.handle is not None and self.start_latency is None and self.error is None))
+
+    def check(self):
+        """
+        Состояние начавшегося потока (как у _state) для сторожа обрывов;
+        None - проверять нечего: ничего не играет или идет подключение. Может ждать ответа vlc.
+        """
+        with self._lock:
+            handle = self.handle
+            if handle is None or self.pending is not None or self.start_latency is None:
+                return None
+        return self._state(handle)
+
+    def received(self):
+        """Сколько байт потока прочитал играющий плеер; None - бэкенд не считает"""
+        handle = self.handle
+        return self._received(handle) if handle is not None else None
+
+    def set_volume(self, volume: int):
+        # громкость в единицах rc-интерфейса: 0..512, 256 - 100%
+        self.volume = volume
+        if self.handle is not None:
+            self._set_handle_volume(self.handle, volume)
+
+    def close(self):
+        self.stop()
+
+    def _begin(self):
+        self._generation += 1
+        self.start_latency = None
+        self.error = None
+        self.last_event = None
+        self._changed()
+        return self._generation
+
+    def _changed(self):
+        self.version += 1
+        self.bus.publish(STATE)
+
+    def _emit(self, handle, kind, detail=None):
+        """Событие от потока; события уже остановленных потоков не нужны интерфейсу"""
+        if handle is self.handle or handle is self.pending:
+            if kind == BUFFERING:
+                trace.mark("буферизация")
+            self.last_event = (kind, detail)
+            self.bus.publish(kind, detail)
+
+    def _drop_pending(self):
+        if self.pending is not None:
+            self._stop_handle(self.pending)
+            self.pending = None
+            self.pending_url = None
+
+    def _watch(self, handle, started, generation, handover=False, crossfade=0.0):
+        threading.Thread(
+            target=self._wait_playing,
+            args=(handle, started, generation, handover, crossfade),
+            daemon=True,
+        ).start()
+
+    def _wait_playing(self, handle, started, generation, handover, crossfade):
+        state = "opening"
+        while state == "opening" and time.monotonic() - started < self.start_timeout:
+            if generation != self._generation:
+                return  # поток уже заменен другим переключением
+            time.sleep(self.poll_interval)
+            state = self._state(handle)
+
+        with self._lock:
+            if generation != self._generation:
+                return  # в том числе stopped: поток остановлен нами под этим же замком
+            if state != "playing":
+                trace.finish("ошибка")
+                self.error = "нет ответа от станции" if state == "opening" else "ошибка потока"
+                if handover:
+                    self._drop_pending()
+                self._changed()
+                return
+            self.start_latency = time.monotonic() - started
+            trace.finish("звук")
+            self._changed()
+            if crossfade == 0 and self.volume is not None:
+                # громкость могла измениться, пока поток подключался
+                self._set_handle_volume(handle, self.volume)
+            if not handover:
+                return
+            old = self.handle
+
+        if crossfade > 0:
+            self._crossfade(old, handle, crossfade)
+
+        with self._lock:
+            if generation != self._generation:
+                if crossfade > 0 and self.handle is old:
+                    # переход прерван новым переключением: возвращаем громкость старому потоку
+                    self._set_handle_volume(old, self.volume if self.volume is not None else 256)
+                return
+            self.handle, self.pending = handle, None
+            self.url, self.pending_url = self.pending_url, None
+            self._changed()
+        # старый поток останавливаем в фоне, остановка процесса может занять время
+        self._stop_handle(old)
+
+    def _crossfade(self, old, new, duration):
+        volume = self.volume if self.volume is not None else 256
+        for step in range(1, self.fade_steps + 1):
+            level = volume * step // self.fade_steps
+            self._set_handle_volume(new, level)
+            self._set_handle_volume(old, volume - level)
+            time.sleep(duration / self.fade_steps)
+
+    def _start(self, url, volume):
+        raise NotImplementedError
+
+    def _state(self, handle) -> str:
+        """Возвращает opening, playing, stopped (поток остановлен) или error (ошибка или конец потока)"""
+        raise NotImplementedError
+
+    def _received(self, handle):
+        return None
+
+    def _set_handle_volume(self, handle, volume):
+        raise NotImplementedError
+
+    def _stop_handle(self, handle):
+        raise NotImplementedError
+
+
+class VlcProcess:
+    """Процесс vlc и постоянное соединение с его rc-интерфейсом"""
+
+    def __init__(self, process, rc_port, on_event):
+        self.process = process
+        self.rc_port = rc_port
+        self.on_event = on_event
+        # вывод процесса и строки состояния rc-интерфейса превращаются в события плеера
+        self.output = OutputDrain(process, lambda kind, detail: on_event(self, kind, detail))
+        # rc-клиент работает на asyncio: модуль загружается, когда процесс vlc уже запущен, а не при старте программы
+        from player.rc_control import RcClient
+        self.rc = RcClient(rc_port, on_line=self._on_rc_line)
+
+    def _on_rc_line(self, line):
+        parsed = parse_vlc_line(line)
+        if parsed:
+            self.on_event(self, *parsed)
+
+
+class SubprocessPlayer(Player):
+    """
+    Воспроизведение через отдельный процесс `vlc --intf rc`.
+    Каждая смена станции запускает новый процесс, поэтому используется только как запасной вариант.
+    При переключении старый и новый процессы работают одновременно на разных rc-портах.
+    """
+    name = "subprocess"
+
+    def __init__(self, vlc_prg, rc_port: int = RC_PORT, bus=None):
+        super().__init__(bus)
+        self.vlc_prg = vlc_prg
+        self.rc_ports = (rc_port, rc_port + 1)
+
+    @property
+    def process(self):
+        return self.handle.process if self.handle is not None else None
+
+    def _start(self, url, volume):
+        busy = self.handle.rc_port if self.handle is not None else None
+        port = self.rc_ports[1] if busy == self.rc_ports[0] else self.rc_ports[0]
+        with trace.span("запуск vlc"):
+            process = vlc_open(self.vlc_prg, url, port)
+        trace.mark("процесс vlc")
+        handle = VlcProcess(process, port, self._emit)
+        if volume is not None:
+            # громкость уйдет, как только поднимется rc-интерфейс
+            self._set_handle_volume(handle, volume)
+        return handle
+
+    def _state(self, handle):
+        if handle.process.poll() is not None:
+            return "error"
+        # пока rc-интерфейс не поднялся, ответа нет
+        answer = handle.rc.query("is_playing")
+        if answer is not None:
+            trace.mark("rc-интерфейс")
+        return "playing" if answer == 1 else "opening"
+
+    def _set_handle_volume(self, handle, volume):
+        # команда уйдет в фоне, серия нажатий сольется в одну команду
+        handle.rc.set_volume(volume)
+
+    def _stop_handle(self, handle):
+        handle.rc.close()
+        if handle.process.poll() is None:
+            with trace.span("остановка vlc"):
+                handle.process.terminate()
+                handle.process.wait()
+
+
+class LibVlcPlayer(Player):
+    """
+    Долгоживущий vlc.Instance внутри процесса с двумя MediaPlayer.
+    При смене станции заменяется только media, процесс VLC заново не запускается;
+    второй MediaPlayer нужен, чтобы новый поток подключался, пока играет старый.
+    """
+    name = "libvlc"
+
+    def __init__(self, bus=None):
+        super().__init__(bus)
+        import vlc
+        self.vlc = vlc
+        self.instance = vlc.Instance("--no-video", "--quiet")
+        if self.instance is None:
+            raise RuntimeError("libvlc не инициализирован")
+        self.media_players = [self.instance.media_player_new() for _ in range(2)]
+        events = {
+            vlc.EventType.MediaPlayerBuffering: BUFFERING,
+            vlc.EventType.MediaPlayerPlaying: PLAYING,
+            vlc.EventType.MediaPlayerEncounteredError: ERROR,
+            vlc.EventType.MediaPlayerEndReached: END,
+        }
+        for player in self.media_players:
+            manager = player.event_manager()
+            for event_type, kind in events.items():
+                manager.event_attach(event_type, self._on_vlc_event, player, kind)
+
+    def _on_vlc_event(self, event, player, kind):
+        # вызывается из потока libvlc: функции libvlc отсюда вызывать нельзя
+        detail = int(event.u.new_cache) if kind == BUFFERING else None
+        self._emit(player, kind, detail)
+
+    def _start(self, url, volume):
+        player = self.media_players[1] if self.handle is self.media_players[0] else self.media_players[0]
+        with trace.span("libvlc media"):
+            media = self.instance.media_new(url)
+            player.set_media(media)
+            media.release()
+            # MediaPlayer мог остаться приглушенным после плавного перехода
+            self._set_handle_volume(player, 256 if volume is None else volume)
+            player.play()
+        return player
+
+    def _state(self, handle):
+        state = handle.get_state()
+        if state == self.vlc.State.Playing:
+            return "playing"
+        if state in (self.vlc.State.Error, self.vlc.State.Ended):
+            return "error"
+        if state == self.vlc.State.Stopped:
+            return "stopped"  # остановлен переключением или отменой - не сбой
+        return "opening"
+
+    def _received(self, handle):
+        media = handle.get_media()
+        if media is None:
+            return None
+        stats = self.vlc.MediaStats()
+        counted = media.get_stats(stats)
+        media.release()
+        return stats.read_bytes if counted else None
+
+    def _set_handle_volume(self, handle, volume):
+        # переводим единицы rc-интерфейса (256 - 100%) в проценты libvlc
+        handle.audio_set_volume(round(volume * 100 / 256))
+
+    def _stop_handle(self, handle):
+        with trace.span("libvlc stop"):
+            handle.stop()
+
+    def close(self):
+        super().close()
+        for player in self.media_players:
+            player.release()
+        self.instance.release()
+
+
+BACKENDS = ("auto", "libvlc", "subprocess")
+SWITCH_MODES = ("cut", "crossfade", "stop")
+CROSSFADE_SECONDS = 0.4
+
+
+def create_player(backend: str, vlc_prg, bus=None):
+    """
+    Создает бэкенд воспроизведения, события плеера публикуются в bus.
+    auto - libvlc, а если python-vlc или сама библиотека libvlc недоступны - процесс vlc.
+    """
+    if backend in ("auto", "libvlc"):
+        try:
+            return LibVlcPlayer(bus)
+        except Exception:
+            # python-vlc без libvlc падает с NameError/OSError/NotImplementedError
+            if backend == "libvlc":
+                raise
+    return SubprocessPlayer(vlc_prg, bus=bus)
+
+
+def switch_station(player, url: str, mode: str):
+    """Переключает станцию выбранным способом: cut и crossfade - без паузы, stop - как раньше"""
+    if mode == "stop":
+        player.play(url)
+    else:
+        player.switch(url, CROSSFADE_SECONDS if mode == "crossfade" else 0.0)
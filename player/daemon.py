@@ -0,0 +1,237 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+
+from player.backends import SWITCH_MODES, switch_station
+from player.events import STATE, TITLE
+from player.variants import primary_url
+
+# плеер без терминала: демон на unix-сокете, интерфейс и скрипты - его клиенты
+
+VOLUME_MAX = 512  # громкость в единицах rc-интерфейса, 256 - 100%
+DEFAULT_VOLUME = 256
+LIST_LIMIT = 1000  # сколько станций отдает list без явного limit
+WATCH_BUFFER = 1 << 20  # подписчик, не читающий события, отключается, когда у него накопится столько байт
+
+
+def parse_request(line: str) -> dict:
+    """
+    Строка запроса -> словарь команды. JSON-объект берется как есть: {"cmd": "play", "station": 3, "id": 1};
+    короткая форма - команда и аргументы через пробел: `play 3`, `play http://...`, `volume +10`, `list 100 20`.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("ожидался объект JSON")
+        return request
+    command, *args = line.split()
+    command = command.lower()
+    request = {"cmd": command}
+    if command == "play" and args:
+        request["station"] = int(args[0]) if args[0].isdigit() else args[0]
+    elif command == "volume" and args:
+        request["value"] = args[0]
+    elif command == "list" and args:
+        request["offset"] = int(args[0])
+        if len(args) > 1:
+            request["limit"] = int(args[1])
+    return request
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class PlayerDaemon:
+    """
+    Плеер без терминала. Команды приходят строками по unix-сокету, на каждую - ответ строкой JSON
+    в порядке запросов; клиентов сколько угодно, каждого обслуживает своя задача asyncio.
+    Команды, которые ждут vlc (play, stop), выполняются в потоке по одной, остальные - сразу в цикле.
+    Клиенты, подписавшиеся командой watch, получают события плеера: смену состояния и названия песни.
+    """
+
+    def __init__(self, player, stations, switch_mode="cut", titles=None):
+        self.player = player
+        self.stations = stations
+        self.switch_mode = switch_mode
+        self.titles = titles  # NowPlaying: название песни играющей станции
+        self.playing = None  # (номер станции или None, название, адрес) последней запрошенной станции
+        self._previous = None  # что играло до нее: к этой станции возвращаемся, если новая не ответила
+        self.watchers = set()  # StreamWriter подписчиков на события
+        self.clients = 0
+        self.requests = 0
+        self._player_lock = threading.Lock()
+
+    async def serve(self, path):
+        """Слушает сокет path, пока задачу не отменят"""
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+                raise OSError(f"демон уже запущен: {path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(path)  # сокет остался от упавшего демона
+            finally:
+                probe.close()
+        server = await asyncio.start_unix_server(self._client, path)
+        os.chmod(path, 0o600)
+        loop = asyncio.get_running_loop()
+        # события плеера приходят через ту же шину, что будит интерфейс
+        loop.add_reader(self.player.bus.fileno(), self._broadcast)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            loop.remove_reader(self.player.bus.fileno())
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def execute(self, request: dict) -> dict:
+        """Выполняет команду; возвращает поля ответа, ошибка запроса - ValueError, KeyError или IndexError"""
+        command = request.get("cmd")
+        if command == "play":
+            return self._play(request)
+        if command == "stop":
+            with self._player_lock:
+                self.player.stop()
+                self.playing = None
+            if self.titles:
+                self.titles.follow(None)
+            return {"now": self.now()}
+        if command == "volume":
+            return {"volume": self._volume(request.get("value"))}
+        if command == "list":
+            offset = int(request.get("offset", 0))
+            limit = int(request.get("limit", LIST_LIMIT))
+            rows = range(max(offset, 0), min(offset + max(limit, 0), len(self.stations)))
+            return {"total": len(self.stations), "offset": rows.start,
+                    "stations": [list(self.stations[row]) for row in rows]}
+        if command == "now":
+            return {"now": self.now()}
+        if command == "watch":
+            return {"now": self.now()}
+        raise ValueError(f"неизвестная команда: {command}")
+
+    def now(self) -> dict:
+        """Что играет: станция, состояние потока, название песни, громкость"""
+        player = self.player
+        if not player.is_active():
+            state = "stopped"
+        elif player.error:
+            state = "error"
+        elif player.is_connecting():
+            state = "connecting"
+        else:
+            state = "playing"
+        index, name, url = self.playing or (None, None, None)
+        return {
+            "state": state,
+            "index": index,
+            "name": name,
+            "url": url,
+            "title": self.titles.title(url) if self.titles and url else None,
+            "volume": player.volume if player.volume is not None else DEFAULT_VOLUME,
+            "error": player.error,
+            "start_latency": player.start_latency,
+        }
+
+    def _play(self, request):
+        station = request.get("station")
+        index = None
+        if isinstance(station, int):
+            if not 0 <= station < len(self.stations):
+                raise IndexError(f"нет станции {station}")
+            index = station
+            name, url = self.stations[station]
+            url = primary_url(url)  # у станции с вариантами качества - лучший
+        elif isinstance(station, str) and station:
+            url = station
+            name = request.get("name") or url
+        else:
+            raise ValueError("не указана станция")
+        mode = request.get("mode", self.switch_mode)
+        if mode not in SWITCH_MODES:
+            raise ValueError(f"неизвестный способ смены станции: {mode}")
+        with self._player_lock:
+            switch_station(self.player, url, mode)
+            self._previous = self.playing if self.player.url != url else None
+            self.playing = (index, name, url)
+        if self.titles:
+            self.titles.follow(url)
+        return {"now": self.now()}
+
+    def _volume(self, value):
+        current = self.player.volume if self.player.volume is not None else DEFAULT_VOLUME
+        if value is None:
+            return current
+        if isinstance(value, str) and value[:1] in "+-":
+            volume = current + int(value)
+        else:
+            volume = int(value)
+        volume = min(max(volume, 0), VOLUME_MAX)
+        self.player.set_volume(volume)
+        return volume
+
+    async def _client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break  # обрыв или слишком длинная строка
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                request = {}
+                try:
+                    request = parse_request(line.decode("utf-8"))
+                    if request.get("cmd") in ("play", "stop"):
+                        result = await asyncio.to_thread(self.execute, request)
+                    else:
+                        result = self.execute(request)
+                    response = {"ok": True, **result}
+                except (ValueError, KeyError, IndexError, TypeError) as error:
+                    response = {"ok": False, "error": str(error)}
+                self.requests += 1
+                if "id" in request:
+                    response["id"] = request["id"]  # клиент может слать запросы, не дожидаясь ответов
+                writer.write(encode(response))
+                if request.get("cmd") == "watch" and response["ok"]:
+                    self.watchers.add(writer)
+                await writer.drain()
+        finally:
+            self.clients -= 1
+            self.watchers.discard(writer)
+            writer.close()
+
+    def _broadcast(self):
+        events = self.player.bus.drain()
+        player = self.player
+        if self._previous and player.error and player.url == self._previous[2] and player.pending is None:
+            # новая станция не ответила, играет прежняя
+            self.playing, self._previous = self._previous, None
+        if not self.watchers:
+            return
+        messages = []
+        for event in events:
+            if event.kind == STATE:
+                messages.append({"event": STATE, "now": self.now()})
+            elif event.kind == TITLE:
+                url, title = event.detail
+                if self.playing and url == self.playing[2]:
+                    messages.append({"event": TITLE, "url": url, "title": title})
+            elif isinstance(event.detail, (str, int, float, type(None))):
+                messages.append({"event": event.kind, "detail": event.detail})
+        data = b"".join(encode(message) for message in messages)
+        for writer in list(self.watchers):
+            if writer.transport.get_write_buffer_size() > WATCH_BUFFER:
+                # клиент не читает события - не копим их в памяти
+                self.watchers.discard(writer)
+                writer.close()
+            elif data:
+                writer.write(data)
@@ -0,0 +1,118 @@
+import collections
+import re
+import socket
+import threading
+import time
+
+# события плеера: вывод vlc и состояние потоков превращаются в события для интерфейса
+
+BUFFERING = "buffering"
+PLAYING = "playing"
+ERROR = "error"
+END = "end"
+STATE = "state"  # изменилось состояние плеера: переключение завершено, ошибка старта и т.п.
+HEALTH = "health"  # готов результат проверки доступности станции
+INDEX = "index"  # индекс поиска станций построен
+CATEGORIES = "categories"  # разобраны категории станций для вкладок
+IMPORT = "import"  # ход импорта станций из файла, detail "done" - импорт закончен
+TITLE = "title"  # станция сменила название «сейчас в эфире», detail - (url, название)
+RESIZE = "resize"  # терминал изменил размер
+TICK = "tick"  # сработал таймер цикла интерфейса
+DROP = "drop"  # играющий поток оборвался: процесс vlc вышел, поток кончился или замолчал; detail - причина
+
+PlayerEvent = collections.namedtuple("PlayerEvent", "kind detail time")
+
+VLC_PATTERNS = [
+    # строки rc-интерфейса
+    (re.compile(r"status change: \( play state: 3 \)"), PLAYING),
+    (re.compile(r"status change: \( stop state: \d+ \)"), END),
+    (re.compile(r"status change: \( new input: (.+?) \)"), BUFFERING),
+    # журнал vlc в stderr
+    (re.compile(r"Buffering (\d+)%"), BUFFERING),
+    (re.compile(r"(?:your input can't be opened|unable to open the MRL|cannot connect|connection failed)",
+                re.IGNORECASE), ERROR),
+    (re.compile(r"(?:end of stream|EOF reached)", re.IGNORECASE), END),
+]
+
+
+def parse_vlc_line(line: str):
+    """Разбирает строку вывода vlc; возвращает (вид события, подробность) или None"""
+    for pattern, kind in VLC_PATTERNS:
+        match = pattern.search(line)
+        if match:
+            detail = match.group(1) if match.groups() else line.strip()
+            if kind == BUFFERING and detail.isdigit():
+                detail = int(detail)
+            return kind, detail
+    return None
+
+
+class EventBus:
+    """
+    Очередь событий для интерфейса. Публиковать можно из любого потока;
+    интерфейс ждет события через fileno() вместе с клавиатурой, без опроса по таймеру.
+    """
+
+    def __init__(self):
+        self._events = collections.deque(maxlen=1000)
+        self._subscribers = []
+        # пара сокетов, а не pipe: select по сокетам работает и в Windows
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self):
+        return self._reader.fileno()
+
+    def subscribe(self, callback):
+        """callback(event) вызывается в потоке, опубликовавшем событие"""
+        self._subscribers.append(callback)
+
+    def publish(self, kind, detail=None):
+        event = PlayerEvent(kind, detail, time.monotonic())
+        self._events.append(event)
+        for callback in self._subscribers:
+            callback(event)
+        try:
+            self._writer.send(b"\0")
+        except OSError:
+            pass  # буфер сокета полон - интерфейс и так будет разбужен
+
+    def drain(self):
+        """Забирает все накопившиеся события"""
+        try:
+            while self._reader.recv(4096):
+                pass
+        except OSError:
+            pass
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def close(self):
+        self._reader.close()
+        self._writer.close()
+
+
+class OutputDrain:
+    """
+    Постоянно вычитывает stdout и stderr процесса vlc в фоновых потоках, чтобы буфер pipe не переполнился
+    и плеер не остановился. Последние строки хранятся в кольцевом буфере, распознанные - передаются в on_event.
+    """
+
+    def __init__(self, process, on_event, max_lines=200):
+        self.lines = collections.deque(maxlen=max_lines)
+        self.on_event = on_event
+        for pipe in (process.stdout, process.stderr):
+            if pipe is not None:
+                threading.Thread(target=self._drain, args=(pipe,), daemon=True).start()
+
+    def _drain(self, pipe):
+        with pipe:
+            for raw in iter(pipe.readline, b""):
+                line = raw.decode(errors="replace").rstrip()
+                self.lines.append(line)
+                parsed = parse_vlc_line(line)
+                if parsed:
+                    self.on_event(*parsed)
@@ -0,0 +1,202 @@
+import asyncio
+import collections
+import json
+import os
+import re
+import ssl
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+from player.events import HEALTH
+from player.stream import USER_AGENT, MAX_REDIRECTS, REDIRECT_CODES
+
+# проверка доступности потоков всех станций: параллельно, с ограничением числа подключений
+
+BITRATE_INFO = re.compile(r"(?:^|;)\s*(?:ice-)?bitrate=(\d+)", re.IGNORECASE)
+
+
+def parse_head(head: bytes):
+    """Разбирает строку статуса и заголовки ответа HTTP или Shoutcast (`ICY 200 OK`)"""
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status_line = lines[0].split(None, 2)
+    if len(status_line) < 2 or not status_line[1].isdigit():
+        raise ValueError(f"некорректный ответ: {lines[0][:60]}")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return int(status_line[1]), headers
+
+
+def bitrate_from_headers(headers):
+    """Битрейт в кбит/с из icy-br или ice-audio-info"""
+    value = headers.get("icy-br", "").split(",")[0].strip()
+    if value.isdigit():
+        return int(value)
+    match = BITRATE_INFO.search(headers.get("ice-audio-info", ""))
+    return int(match.group(1)) if match else None
+
+
+async def probe(url: str, timeout: float = 8.0) -> dict:
+    """
+    Подключается к потоку станции и ждет первый байт данных.
+    Возвращает результат для кэша: ok, status, error, ttfb (сек), content_type, bitrate (кбит/с), checked_at.
+    """
+    result = {"ok": False, "status": None, "error": None, "ttfb": None,
+              "content_type": None, "bitrate": None, "checked_at": time.time()}
+    started = time.monotonic()
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise ValueError(f"неподдерживаемая схема: {parts.scheme}")
+            if not parts.hostname:
+                raise ValueError("в адресе нет сервера")
+            secure = parts.scheme == "https"
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                parts.hostname, parts.port or (443 if secure else 80),
+                ssl=ssl.create_default_context() if secure else None), timeout)
+            try:
+                path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+                writer.write((f"GET {path} HTTP/1.0\r\nHost: {parts.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                              f"Icy-MetaData: 0\r\nConnection: close\r\n\r\n").encode())
+                await writer.drain()
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+                status, headers = parse_head(head)
+                result["status"] = status
+                if status in REDIRECT_CODES and headers.get("location"):
+                    url = urljoin(url, headers["location"])
+                    continue
+                result["content_type"] = headers.get("content-type")
+                result["bitrate"] = bitrate_from_headers(headers)
+                if status != 200:
+                    result["error"] = f"HTTP {status}"
+                    return result
+                if not await asyncio.wait_for(reader.read(1), timeout):
+                    result["error"] = "пустой ответ"
+                    return result
+                result["ttfb"] = time.monotonic() - started
+                result["ok"] = True
+                return result
+            finally:
+                writer.close()
+        result["error"] = "слишком много перенаправлений"
+    except asyncio.TimeoutError:
+        result["error"] = "таймаут"
+    except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+async def check_urls(urls, concurrency: int = 20, per_host: int = 2, timeout: float = 8.0, on_result=None):
+    """
+    Проверяет все urls одновременно: не больше concurrency подключений всего и per_host к одному серверу.
+    on_result(url, result) вызывается по мере готовности. Возвращает словарь url -> результат.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    host_limits = collections.defaultdict(lambda: asyncio.Semaphore(per_host))
+    results = {}
+
+    async def check(url):
+        async with host_limits[urlsplit(url).hostname], limit:
+            results[url] = await probe(url, timeout)
+        if on_result is not None:
+            on_result(url, results[url])
+
+    await asyncio.gather(*(check(url) for url in dict.fromkeys(urls)))
+    return results
+
+
+class HealthCache:
+    """Результаты проверок в JSON-файле; результат старше ttl сек считается устаревшим"""
+
+    def __init__(self, path, ttl: float = 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self.results = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as file:
+                self.results = json.load(file)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, url):
+        return self.results.get(url)
+
+    def is_fresh(self, url, now=None) -> bool:
+        result = self.results.get(url)
+        now = time.time() if now is None else now
+        return result is not None and now - result["checked_at"] < self.ttl
+
+    def stale(self, urls, now=None):
+        """Адреса без свежего результата проверки"""
+        return [url for url in dict.fromkeys(urls) if not self.is_fresh(url, now)]
+
+    def update(self, url, result):
+        with self._lock:
+            self.results[url] = result
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.results, ensure_ascii=False)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(temp_path, self.path)
+
+
+class HealthMonitor:
+    """Фоновая проверка станций для интерфейса: asyncio-цикл в отдельном потоке, результаты сразу в кэш"""
+
+    def __init__(self, cache, bus=None, **options):
+        self.cache = cache
+        self.bus = bus  # шина событий интерфейса: каждый результат будит перерисовку списка
+        self.options = options
+        self.version = 0  # увеличивается с каждым новым результатом
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._running > 0
+
+    def start(self, urls, force=False):
+        """
+        Запускает проверку адресов без свежего результата (или всех при force).
+        urls может быть генератором: отбор адресов тоже идет в фоновом потоке.
+        """
+        with self._lock:
+            self._running += 1
+        threading.Thread(target=self._run, args=(urls, force), daemon=True).start()
+
+    def badge(self, url) -> str:
+        """Значок доступности станции для списка"""
+        result = self.cache.get(url)
+        if result is None:
+            return " "
+        return "●" if result["ok"] else "✗"
+
+    def _run(self, urls, force):
+        try:
+            urls = list(dict.fromkeys(urls)) if force else self.cache.stale(urls)
+            if urls:
+                asyncio.run(check_urls(urls, on_result=self._on_result, **self.options))
+                self.cache.save()
+        except OSError:
+            pass  # кэш не удалось записать, результаты остаются в памяти
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._changed()
+
+    def _on_result(self, url, result):
+        self.cache.update(url, result)
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        if self.bus is not None:
+            self.bus.publish(HEALTH)
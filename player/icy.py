@@ -0,0 +1,269 @@
+import asyncio
+import re
+import ssl
+import threading
+from urllib.parse import urljoin, urlsplit
+
+from player.aioloop import background_loop, submit
+from player.events import TITLE
+from player.health import parse_head
+from player.stream import USER_AGENT, MAX_REDIRECTS, REDIRECT_CODES
+
+# названия «сейчас в эфире» из метаданных Shoutcast/Icecast, без декодирования звука
+
+STREAM_TITLE = re.compile(rb"StreamTitle='(.*?)';", re.DOTALL)
+SCRATCH_SIZE = 16384  # сокет пишет сюда; звук в буфере просто перезаписывается следующим блоком
+MAX_HEAD = 16384
+
+
+def decode_title(raw: bytes) -> str:
+    """Станции пишут названия в utf-8 или cp1251"""
+    for encoding in ("utf-8", "cp1251"):
+        try:
+            return raw.decode(encoding).strip()
+        except UnicodeDecodeError:
+            pass
+    return raw.decode("latin-1").strip()
+
+
+class IcyProtocol(asyncio.BufferedProtocol):
+    """
+    Разбор потока с icy-metaint: после каждых metaint байт звука идет байт длины L и L*16 байт метаданных.
+    Сокет пишет прямо в заранее выделенные буферы, на блоки звука память не выделяется.
+    """
+
+    def __init__(self, on_title):
+        loop = asyncio.get_running_loop()
+        self.on_title = on_title
+        self.scratch = memoryview(bytearray(SCRATCH_SIZE))
+        self.meta = bytearray(255 * 16)
+        self.head = bytearray()
+        self.headers_ready = loop.create_future()  # (статус, заголовки) или None, если соединение оборвалось
+        self.lost = loop.create_future()
+        self.error = None
+        self.metaint = 0
+        self.state = "head"  # head, audio, length, meta
+        self.left = 0  # сколько байт осталось в текущем состоянии
+        self.filled = 0  # сколько байт метаданных уже получено
+        self.title = None
+        self.bytes_read = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        return self.scratch
+
+    def buffer_updated(self, nbytes):
+        self.bytes_read += nbytes
+        self._feed(self.scratch[:nbytes])
+
+    def connection_lost(self, exc):
+        if exc is not None and self.error is None:
+            self.error = str(exc) or type(exc).__name__
+        if not self.headers_ready.done():
+            self.headers_ready.set_result(None)
+        if not self.lost.done():
+            self.lost.set_result(None)
+
+    def _feed(self, data):
+        position = 0
+        size = len(data)
+        while position < size:
+            if self.state == "audio":
+                # звук не нужен: просто отсчитываем metaint байт
+                step = min(self.left, size - position)
+                self.left -= step
+                position += step
+                if self.left == 0:
+                    self.state = "length"
+            elif self.state == "length":
+                self.left = data[position] * 16
+                self.filled = 0
+                position += 1
+                if self.left:
+                    self.state = "meta"
+                else:
+                    self.state, self.left = "audio", self.metaint
+            elif self.state == "meta":
+                step = min(self.left, size - position)
+                self.meta[self.filled:self.filled + step] = data[position:position + step]
+                self.filled += step
+                self.left -= step
+                position += step
+                if self.left == 0:
+                    self._parse_meta()
+                    self.state, self.left = "audio", self.metaint
+            else:
+                position = self._feed_head(data, position)
+
+    def _feed_head(self, data, position):
+        # заголовки разбираются один раз за подключение
+        start = max(len(self.head) - 3, 0)
+        self.head += data[position:]
+        end = self.head.find(b"\r\n\r\n", start)
+        if end < 0:
+            if len(self.head) > MAX_HEAD:
+                self._fail("слишком длинные заголовки")
+            return len(data)
+        rest = len(self.head) - end - 4  # начало тела, пришедшее вместе с заголовками
+        del self.head[end + 4:]
+        try:
+            status, headers = parse_head(bytes(self.head))
+        except ValueError as e:
+            self._fail(str(e))
+            return len(data)
+        metaint = headers.get("icy-metaint", "")
+        self.headers_ready.set_result((status, headers))
+        if status != 200 or not metaint.isdigit() or int(metaint) <= 0:
+            # перенаправление, ошибка или станция без метаданных - решает IcyReader
+            self.state = "done"
+            self.transport.close()
+            return len(data)
+        self.metaint = int(metaint)
+        self.state, self.left = "audio", self.metaint
+        return len(data) - rest
+
+    def _parse_meta(self):
+        match = STREAM_TITLE.search(self.meta, 0, self.filled)
+        if match is None:
+            return
+        title = decode_title(match.group(1))
+        if title != self.title:
+            self.title = title
+            self.on_title(title)
+
+    def _fail(self, error):
+        self.error = error
+        self.state = "done"
+        self.transport.close()
+
+
+class IcyReader:
+    """
+    Читает названия песен одной станции в фоновом asyncio-цикле, переподключается при обрыве.
+    on_title(url, title) вызывается в потоке цикла при каждой смене названия.
+    """
+    min_backoff = 1.0
+    max_backoff = 60.0
+
+    def __init__(self, url, on_title, timeout: float = 10.0):
+        self.url = url
+        self.on_title = on_title
+        self.timeout = timeout
+        self.title = None
+        self.error = None
+        self.has_metadata = None  # None - еще неизвестно
+        self.bytes_read = 0
+        self._task = None
+
+    def start(self):
+        self._task = submit(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            background_loop().call_soon_threadsafe(self._task.cancel)
+
+    async def _run(self):
+        backoff = self.min_backoff
+        while True:
+            try:
+                await self._read()
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                self.error = str(e) or type(e).__name__
+            if self.has_metadata is False:
+                return  # станция не передает названия, переподключаться незачем
+            if self.error is None:
+                backoff = self.min_backoff  # соединение работало, обрыв случайный
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _read(self):
+        loop = asyncio.get_running_loop()
+        url = self.url
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https"):
+                raise ValueError(f"неподдерживаемая схема: {parts.scheme}")
+            secure = parts.scheme == "https"
+            transport, protocol = await asyncio.wait_for(loop.create_connection(
+                lambda: IcyProtocol(self._title_changed),
+                parts.hostname, parts.port or (443 if secure else 80),
+                ssl=ssl.create_default_context() if secure else None), self.timeout)
+            try:
+                path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+                transport.write((f"GET {path} HTTP/1.0\r\nHost: {parts.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                                 f"Icy-MetaData: 1\r\n\r\n").encode())
+                answer = await asyncio.wait_for(asyncio.shield(protocol.headers_ready), self.timeout)
+                if answer is None:
+                    raise ConnectionError(protocol.error or "соединение закрыто")
+                status, headers = answer
+                if status in REDIRECT_CODES and headers.get("location"):
+                    url = urljoin(url, headers["location"])
+                    continue
+                if status != 200:
+                    raise OSError(f"HTTP {status}")
+                self.has_metadata = protocol.metaint > 0
+                if not self.has_metadata:
+                    self.error = "станция не передает названия"
+                    return
+                self.error = None
+                # названия приходят через _title_changed, пока соединение живо
+                await protocol.lost
+                return
+            finally:
+                self.bytes_read += protocol.bytes_read
+                transport.close()
+        raise OSError("слишком много перенаправлений")
+
+    def _title_changed(self, title):
+        self.title = title
+        self.on_title(self.url, title)
+
+
+class NowPlaying:
+    """
+    Названия «сейчас в эфире» для одной или многих станций.
+    Смена названия публикуется в шину событий интерфейса как событие TITLE с (url, название).
+    """
+
+    def __init__(self, bus=None, on_title=None):
+        self.bus = bus
+        self.on_title = on_title
+        self.readers = {}
+        self._lock = threading.Lock()
+
+    def title(self, url):
+        reader = self.readers.get(url)
+        return reader.title if reader is not None else None
+
+    def watch(self, url):
+        with self._lock:
+            if url not in self.readers:
+                reader = IcyReader(url, self._title_changed)
+                self.readers[url] = reader
+                reader.start()
+
+    def unwatch(self, url):
+        with self._lock:
+            reader = self.readers.pop(url, None)
+        if reader is not None:
+            reader.stop()
+
+    def follow(self, url):
+        """Читать названия только станции url (None - ни одной)"""
+        for other in list(self.readers):
+            if other != url:
+                self.unwatch(other)
+        if url is not None:
+            self.watch(url)
+
+    def close(self):
+        self.follow(None)
+
+    def _title_changed(self, url, title):
+        if self.on_title is not None:
+            self.on_title(url, title)
+        if self.bus is not None:
+            self.bus.publish(TITLE, (url, title))
@@ -0,0 +1,233 @@
+import collections
+import threading
+import time
+
+from player.stream import is_audio, open_stream, stream_bitrate
+
+# предзагрузка станций рядом с курсором: DNS, соединение и начало потока готовы до нажатия Enter
+
+CHUNK_SIZE = 16384
+
+
+class PrefetchEntry:
+    """Заранее открытое соединение со станцией и накопленное начало потока"""
+
+    def __init__(self, url):
+        self.origin_url = url
+        self.buffer = bytearray()
+        self.response = None
+        self.content_type = None
+        self.state = "waiting"  # waiting, connecting, ready, failed
+        self.paused_at = None  # когда буфер заполнен и чтение приостановлено
+        self.cancelled = threading.Event()
+        self.taken = threading.Event()  # поток передан плееру
+        self.enough = threading.Event()  # станция больше не рядом с курсором, буфер не пополняем
+        self.fetched = threading.Event()  # поток предзагрузки больше не читает соединение
+
+    def chunks(self):
+        """Сначала накопленный буфер, затем продолжение потока из того же соединения"""
+        # соединение читает поток предзагрузки, дожидаемся, пока он отдаст его
+        self.fetched.wait()
+        if self.buffer:
+            data, self.buffer = bytes(self.buffer), bytearray()
+            yield data
+        while not self.cancelled.is_set():
+            data = self.response.read1(CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+
+    def close(self):
+        self.cancelled.set()
+        if self.response is not None:
+            self.response.close()
+
+
+class PrefetchPool:
+    """
+    Ограниченный пул предзагрузки с вытеснением давно не нужных станций (LRU).
+    max_entries - сколько станций держать готовыми, max_connections - сколько подключений идет одновременно,
+    max_bytes - сколько байт всех буферов держать в памяти. Готовый буфер старше max_age сек считается устаревшим.
+    estimator (VariantSelector) получает замер скорости каждой загрузки,
+    через resolver (StreamResolver) станции открываются сразу по итоговому адресу потока.
+    """
+
+    def __init__(self, relay, max_entries=6, max_connections=3, max_bytes=1536 * 1024,
+                 entry_bytes=128 * 1024, ready_bytes=16 * 1024, max_age=20.0, rest_delay=0.3, timeout=5.0,
+                 estimator=None, resolver=None):
+        self.relay = relay
+        self.estimator = estimator
+        self.resolver = resolver
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entry_bytes = entry_bytes
+        self.ready_bytes = ready_bytes  # сколько байт достаточно, чтобы звук начался сразу
+        self.max_age = max_age
+        self.rest_delay = rest_delay
+        self.timeout = timeout
+        self.entries = collections.OrderedDict()  # url -> PrefetchEntry, в конце - нужные недавно
+        self.bytes_held = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.cancellations = 0
+        self.failures = 0  # станции, которые не ответили или оборвали поток при предзагрузке
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def want(self, urls):
+        """Курсор остановился на строке: предзагрузить urls (по убыванию важности) после паузы rest_delay"""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.rest_delay, self.prefetch, args=(list(urls),))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def prefetch(self, urls):
+        with self._lock:
+            wanted = set(urls)
+            # незавершенные загрузки для строк, с которых курсор ушел, отменяем
+            for url, entry in list(self.entries.items()):
+                if url in wanted:
+                    continue
+                if entry.state in ("waiting", "connecting"):
+                    self._drop(url)
+                    self.cancellations += 1
+                else:
+                    # готовый буфер остается в пуле, но подключение освобождается для новых станций
+                    entry.enough.set()
+            for url in reversed(urls):
+                entry = self.entries.get(url)
+                if entry is not None and (entry.state == "failed" or self._is_stale(entry)):
+                    self._drop(url)
+                    entry = None
+                if entry is None:
+                    entry = PrefetchEntry(url)
+                    self.entries[url] = entry
+                    threading.Thread(target=self._fetch, args=(entry,), daemon=True).start()
+                self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def source_url(self, url: str) -> str:
+        """Адрес для плеера: при попадании - локальный ретранслятор с готовым буфером, иначе исходный url"""
+        entry = self.take(url)
+        return self.relay.publish(entry) if entry is not None else url
+
+    def take(self, url: str):
+        """Готовое соединение станции с накопленным буфером (PrefetchEntry) или None при промахе"""
+        with self._lock:
+            entry = self.entries.get(url)
+            if entry is None or entry.state != "ready" or self._is_stale(entry):
+                self.misses += 1
+                if entry is not None:
+                    # плеер подключится сам, незаконченная предзагрузка больше не нужна
+                    self._drop(url)
+                return None
+            del self.entries[url]
+            self.bytes_held -= len(entry.buffer)
+            self.hits += 1
+            entry.taken.set()
+        return entry
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "cancellations": self.cancellations,
+            "failures": self.failures,
+            "entries": len(self.entries),
+            "bytes_held": self.bytes_held,
+        }
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        with self._lock:
+            for url in list(self.entries):
+                self._drop(url)
+        self.relay.close()
+
+    def _is_stale(self, entry) -> bool:
+        return entry.paused_at is not None and time.monotonic() - entry.paused_at > self.max_age
+
+    def _drop(self, url):
+        entry = self.entries.pop(url)
+        self.bytes_held -= len(entry.buffer)
+        entry.close()
+
+    def _store(self, entry, data) -> bool:
+        """Добавляет data в буфер entry, при нехватке места вытесняет давние готовые буферы"""
+        with self._lock:
+            if entry.taken.is_set():
+                # буфер уже у ретранслятора и в пуле не учитывается, прочитанное терять нельзя
+                entry.buffer += data
+                return False
+            if entry.cancelled.is_set():
+                return False
+            for url, other in list(self.entries.items()):
+                if self.bytes_held + len(data) <= self.max_bytes:
+                    break
+                if other is not entry and other.state == "ready":
+                    self._drop(url)
+                    self.evictions += 1
+            if self.bytes_held + len(data) > self.max_bytes:
+                return False
+            entry.buffer += data
+            self.bytes_held += len(data)
+            return True
+
+    def _fetch(self, entry):
+        # ждем свободное подключение, пока загрузка не отменена
+        while not self._slots.acquire(timeout=0.1):
+            if entry.cancelled.is_set():
+                entry.fetched.set()
+                return
+        try:
+            if entry.cancelled.is_set():
+                return
+            entry.state = "connecting"
+            opener = self.resolver.open if self.resolver is not None else open_stream
+            _, entry.response = opener(entry.origin_url, self.timeout)
+            if entry.cancelled.is_set():
+                entry.close()
+                return
+            entry.content_type = entry.response.getheader("Content-Type")
+            if not is_audio(entry.content_type):
+                raise OSError(f"не аудиопоток: {entry.content_type}")
+            started, received = None, 0  # скорость меряется от первого куска: без подключения и ответа сервера
+            while len(entry.buffer) < self.entry_bytes and not (entry.taken.is_set() or entry.enough.is_set()):
+                data = entry.response.read1(CHUNK_SIZE)
+                if not data:
+                    raise OSError("поток оборвался")
+                if started is None:
+                    started = time.monotonic()
+                else:
+                    received += len(data)
+                if not self._store(entry, data):
+                    break
+                if len(entry.buffer) >= self.ready_bytes:
+                    entry.state = "ready"
+            if self.estimator is not None and started is not None:
+                self.estimator.sample(entry.origin_url, received, time.monotonic() - started,
+                                      stream_bitrate(entry.response))
+            # дальше не читаем: соединение остается открытым до нажатия Enter
+            entry.paused_at = time.monotonic()
+            entry.state = "ready"
+        except Exception:
+            # ошибка сети, HTTP или соединение закрыто из другого потока при отмене
+            entry.state = "failed"
+            with self._lock:
+                # недоступная станция не занимает место и бюджет байт живых
+                if self.entries.get(entry.origin_url) is entry:
+                    self._drop(entry.origin_url)
+                    self.failures += 1
+            entry.close()
+        finally:
+            self._slots.release()
+            entry.fetched.set()
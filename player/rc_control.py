@@ -0,0 +1,135 @@
+import asyncio
+import concurrent.futures
+import queue
+import re
+
+from player.aioloop import background_loop, submit
+from player.backends import RC_HOST, RC_PORT
+
+# постоянное соединение с rc-интерфейсом VLC вместо подключения на каждое нажатие клавиши
+
+RC_ANSWER = re.compile(r"^(?:> )*(\d+)\s*$")
+
+
+class RcClient:
+    """
+    Клиент rc-интерфейса VLC: одно соединение на все время работы процесса vlc,
+    переподключение при обрыве. Работает в фоновом asyncio-цикле, вызовы из интерфейса не ждут сеть.
+    Серия изменений громкости сливается в одну команду с последним значением.
+    """
+    min_backoff = 0.05
+    max_backoff = 1.0
+
+    def __init__(self, port: int = RC_PORT, host: str = RC_HOST, on_line=None):
+        self.host = host
+        self.port = port
+        self.on_line = on_line  # вызывается для строк вывода, не являющихся ответом на запрос
+        self.connected = False
+        self.commands_sent = 0
+        self.last_volume_sent = None
+        self._volume = None  # последнее запрошенное значение, еще не отправленное
+        self._queries = queue.SimpleQueue()  # (команда, concurrent.futures.Future); пишут потоки интерфейса
+        self._closed = False
+        self._loop = background_loop()
+        self._wake = None
+        self._task = submit(self._run())
+
+    def set_volume(self, volume: int):
+        """Запоминает громкость и будит отправку; не блокирует"""
+        self._volume = volume
+        self._notify()
+
+    def query(self, command: str, timeout: float = 0.5):
+        """Выполняет команду с числовым ответом (например is_playing); None, если ответа нет"""
+        future = concurrent.futures.Future()
+        self._queries.put((command, future))
+        self._notify()
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            return None
+
+    def close(self):
+        self._closed = True
+        self._notify()
+
+    def _notify(self):
+        self._loop.call_soon_threadsafe(self._wake_up)
+
+    def _wake_up(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        self._wake = asyncio.Event()
+        backoff = self.min_backoff
+        while not self._closed:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                # vlc еще запускается или rc-интерфейс упал - пробуем снова с нарастающей паузой
+                self._fail_queries()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.min_backoff
+            self.connected = True
+            answers = asyncio.Queue()
+            reading = asyncio.ensure_future(self._read_answers(reader, answers))
+            try:
+                await self._serve(writer, answers, reading)
+            except (OSError, asyncio.TimeoutError):
+                pass
+            finally:
+                self.connected = False
+                reading.cancel()
+                writer.close()
+        self._fail_queries()
+
+    async def _serve(self, writer, answers, reading):
+        while not self._closed and not reading.done():
+            # не запускаем команды, пока не разбудили: нажатие клавиши, запрос или закрытие
+            self._wake.clear()
+            if self._volume is not None:
+                volume, self._volume = self._volume, None
+                writer.write(f"volume {volume}\n".encode())
+                await writer.drain()
+                self.commands_sent += 1
+                self.last_volume_sent = volume
+            while not self._queries.empty():
+                command, future = self._queries.get_nowait()
+                # ответы на прежние команды больше никому не нужны
+                while not answers.empty():
+                    answers.get_nowait()
+                writer.write(f"{command}\n".encode())
+                await writer.drain()
+                self.commands_sent += 1
+                try:
+                    answer = await asyncio.wait_for(answers.get(), 0.5)
+                except asyncio.TimeoutError:
+                    answer = None
+                if not future.done():
+                    future.set_result(answer)
+            if self._volume is None and self._queries.empty():
+                waiting = asyncio.ensure_future(self._wake.wait())
+                await asyncio.wait((waiting, reading), return_when=asyncio.FIRST_COMPLETED)
+                waiting.cancel()
+
+    async def _read_answers(self, reader, answers):
+        # вывод vlc читается постоянно, иначе буфер сокета переполнится
+        while True:
+            line = await reader.readline()
+            if not line:
+                return  # vlc закрыл соединение
+            text = line.decode(errors="replace").strip()
+            match = RC_ANSWER.match(text)
+            if match:
+                answers.put_nowait(int(match.group(1)))
+            elif self.on_line is not None:
+                self.on_line(text)
+
+    def _fail_queries(self):
+        while not self._queries.empty():
+            command, future = self._queries.get_nowait()
+            if not future.done():
+                future.set_result(None)
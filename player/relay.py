@@ -0,0 +1,74 @@
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from player import trace
+
+# локальный ретранслятор: VLC получает через 127.0.0.1 поток, уже открытый программой
+
+
+class LocalRelay:
+    """
+    HTTP-сервер на 127.0.0.1. Источник публикуется один раз и отдается первому подключению VLC,
+    после чего забывается: повторный запрос по тому же адресу получает 404, оборванный поток
+    переподключает сторож обрывов (player/watchdog.py). Источник - объект с content_type, chunks() и close().
+    """
+
+    def __init__(self):
+        self.sources = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.httpd = None
+
+    def publish(self, source) -> str:
+        """Возвращает локальный url, по которому VLC получит поток источника"""
+        with self._lock:
+            if self.httpd is None:
+                self._start()
+            token = f"s{next(self._ids)}"
+            self.sources[token] = source
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/{token}"
+
+    def close(self):
+        with self._lock:
+            for source in self.sources.values():
+                source.close()
+            self.sources.clear()
+            if self.httpd is not None:
+                self.httpd.shutdown()
+                self.httpd.server_close()
+                self.httpd = None
+
+    def _take(self, token):
+        with self._lock:
+            return self.sources.pop(token, None)
+
+    def _start(self):
+        relay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def do_GET(self):
+                source = relay._take(self.path.lstrip("/"))
+                if source is None:
+                    self.send_error(404)
+                    return
+                trace.mark("ретранслятор")  # VLC пришел за потоком, буфер уже готов
+                self.send_response(200)
+                self.send_header("Content-Type", source.content_type or "application/octet-stream")
+                self.end_headers()
+                try:
+                    for chunk in source.chunks():
+                        self.wfile.write(chunk)
+                except Exception:
+                    pass  # VLC закрыл соединение, станция оборвала поток или источник закрыт
+                finally:
+                    source.close()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
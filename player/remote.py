@@ -0,0 +1,121 @@
+import json
+import socket
+import threading
+
+from player.events import STATE, TITLE
+
+# клиенты демона (atradio serve): запросы из скриптов и плеер для интерфейса
+
+
+class DaemonClient:
+    """Соединение с демоном: запрос строкой JSON, ответ - строкой JSON; ошибка команды - ValueError"""
+
+    def __init__(self, path, timeout: float = 10.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, command, **fields) -> dict:
+        self.send(command, **fields)
+        return self.receive()
+
+    def send(self, command, **fields):
+        self.file.write(json.dumps({"cmd": command, **fields}, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.file.flush()
+
+    def receive(self) -> dict:
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("демон закрыл соединение")
+        response = json.loads(line)
+        if response.get("ok") is False:
+            raise ValueError(response.get("error"))
+        return response
+
+    def close(self):
+        try:
+            self.file.close()
+        finally:
+            self.sock.close()
+
+
+class RemotePlayer:
+    """
+    Плеер демона с теми же методами и полями, что у бэкендов (Player): интерфейс работает с ним как с обычным.
+    Команды уходят запросами по сокету; состояние приходит событиями второго соединения (watch)
+    и, как у бэкендов, публикуется в шину интерфейса. Закрытие клиента не останавливает музыку в демоне.
+    """
+    name = "remote"
+
+    def __init__(self, path, bus):
+        self.bus = bus
+        self.url = None
+        self.volume = None
+        self.error = None
+        self.start_latency = None
+        self.last_event = None
+        self.state = "stopped"
+        self.index = None  # номер станции в списке демона
+        self.now_title = None  # название песни по данным демона
+        self.client = DaemonClient(path)
+        self._events = DaemonClient(path, timeout=None)
+        self._update(self._events.request("watch")["now"])
+        threading.Thread(target=self._listen, name="atradio-remote", daemon=True).start()
+
+    def play(self, url: str):
+        self._update(self.client.request("play", station=url, mode="stop")["now"])
+
+    def switch(self, url: str, crossfade: float = 0.0):
+        self._update(self.client.request("play", station=url, mode="crossfade" if crossfade > 0 else "cut")["now"])
+
+    def stop(self):
+        self._update(self.client.request("stop")["now"])
+
+    def set_volume(self, volume: int):
+        self.volume = self.client.request("volume", value=volume)["volume"]
+
+    def is_active(self) -> bool:
+        return self.state != "stopped"
+
+    def is_connecting(self) -> bool:
+        return self.state == "connecting"
+
+    def title(self, url):
+        """Название песни, как у NowPlaying: интерфейс берет его у демона, а не читает поток сам"""
+        return self.now_title if url == self.url else None
+
+    def follow(self, url):
+        pass  # демон следит за играющей станцией сам
+
+    def close(self):
+        self.client.close()
+        self._events.sock.shutdown(socket.SHUT_RDWR)
+        self._events.close()
+
+    def _update(self, now):
+        self.state = now["state"]
+        self.url = now["url"]
+        self.volume = now["volume"]
+        self.error = now["error"]
+        self.start_latency = now["start_latency"]
+        self.index = now["index"]
+        self.now_title = now["title"]
+
+    def _listen(self):
+        while True:
+            try:
+                message = self._events.receive()
+            except (OSError, ValueError):
+                return  # клиент закрыт или демон остановлен
+            kind = message.get("event")
+            if kind == STATE:
+                self._update(message["now"])
+                self.last_event = None
+                self.bus.publish(STATE)
+            elif kind == TITLE:
+                self.now_title = message["title"]
+                self.bus.publish(TITLE, (message["url"], message["title"]))
+            elif kind:
+                self.last_event = (kind, message.get("detail"))
+                self.bus.publish(kind, message.get("detail"))
@@ -0,0 +1,193 @@
+import os
+import re
+import threading
+import time
+
+# разбор адресов станций: плейлисты (.pls, .m3u, мастер-плейлисты HLS) и перенаправления проходятся один раз,
+# итоговый адрес потока и IP его сервера хранятся на диске. Кэш нужен автопроигрыванию до первого кадра,
+# поэтому сетевые модули и json загружаются при первом обращении
+
+PLAYLIST_TYPES = {
+    "audio/x-scpls": "pls",
+    "audio/scpls": "pls",
+    "audio/x-mpegurl": "m3u",
+    "audio/mpegurl": "m3u",
+    "application/x-mpegurl": "m3u",
+    "application/vnd.apple.mpegurl": "m3u",
+}
+PLAYLIST_EXTENSIONS = {".pls": "pls", ".m3u": "m3u", ".m3u8": "m3u"}
+MAX_PLAYLISTS = 4  # плейлист может ссылаться на плейлист
+PLAYLIST_LIMIT = 256 * 1024  # байт плейлиста, дальше не читаем
+HLS_MEDIA = ("#EXT-X-TARGETDURATION", "#EXT-X-MEDIA-SEQUENCE")
+
+
+def playlist_kind(url: str, content_type):
+    """'pls' или 'm3u' по типу ответа или расширению адреса; None - не плейлист"""
+    kind = PLAYLIST_TYPES.get((content_type or "").split(";")[0].strip().lower())
+    if kind:
+        return kind
+    path = re.split(r"[?#]", url, maxsplit=1)[0].lower()
+    return next((kind for extension, kind in PLAYLIST_EXTENSIONS.items() if path.endswith(extension)), None)
+
+
+def playlist_target(kind: str, text: str, base: str):
+    """
+    Адрес, на который ведет плейлист: первый поток .pls и .m3u, первый вариант мастер-плейлиста HLS
+    (с него начинает любой плеер HLS). None - ссылок нет или это медиаплейлист HLS: сегменты читает плеер.
+    """
+    from urllib.parse import urljoin
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if kind == "pls":
+        files = [line.split("=", 1)[1].strip() for line in lines if line.lower().startswith("file") and "=" in line]
+        return urljoin(base, files[0]) if files else None
+    if any(line.startswith(HLS_MEDIA) for line in lines):
+        return None
+    if any(line.startswith("#EXT-X-STREAM-INF") for line in lines):
+        variants = [following for line, following in zip(lines, lines[1:])
+                    if line.startswith("#EXT-X-STREAM-INF") and not following.startswith("#")]
+        return urljoin(base, variants[0]) if variants else None
+    return next((urljoin(base, line) for line in lines if not line.startswith("#")), None)
+
+
+class StreamResolver:
+    """
+    Кэш итоговых адресов: url станции -> адрес потока после плейлистов и перенаправлений и IP его сервера.
+    Записи хранятся в JSON-файле path; запись старше ttl сек не используется, при ошибке подключения
+    удаляется, и адрес разбирается заново.
+    """
+
+    def __init__(self, path=None, ttl: float = 6 * 3600.0, timeout: float = 5.0):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.entries = None  # url -> {"endpoint", "address", "resolved_at"}; файл читается при первом обращении
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self._changed = False
+        self._pending = set()  # адреса, которые разбираются в фоне
+        self._lock = threading.Lock()
+
+    def lookup(self, url):
+        """Свежая запись кэша или None"""
+        with self._lock:
+            entries = self._entries()
+            entry = entries.get(url)
+            if entry is not None and time.time() - entry["resolved_at"] >= self.ttl:
+                del entries[url]
+                self._changed = True
+                entry = None
+            return entry
+
+    def resolve(self, url: str) -> str:
+        """Адрес для плеера без ожидания сети: итоговый из кэша, иначе сам url, а разбор идет в фоне"""
+        entry = self.lookup(url)
+        if entry is not None:
+            self.hits += 1
+            return entry["endpoint"]
+        self.misses += 1
+        with self._lock:
+            if url in self._pending:
+                return url
+            self._pending.add(url)
+        threading.Thread(target=self._resolve_later, args=(url,), daemon=True).start()
+        return url
+
+    def open(self, url: str, timeout=None, headers=None):
+        """
+        Как open_stream, но через кэш: сразу к итоговому адресу и по известному IP, без DNS.
+        При промахе проходит плейлисты и перенаправления и запоминает итог; ответ потока не закрывается.
+        """
+        import http.client
+        from player.stream import open_stream
+        timeout = timeout or self.timeout
+        entry = self.lookup(url)
+        if entry is not None:
+            self.hits += 1
+            try:
+                return open_stream(entry["endpoint"], timeout, headers, entry["address"])
+            except (OSError, http.client.HTTPException):
+                self.failed(url)  # сервер переехал или сменил адрес: разбираем заново
+        else:
+            self.misses += 1
+        endpoint, response = self._walk(url, timeout, headers)
+        if response is None:
+            # медиаплейлист HLS уже прочитан: для вызывающего открываем его снова
+            endpoint, response = open_stream(endpoint, timeout, headers)
+        return endpoint, response
+
+    def failed(self, url):
+        """Подключение по адресу из кэша не удалось: запись больше не используется"""
+        with self._lock:
+            if self._entries().pop(url, None) is not None:
+                self.failures += 1
+                self._changed = True
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "failures": self.failures,
+                "entries": len(self.entries or ())}
+
+    def save(self):
+        import json
+        with self._lock:
+            if not self._changed or self.path is None:
+                return
+            data = json.dumps(self.entries, ensure_ascii=False)
+            self._changed = False
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(data)
+        os.replace(temp_path, self.path)
+
+    def _entries(self):
+        if self.entries is None:
+            self.entries = {}
+            if self.path is not None:
+                import json
+                try:
+                    with open(self.path, encoding="utf-8") as file:
+                        self.entries = json.load(file)
+                except (OSError, ValueError):
+                    pass
+        return self.entries
+
+    def _resolve_later(self, url):
+        try:
+            _, response = self._walk(url, self.timeout)
+            if response is not None:
+                response.close()
+        except Exception:
+            pass  # станция не ответила: плеер подключается по исходному адресу, как без кэша
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def _walk(self, url, timeout, headers=None):
+        """
+        Проходит плейлисты и перенаправления от url, запоминает итог.
+        Возвращает (итоговый адрес, открытый ответ потока); ответ None - итог сам плейлист HLS.
+        """
+        from player.stream import is_audio, open_stream
+        origin = url
+        for _ in range(MAX_PLAYLISTS + 1):
+            url, response = open_stream(url, timeout, headers)
+            content_type = response.getheader("Content-Type")
+            kind = None if is_audio(content_type) else playlist_kind(url, content_type)
+            if kind is None:
+                self._store(origin, url, response.peer)
+                return url, response
+            try:
+                text = response.read(PLAYLIST_LIMIT).decode("utf-8", "replace")
+            finally:
+                response.close()
+            target = playlist_target(kind, text, url)
+            if target is None:
+                self._store(origin, url, response.peer)
+                return url, None
+            url = target
+        raise OSError("слишком много вложенных плейлистов")
+
+    def _store(self, url, endpoint, address):
+        with self._lock:
+            self._entries()[url] = {"endpoint": endpoint, "address": address, "resolved_at": time.time()}
+            self._changed = True
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+from player.aioloop import submit
+from player.events import TICK
+from player.health import probe
+
+# обзор станций, как кнопка scan у приемника: каждая станция списка звучит несколько секунд,
+# следующая подключается, пока звучит текущая
+
+
+class Scanner:
+    """
+    Обзор станций представления view начиная со строки после start: каждая звучит dwell сек.
+    Станции на ahead строк вперед проверяет пул из workers подключений (probe): недоступные
+    пропускаются, не задерживая обзор; свежий результат фоновой проверки станций (health)
+    избавляет от своей. Две ближайшие живые предзагружаются (prefetch), а переключение
+    на следующую начинается за lead сек до конца текущей - за время, за которое станции обзора
+    начинали звучать: новая заиграет как раз к концу dwell. Станция, не заигравшая
+    за connect_timeout сек, пропускается, прежняя тем временем звучит дальше. Все вызовы -
+    из интерфейса; проверки идут в фоновом asyncio-цикле, готовый результат будит интерфейс
+    событием TICK "scan".
+    """
+
+    def __init__(self, view, start, url_of, dwell=5.0, ahead=8, workers=4, connect_timeout=None,
+                 timeout=4.0, health=None, health_key=None, prefetch=None, bus=None):
+        self.view = view
+        self.url_of = url_of  # строка представления -> адрес для проверки и предзагрузки
+        self.dwell = dwell
+        self.ahead = ahead
+        self.connect_timeout = connect_timeout or max(dwell, 3.0)
+        self.timeout = timeout
+        self.health = health  # HealthCache: свежий результат проверки избавляет от своей
+        self.health_key = health_key or url_of  # строка -> адрес станции в кэше health
+        self.prefetch = prefetch
+        self.bus = bus
+        self.position = start  # последняя строка, до которой дошел обзор
+        self.left = len(view)  # сколько станций осталось обойти (до start)
+        self.playing = None  # строка станции, которая звучит в обзоре
+        self.heard_at = None
+        self.trying = None  # строка станции, которая подключается
+        self.tried_at = None
+        self.lead = 0.5  # сколько сек станции обзора подключаются (среднее)
+        self.heard = 0
+        self.skipped = 0
+        self.done = False
+        self._probes = {}  # строка -> concurrent.futures.Future с результатом probe
+        self._workers = asyncio.Semaphore(workers)
+        self._scheduled = None
+
+    def update(self, started, failed, now=None):
+        """
+        Шаг обзора по состоянию плеера: started - звук последнего переключения начался,
+        failed - переключение не удалось. Возвращает строку, на которую переключиться, или None.
+        """
+        now = time.monotonic() if now is None else now
+        if self.trying is not None:
+            if started:
+                self.lead = 0.7 * self.lead + 0.3 * (now - self.tried_at)
+                self.playing, self.heard_at, self.trying = self.trying, now, None
+                self.heard += 1
+                self._prefetch()
+            elif failed or self._dead(self.trying) or now - self.tried_at >= self.connect_timeout:
+                self.skipped += 1
+                self.trying = None
+                return self._next(now)
+            else:
+                return None
+        if self.playing is None or now >= self.heard_at + self.dwell - self.lead:
+            return self._next(now)
+        return None
+
+    def schedule(self):
+        """Через сколько сек снова вызвать update без событий; None - таймер уже стоит"""
+        if self.trying is not None:
+            deadline = self.tried_at + self.connect_timeout
+        elif self.heard_at is not None:
+            deadline = self.heard_at + self.dwell - self.lead
+        else:
+            return None
+        if deadline == self._scheduled:
+            return None
+        self._scheduled = deadline
+        return max(deadline - time.monotonic(), 0.0)
+
+    def remaining(self):
+        """Сколько сек осталось звучать текущей станции"""
+        if self.heard_at is None:
+            return None
+        return max(self.heard_at + self.dwell - time.monotonic(), 0.0)
+
+    def close(self):
+        for future in self._probes.values():
+            future.cancel()
+        self._probes.clear()
+
+    def _next(self, now):
+        """Следующая станция, про которую не известно, что она недоступна; None - обзор закончен"""
+        while self.left > 0:
+            self.left -= 1
+            self.position = (self.position + 1) % len(self.view)
+            self._probe_ahead()
+            if self._dead(self.position):
+                self.skipped += 1
+                continue
+            self.trying, self.tried_at = self.position, now
+            return self.position
+        self.done = True
+        return None
+
+    def _upcoming(self, count):
+        """Строки count ближайших станций обзора, кроме заведомо недоступных"""
+        rows = []
+        for step in range(1, min(self.ahead, self.left) + 1):
+            row = (self.position + step) % len(self.view)
+            if not self._dead(row):
+                rows.append(row)
+                if len(rows) == count:
+                    break
+        return rows
+
+    def _prefetch(self):
+        if self.prefetch is not None:
+            self.prefetch.prefetch([self.url_of(row) for row in self._upcoming(2)])
+
+    def _probe_ahead(self):
+        window = {(self.position + step) % len(self.view)
+                  for step in range(1, min(self.ahead, self.left) + 1)}
+        for row in list(self._probes):
+            if row not in window and row != self.position:
+                self._probes.pop(row).cancel()  # обзор ушел дальше
+        for row in window:
+            if row not in self._probes and self._known(row) is None:
+                self._probes[row] = future = submit(self._check(self.url_of(row)))
+                future.add_done_callback(self._checked)
+
+    def _known(self, row):
+        """Свежий результат фоновой проверки станций: True/False или None"""
+        if self.health is None:
+            return None
+        url = self.health_key(row)
+        return self.health.get(url)["ok"] if self.health.is_fresh(url) else None
+
+    def _dead(self, row):
+        known = self._known(row)
+        if known is not None:
+            return not known
+        future = self._probes.get(row)
+        return (future is not None and future.done() and not future.cancelled()
+                and not future.result()["ok"])
+
+    async def _check(self, url):
+        async with self._workers:
+            return await probe(url, self.timeout)
+
+    def _checked(self, future):
+        if self.bus is not None and not future.cancelled():
+            self.bus.publish(TICK, "scan")
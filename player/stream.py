@@ -0,0 +1,115 @@
+import http.client
+import socket
+from urllib.parse import urljoin, urlsplit
+
+from player import trace
+
+# открытие HTTP(S)-потока радиостанции без VLC
+
+USER_AGENT = "AtRadio-console"
+MAX_REDIRECTS = 5
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class IcyResponse(http.client.HTTPResponse):
+    """HTTPResponse, который понимает строку статуса Shoutcast v1 `ICY 200 OK`"""
+
+    def _read_status(self):
+        if self.fp.peek(4)[:4] == b"ICY ":
+            line = self.fp.readline(65537).decode("iso-8859-1")
+            _, status, *reason = line.split(None, 2)
+            return "HTTP/1.0", int(status), (reason[0] if reason else "").strip()
+        return super()._read_status()
+
+
+def connect_socket(host, port, timeout, address=None):
+    """
+    TCP-соединение с сервером. Запрос DNS и подключение - отдельными шагами, чтобы --profile видел каждый;
+    адреса перебираются по очереди, как в socket.create_connection. address - IP, известный заранее.
+    """
+    if address is None:
+        with trace.span("dns"):
+            addresses = [info[4][:2] for info in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)]
+    else:
+        addresses = [(address, port)]
+    error = None
+    with trace.span("tcp"):
+        for target in addresses:
+            try:
+                return socket.create_connection(target, timeout)
+            except OSError as e:
+                error = e
+    raise error or OSError(f"нет адресов для {host}")
+
+
+class IcyHTTPConnection(http.client.HTTPConnection):
+    response_class = IcyResponse
+    address = None  # IP сервера, известный заранее: подключение без запроса DNS
+
+    def connect(self):
+        self.sock = connect_socket(self.host, self.port, self.timeout, self.address)
+
+
+class IcyHTTPSConnection(http.client.HTTPSConnection):
+    response_class = IcyResponse
+    address = None
+
+    def connect(self):
+        # сертификат и SNI - по имени сервера, подключение - по известному IP, если он есть
+        sock = connect_socket(self.host, self.port, self.timeout, self.address)
+        with trace.span("tls"):
+            self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+def open_stream(url: str, timeout: float = 5.0, headers=None, address=None):
+    """
+    Открывает поток станции, переходя по редиректам. address - IP сервера url, если известен.
+    Возвращает (итоговый url, HTTPResponse); IP сервера, отдавшего ответ, - в response.peer.
+    При ошибке - OSError или http.client.HTTPException.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        if parts.scheme == "https":
+            connection = IcyHTTPSConnection(parts.hostname, parts.port, timeout=timeout)
+        elif parts.scheme == "http":
+            connection = IcyHTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        else:
+            raise OSError(f"неподдерживаемая схема: {parts.scheme}")
+        connection.address, address = address, None  # перенаправление может вести на другой сервер
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        try:
+            connection.request("GET", path, headers={"User-Agent": USER_AGENT, **(headers or {})})
+            # после ответа без keep-alive соединение отдает сокет ответу, адрес узнаем сейчас
+            peer = connection.sock.getpeername()[0]
+            with trace.span("http ответ"):
+                response = connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+        location = response.getheader("Location")
+        if response.status in REDIRECT_CODES and location:
+            connection.close()
+            url = urljoin(url, location)
+            continue
+        if response.status != 200:
+            connection.close()
+            raise OSError(f"HTTP {response.status} {response.reason}")
+        response.peer = peer
+        return url, response
+    raise OSError("слишком много перенаправлений")
+
+
+def stream_bitrate(response):
+    """Битрейт потока в кбит/с из заголовка icy-br или None"""
+    value = (response.getheader("icy-br") or "").split(",")[0].strip()
+    return int(value) if value.isdigit() and int(value) > 0 else None
+
+
+def is_audio(content_type) -> bool:
+    """Поток со звуком, а не плейлист или страница"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/ogg", "application/octet-stream"):
+        return True
+    return content_type.startswith("audio/") and not content_type.endswith(("mpegurl", "scpls"))
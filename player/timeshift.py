@@ -0,0 +1,337 @@
+import mmap
+import os
+import tempfile
+import threading
+import time
+
+from player.stream import is_audio, open_stream, stream_bitrate
+from storage.paths import cache_path
+
+# timeshift: поток играющей станции пишется в кольцевой файл, пауза и перемотка идут без переподключения к станции
+
+CHUNK_SIZE = 16384
+MAX_BITRATE = 320  # кбит/с: под такой поток размечается кольцо, если станция не сообщила битрейт
+BITRATE_MARGIN = 1.25  # запас кольца к битрейту из icy-br: переменный битрейт, пачка при подключении
+DEFAULT_BITRATE = 128  # кбит/с для перевода секунд в байты, пока скорость потока не измерена
+MEASURE_SECONDS = 10.0  # через сколько секунд записи скорость потока считается измеренной
+SAMPLE_SECONDS = 10.0  # период замеров скорости для оценки канала (VariantSelector)
+
+
+class RingFile:
+    """
+    Кольцевой буфер во временном файле, отображенном в память. Позиции - сквозные номера байт потока:
+    байт p лежит по смещению p % size, доступны байты с позиции start до written.
+    Память процесса не растет со временем: страницы файла держит и при нехватке вытесняет ядро.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.file = tempfile.TemporaryFile(prefix="timeshift-", dir=os.path.dirname(cache_path("timeshift")))
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.view = memoryview(self.map)
+        self.written = 0
+
+    @property
+    def start(self) -> int:
+        return max(self.written - self.size, 0)
+
+    def fill(self, readinto) -> int:
+        """
+        Читает поток прямо в кольцо: readinto (сокета или HTTPResponse) пишет в срез отображенного файла,
+        без промежуточных bytes. Возвращает число байт, 0 - поток кончился.
+        """
+        offset = self.written % self.size
+        count = readinto(self.view[offset:min(offset + CHUNK_SIZE, self.size)]) or 0
+        self.written += count
+        return count
+
+    def write(self, data):
+        """Дописывает уже прочитанные байты (начало потока из предзагрузки)"""
+        data = memoryview(data)[-self.size:]
+        while data:
+            offset = self.written % self.size
+            part = data[:self.size - offset]
+            self.view[offset:offset + len(part)] = part
+            self.written += len(part)
+            data = data[len(part):]
+
+    def read(self, position: int, limit: int = CHUNK_SIZE) -> bytes:
+        """Байты с позиции position (не раньше start) до записанного конца, не больше limit"""
+        offset = position % self.size
+        end = min(offset + limit, self.size, offset + self.written - position)
+        # копия: пока байты уходят в сокет, писатель может дойти до них по кругу
+        return bytes(self.view[offset:end])
+
+    def close(self):
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError:
+            pass  # срез еще держит трассировка исключения чтения, файл закроет сборщик мусора
+        self.file.close()
+
+
+class Recording:
+    """
+    Запись одной станции: соединение, кольцо на seconds сек и положение слушателя относительно эфира.
+    delay - на сколько секунд слушатель отстает от эфира, не считая идущей паузы.
+    """
+
+    def __init__(self, url, seconds, entry=None, timeout=5.0, estimator=None, resolver=None):
+        self.origin_url = url
+        self.estimator = estimator
+        self.resolver = resolver
+        self.seconds = seconds
+        self.content_type = None
+        self.bitrate = None  # кбит/с из заголовка icy-br
+        self.ring = None
+        self.response = None
+        self.error = None
+        self.started = None
+        self.delay = 0.0
+        self.paused_at = None
+        self.readers = 0  # сколько читателей сейчас отдают запись плееру
+        self.done = False  # запись остановлена: поток кончился, ошибка или close
+        self.closed = False
+        self.cond = threading.Condition()
+        threading.Thread(target=self._record, args=(entry, timeout), daemon=True).start()
+
+    def rate(self) -> float:
+        """Байт в секунду: по icy-br, иначе измеренная скорость записи"""
+        if self.bitrate:
+            return self.bitrate * 125
+        elapsed = time.monotonic() - self.started if self.started is not None else 0.0
+        if elapsed < MEASURE_SECONDS or self.ring is None:
+            return DEFAULT_BITRATE * 125
+        return self.ring.written / elapsed
+
+    def available(self) -> float:
+        """Сколько секунд эфира есть в кольце"""
+        ring = self.ring
+        return (ring.written - ring.start) / self.rate() if ring is not None else 0.0
+
+    def behind(self) -> float:
+        """На сколько секунд слушатель отстает от эфира сейчас, с учетом идущей паузы"""
+        delay = self.delay
+        if self.paused_at is not None:
+            delay += time.monotonic() - self.paused_at
+        return min(delay, self.available())
+
+    def reader(self, delay):
+        """Источник для ретранслятора, начинающийся delay сек назад"""
+        with self.cond:
+            position = 0
+            if self.ring is not None:
+                position = max(self.ring.written - int(delay * self.rate()), self.ring.start)
+        return RingReader(self, position)
+
+    def wait_ready(self, timeout=None):
+        with self.cond:
+            self.cond.wait_for(lambda: self.ring is not None or self.done, timeout)
+
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        # закрытие соединения ждет, пока вернется идущее чтение: не держим этим вызывающего
+        threading.Thread(target=self._release, daemon=True).start()
+
+    def _release(self):
+        if self.response is not None:
+            self.response.close()  # прерывает чтение в потоке записи
+        # кольцо закрывается, когда поток записи из него вышел
+        with self.cond:
+            self.cond.wait_for(lambda: self.done)
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+
+    def _record(self, entry, timeout):
+        try:
+            if entry is not None:
+                # соединение уже открыла предзагрузка: берем ее буфер и читаем дальше из того же ответа
+                entry.fetched.wait()
+                if entry.state == "failed":
+                    raise OSError("станция не ответила")
+                response, head = entry.response, bytes(entry.buffer)
+                entry.buffer = bytearray()
+            else:
+                opener = self.resolver.open if self.resolver is not None else open_stream
+                _, response = opener(self.origin_url, timeout)
+                head = b""
+            self.response = response
+            if self.closed:
+                response.close()
+                return
+            self.content_type = response.getheader("Content-Type")
+            if not is_audio(self.content_type):
+                raise OSError(f"не аудиопоток: {self.content_type}")
+            self.bitrate = stream_bitrate(response)
+            per_second = self.bitrate * BITRATE_MARGIN if self.bitrate else MAX_BITRATE
+            ring = RingFile(max(int(self.seconds * per_second * 125), CHUNK_SIZE))
+            ring.write(head)
+            # у потока без chunked readinto1 буферизованного сокета отдает то, что уже пришло, одним вызовом
+            readinto = response.readinto if response.chunked else response.fp.readinto1
+            with self.cond:
+                self.ring = ring
+                self.started = time.monotonic()
+                self.cond.notify_all()
+            sampled, sampled_bytes = time.monotonic(), ring.written
+            while not self.closed:
+                if not ring.fill(readinto):
+                    break
+                with self.cond:
+                    self.cond.notify_all()
+                now = time.monotonic()
+                if self.estimator is not None and now - sampled >= SAMPLE_SECONDS:
+                    # запись идет все время, пока станция играет: скорость потока видна непрерывно
+                    self.estimator.sample(self.origin_url, ring.written - sampled_bytes, now - sampled, self.bitrate)
+                    sampled, sampled_bytes = now, ring.written
+        except Exception as error:
+            # ошибка сети или HTTP; после close - соединение закрыто из другого потока
+            if not self.closed:
+                self.error = str(error)
+        finally:
+            if self.response is not None:
+                self.response.close()
+            with self.cond:
+                self.done = True
+                self.cond.notify_all()
+
+
+class RingReader:
+    """
+    Источник для LocalRelay (как PrefetchEntry): отдает плееру запись с позиции position
+    и дальше по мере записи. Слушатель, отставший больше длины кольца, перескакивает на самое старое.
+    """
+
+    def __init__(self, recording, position, on_close=None):
+        self.recording = recording
+        self.origin_url = recording.origin_url
+        self.position = position
+        self.on_close = on_close
+        self.closed = False
+
+    @property
+    def content_type(self):
+        # ретранслятор отправляет заголовки раньше первых байт: дожидаемся ответа станции
+        self.recording.wait_ready(timeout=10.0)
+        return self.recording.content_type
+
+    def chunks(self):
+        recording = self.recording
+        with recording.cond:
+            recording.readers += 1
+        try:
+            while True:
+                with recording.cond:
+                    recording.cond.wait_for(lambda: self.closed or recording.closed or recording.done
+                                            or (recording.ring is not None and recording.ring.written > self.position))
+                    ring = recording.ring
+                    if self.closed or recording.closed or ring is None or ring.written <= self.position:
+                        return
+                    self.position = max(self.position, ring.start)
+                    data = ring.read(self.position)
+                self.position += len(data)
+                yield data
+        finally:
+            with recording.cond:
+                recording.readers -= 1
+            if self.on_close:
+                self.on_close()
+
+    def close(self):
+        with self.recording.cond:
+            self.closed = True
+            self.recording.cond.notify_all()
+
+
+class Timeshift:
+    """
+    Пауза и перемотка эфира. Плеер слушает станцию через локальный ретранслятор из кольца записи,
+    а запись идет все время, пока станция выбрана: пауза останавливает только плеер, перемотка и возврат
+    к эфиру открывают ретранслятор с другой позиции того же кольца, к станции заново не подключаемся.
+    Запись станции живет, пока станция играет (follow) или ее кольцо еще читает плеер при переключении.
+    """
+
+    def __init__(self, relay, minutes=30.0, timeout=5.0, estimator=None, resolver=None):
+        self.relay = relay
+        self.estimator = estimator
+        self.resolver = resolver
+        self.seconds = minutes * 60
+        self.timeout = timeout
+        self.recordings = []
+        self.current = None  # запись играющей станции
+        self._lock = threading.Lock()
+
+    def source_url(self, url: str, entry=None) -> str:
+        """Новая запись станции (entry - готовое соединение предзагрузки); адрес для плеера - ретранслятор"""
+        recording = Recording(url, self.seconds, entry, self.timeout, self.estimator, self.resolver)
+        with self._lock:
+            self.recordings.append(recording)
+            self.current = recording
+        return self._publish(recording)
+
+    def follow(self, url):
+        """Играющая станция; None - ничего не играет. Записи других станций без читателей закрываются"""
+        with self._lock:
+            if self.current is None or self.current.origin_url != url:
+                self.current = next((r for r in reversed(self.recordings) if r.origin_url == url), None)
+        self._collect()
+
+    def paused(self) -> bool:
+        return self.current is not None and self.current.paused_at is not None
+
+    def behind(self) -> float:
+        return self.current.behind() if self.current is not None else 0.0
+
+    def pause(self):
+        """Запоминает момент паузы; плеер останавливает вызывающий, запись продолжается"""
+        recording = self.current
+        if recording is not None and recording.paused_at is None:
+            recording.paused_at = time.monotonic()
+
+    def resume(self):
+        """Адрес для плеера с того места, где была пауза; None - нечего продолжать"""
+        recording = self.current
+        if recording is None:
+            return None
+        recording.delay = recording.behind()
+        recording.paused_at = None
+        return self._publish(recording)
+
+    def seek(self, seconds: float):
+        """
+        Перемотка: seconds > 0 - назад, < 0 - вперед, не дальше эфира и начала кольца.
+        Возвращает новый адрес для плеера; на паузе только сдвигает место продолжения и возвращает None.
+        """
+        recording = self.current
+        if recording is None:
+            return None
+        delay = min(max(recording.behind() + seconds, 0.0), recording.available())
+        recording.delay = delay
+        if recording.paused_at is not None:
+            recording.paused_at = time.monotonic()
+            return None
+        return self._publish(recording)
+
+    def close(self):
+        with self._lock:
+            recordings, self.recordings, self.current = self.recordings, [], None
+        for recording in recordings:
+            recording.close()
+
+    def _publish(self, recording):
+        reader = recording.reader(recording.delay)
+        reader.on_close = self._collect
+        return self.relay.publish(reader)
+
+    def _collect(self):
+        with self._lock:
+            stale = [r for r in self.recordings if r is not self.current and r.readers == 0]
+            self.recordings = [r for r in self.recordings if r not in stale]
+        for recording in stale:
+            recording.close()
@@ -0,0 +1,200 @@
+import bisect
+import os
+import threading
+import time
+
+# замеры горячих путей (--profile): этапы от нажатия Enter до звука и длительности операций копятся
+# в гистограммах внутри процесса. Пока замеры выключены, каждая точка замера - вызов функции,
+# которая сразу возвращается
+
+BOUNDS = [0.00001 * 2 ** i for i in range(24)]  # верхние границы корзин, сек: от 10 мкс до 84 с
+
+tracer = None  # Tracer, когда замеры включены
+
+
+class Histogram:
+    """Длительности в корзинах с удвоением границ: память не растет, процентили - с точностью до корзины"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.low = None
+        self.high = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.low = seconds if self.low is None else min(self.low, seconds)
+        self.high = max(self.high, seconds)
+
+    def percentile(self, share):
+        """Верхняя граница корзины, в которую попадает доля share значений"""
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= share * self.count:
+                return min(BOUNDS[index] if index < len(BOUNDS) else self.high, self.high)
+        return 0.0
+
+    def summary(self) -> dict:
+        return {"count": self.count, "mean": self.total / self.count if self.count else 0.0,
+                "min": self.low or 0.0, "p50": self.percentile(0.5), "p90": self.percentile(0.9),
+                "p99": self.percentile(0.99), "max": self.high}
+
+
+class Span:
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.monotonic()
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, time.monotonic() - self.started)
+
+
+class NullSpan:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Гистограммы по именам. Трасса начинается нажатием (begin) и кончается звуком или ошибкой (finish);
+    этап трассы - время от нажатия до первой отметки этапа, гистограмма «Enter → этап».
+    Новое нажатие обрывает незаконченную трассу. Длительности операций (span, record)
+    пишутся в свои гистограммы независимо от трасс. Отметки приходят из разных потоков.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.name = None  # текущая трасса: что ее начало
+        self.started = None
+        self.stages = {}  # этапы текущей трассы: название -> сек от нажатия
+        self.last = None  # (название, этапы) последней законченной трассы
+        self.finished = 0
+        self.abandoned = 0  # трассы, оборванные следующим нажатием
+        self._lock = threading.Lock()
+
+    def begin(self, name, at=None):
+        with self._lock:
+            if self.started is not None:
+                self.abandoned += 1
+            self.name, self.started, self.stages = name, at or time.monotonic(), {}
+
+    def mark(self, stage):
+        now = time.monotonic()
+        with self._lock:
+            if self.started is not None and stage not in self.stages:
+                self.stages[stage] = now - self.started
+                self._add(f"{self.name} → {stage}", now - self.started)
+
+    def finish(self, stage):
+        self.mark(stage)
+        with self._lock:
+            if self.started is not None:
+                self.last = (self.name, self.stages)
+                self.finished += 1
+                self.started = None
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._add(name, seconds)
+
+    def span(self, name):
+        return Span(self, name)
+
+    def overlay(self) -> str:
+        """Строка для экрана: этапы текущей трассы, иначе последней законченной"""
+        with self._lock:
+            if self.started is not None:
+                name, stages = self.name, dict(self.stages)
+                tail = f" … {(time.monotonic() - self.started) * 1000:.0f}"
+            elif self.last is not None:
+                (name, stages), tail = self.last, ""
+            else:
+                return "замеры: нажмите Enter на станции"
+        parts = " · ".join(f"{stage} {seconds * 1000:.0f}" for stage, seconds in stages.items())
+        return f"{name}: {parts}{tail} мс"
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def dump(self, path):
+        """Гистограммы в файл: CSV по расширению .csv, иначе JSON (со счетчиками корзин)"""
+        import json
+        with self._lock:
+            histograms = {name: (histogram.summary(), list(histogram.counts))
+                          for name, histogram in self.histograms.items()}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="") as file:
+            if path.lower().endswith(".csv"):
+                import csv
+                writer = csv.writer(file)
+                writer.writerow(["name", "count", "mean", "min", "p50", "p90", "p99", "max"])
+                for name, (summary, counts) in histograms.items():
+                    writer.writerow([name, *(summary[field] for field in
+                                             ("count", "mean", "min", "p50", "p90", "p99", "max"))])
+            else:
+                json.dump({"bounds": BOUNDS, "traces": self.finished, "abandoned": self.abandoned,
+                           "histograms": {name: {**summary, "buckets": counts}
+                                          for name, (summary, counts) in histograms.items()}},
+                          file, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+
+    def _add(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+def enable():
+    global tracer
+    tracer = Tracer()
+    return tracer
+
+
+def disable():
+    global tracer
+    tracer = None
+
+
+def clock():
+    """monotonic, если замеры включены, иначе None"""
+    return time.monotonic() if tracer is not None else None
+
+
+def begin(name, at=None):
+    if tracer is not None:
+        tracer.begin(name, at)
+
+
+def mark(stage):
+    if tracer is not None:
+        tracer.mark(stage)
+
+
+def finish(stage):
+    if tracer is not None:
+        tracer.finish(stage)
+
+
+def record(name, seconds):
+    if tracer is not None:
+        tracer.record(name, seconds)
+
+
+def span(name):
+    """with trace.span("dns"): ... - длительность блока; без замеров - пустой контекст"""
+    return tracer.span(name) if tracer is not None else NULL_SPAN
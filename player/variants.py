@@ -0,0 +1,189 @@
+import collections
+import os
+import re
+import time
+
+from player.events import BUFFERING, PLAYING
+
+# варианты качества станции: несколько адресов в поле URL через пробел, от лучшего к худшему.
+# Модуль загружается до первого кадра: json и urllib.parse подгружаются при первом замере или записи журнала
+
+# стандартные битрейты mp3/aac, отдельным числом в адресе: tatarradio320.mp3, /aac/64/246, nashe-128.mp3
+BITRATE_HINT = re.compile(r"(?<!\d)(320|256|192|160|128|112|96|64|56|48|32|24)(?!\d)")
+LOG_LIMIT = 1 << 20  # байт журнала решений, дальше он переименовывается в .1 и начинается заново
+
+
+def variant_urls(field: str) -> list:
+    """Адреса вариантов из поля URL, от лучшего к худшему; обычная станция - один адрес"""
+    return field.split() or [field]
+
+
+def primary_url(field: str) -> str:
+    """Лучший вариант: по нему проверяется доступность станции и читаются названия песен"""
+    return variant_urls(field)[0]
+
+
+def variant_bitrate(url: str):
+    """Битрейт варианта в кбит/с по подсказке в адресе или None"""
+    from urllib.parse import urlsplit
+    match = BITRATE_HINT.search(urlsplit(url).path)
+    return int(match.group(1)) if match else None
+
+
+def host_of(url: str):
+    from urllib.parse import urlsplit
+    return urlsplit(url).hostname
+
+
+class VariantSelector:
+    """
+    Выбор варианта станции по пропускной способности канала и остановкам воспроизведения.
+    Оценка канала - по сервера (host): скорость, с которой поток приходил медленнее своего битрейта,
+    то есть упирался в канал; поток не медленнее битрейта только поднимает оценку. Вариант годится,
+    если оценки нет или она не меньше битрейта варианта с запасом headroom.
+    После stalls_to_step остановок на буферизацию за stall_window сек вариант наказывается на penalty сек
+    (повторно - вдвое дольше) и плеер переходит на следующий вариант. Решения пишутся строками JSON в log_path.
+    """
+
+    def __init__(self, log_path=None, headroom=1.2, stalls_to_step=2, stall_window=60.0, penalty=300.0,
+                 estimate_age=600.0, smoothing=0.5):
+        self.log_path = log_path
+        self.headroom = headroom
+        self.stalls_to_step = stalls_to_step
+        self.stall_window = stall_window
+        self.penalty = penalty
+        self.estimate_age = estimate_age  # сек, после которых оценка канала забывается
+        self.smoothing = smoothing
+        self.limits = {}  # host -> (оценка канала, байт/с, когда измерена)
+        self.bitrates = {}  # url -> кбит/с из заголовка icy-br
+        self.penalties = {}  # url -> (до какого времени, длительность наказания)
+        self.stalls = collections.defaultdict(collections.deque)  # url -> время остановок
+        self.chosen = {}  # поле URL станции -> выбранный вариант
+        self._stalling = False
+        self._log = None
+
+    def sample(self, url, size, seconds, bitrate=None):
+        """Замер соединения: size байт потока пришли за seconds сек"""
+        if seconds <= 0 or size <= 0:
+            return
+        if bitrate:
+            self.bitrates[url] = bitrate
+        rate = size / seconds
+        host = host_of(url)
+        now = time.monotonic()
+        limit = self._limit(host, now)
+        expected = self.bitrate(url)
+        if expected and rate < expected * 125 * 0.9:
+            # поток шел медленнее своего битрейта - это предел канала
+            limit = rate if limit is None else limit * (1 - self.smoothing) + rate * self.smoothing
+        elif limit is not None and rate > limit:
+            limit = rate  # канал смог больше, чем считалось
+        else:
+            return  # поток успевал: о канале ничего нового, старая оценка устаревает в свой срок
+        self.limits[host] = (limit, now)
+
+    def bitrate(self, url):
+        return self.bitrates.get(url) or variant_bitrate(url)
+
+    def pick(self, field: str) -> str:
+        """Лучший годный сейчас вариант станции, без записи решения"""
+        return self._decide(field)[0]
+
+    def choose(self, field: str, reason: str = "старт") -> str:
+        """Вариант для воспроизведения; решение запоминается и пишется в журнал"""
+        url, why = self._decide(field)
+        self.chosen[field] = url
+        self._stalling = False
+        if len(variant_urls(field)) > 1:
+            self._write(field, url, reason, why)
+        return url
+
+    def current(self, field: str) -> str:
+        """Играющий вариант станции (последний выбранный)"""
+        return self.chosen.get(field) or primary_url(field)
+
+    def watch(self, field, events, started):
+        """
+        События плеера играющей станции field; started - звук уже начался.
+        Буферизация после начала звука - остановка. Возвращает вариант, на который надо перейти, или None.
+        """
+        if not started:
+            return None
+        step = None
+        for event in events:
+            if event.kind == BUFFERING and isinstance(event.detail, int) and event.detail < 100:
+                if not self._stalling:
+                    self._stalling = True
+                    step = self._stalled(field) or step
+            elif event.kind in (PLAYING, BUFFERING):
+                self._stalling = False
+        return step
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _stalled(self, field):
+        url = self.current(field)
+        now = time.monotonic()
+        stalls = self.stalls[url]
+        stalls.append(now)
+        while stalls and stalls[0] < now - self.stall_window:
+            stalls.popleft()
+        if len(stalls) < self.stalls_to_step:
+            self._write(field, url, "остановка", {"stalls": len(stalls)})
+            return None
+        stalls.clear()
+        _, duration = self.penalties.get(url, (0.0, self.penalty / 2))
+        duration = min(duration * 2, self.penalty * 8)
+        self.penalties[url] = (now + duration, duration)
+        lower = self.choose(field, "переход после остановок")
+        return lower if lower != url else None
+
+    def _limit(self, host, now):
+        limit, measured = self.limits.get(host, (None, 0.0))
+        return limit if now - measured <= self.estimate_age else None
+
+    def _decide(self, field):
+        urls = variant_urls(field)
+        if len(urls) == 1:
+            return urls[0], {}
+        now = time.monotonic()
+        skipped = {}
+        for url in urls:
+            until, _ = self.penalties.get(url, (0.0, 0.0))
+            if until > now:
+                skipped[url] = "остановки"
+                continue
+            limit = self._limit(host_of(url), now)
+            bitrate = self.bitrate(url)
+            if limit is not None and bitrate and limit < bitrate * 125 * self.headroom:
+                skipped[url] = f"канал {limit * 8 / 1000:.0f} кбит/с"
+                continue
+            return url, {"skipped": skipped}
+        # ни один вариант не годится - самый легкий
+        return urls[-1], {"skipped": skipped}
+
+    def _write(self, field, url, reason, details):
+        if self.log_path is None:
+            return
+        import json
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "variants": variant_urls(field),
+            "chosen": url,
+            "bitrate": self.bitrate(url),
+            "reason": reason,
+            **details,
+        }
+        try:
+            if self._log is not None and self._log.tell() > LOG_LIMIT:
+                self.close()
+            if self._log is None:
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > LOG_LIMIT:
+                    os.replace(self.log_path, self.log_path + ".1")
+                self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+            self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass  # журнал - для разбора, воспроизведению он не нужен
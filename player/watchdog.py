@@ -0,0 +1,133 @@
+import collections
+import random
+import threading
+import time
+
+from player.events import BUFFERING, DROP, END, ERROR, PLAYING, STATE
+
+# сторож обрывов: станция, у которой оборвался или замолчал поток, переподключается сама,
+# интерфейс тем временем отвечает на клавиши
+
+
+class Watchdog:
+    """
+    Следит, что играющая станция действительно играет. Фоновый поток раз в interval сек спрашивает плеер
+    (Player.check, счетчик прочитанных байт): вышел процесс vlc или поток кончился - в шину уходит DROP,
+    поток stall сек не играет или не растет счетчик байт - тоже. Обрыв замечают и по END и ERROR
+    начавшегося потока. Интерфейс переподключает станцию через паузу, которая удваивается с каждой
+    неудачной попыткой, со случайным разбросом; все вызовы плеера - из интерфейса и неблокирующие.
+    Обрывы и буферизации после начала звука считаются по станциям (полям URL).
+    """
+    interval = 1.0  # период проверки играющего потока, сек
+    stall = 8.0  # сколько поток может молчать, прежде чем считается оборванным, сек
+    base_delay = 1.0  # пауза перед первой попыткой переподключения, сек
+    max_delay = 60.0
+
+    def __init__(self, player, bus, interval=None, stall=None):
+        self.player = player
+        self.bus = bus
+        self.interval = interval or self.interval
+        self.stall = stall or self.stall
+        self.drops = collections.Counter()  # станция -> обрывов
+        self.rebuffers = collections.Counter()  # станция -> остановок на буферизацию
+        self.station = None  # поле URL станции, за которой следим; None - ничего не играет
+        self.reason = None  # причина последнего обрыва
+        self.attempts = 0  # попыток переподключения после обрыва
+        self.retry_at = None  # monotonic время следующей попытки; None - попытка не ждет
+        self._version = None  # версия плеера на момент обрыва
+        self._rebuffering = False
+        self._quiet_since = None  # с какого времени поток не играет
+        self._received = None
+        self._closed = threading.Event()
+        threading.Thread(target=self._run, name="atradio-watchdog", daemon=True).start()
+
+    def follow(self, station):
+        """Играющая станция (поле URL) или None; смена станции сбрасывает попытки переподключения"""
+        if station != self.station:
+            self.station = station
+            self.attempts = 0
+            self.retry_at = None
+            self._rebuffering = False
+
+    def watch(self, events, started):
+        """
+        События плеера играющей станции; started - звук уже начался.
+        Возвращает паузу до переподключения, сек, если поток оборвался, иначе None.
+        """
+        if self.station is None:
+            return None
+        delay = None
+        for event in events:
+            if event.kind in (DROP, END, ERROR) and started:  # DROP прежней станции - уже не наш
+                reason = {END: "поток завершен", ERROR: "ошибка потока"}.get(event.kind, event.detail)
+                delay = self._dropped(reason) or delay
+            elif event.kind == BUFFERING and isinstance(event.detail, int) and event.detail < 100 and started:
+                if not self._rebuffering:
+                    self._rebuffering = True
+                    self.rebuffers[self.station] += 1
+            elif event.kind in (PLAYING, BUFFERING):
+                self._rebuffering = False
+            elif event.kind == STATE and self.attempts:
+                if started and self.player.version != self._version:
+                    self.attempts = 0  # поток заиграл снова: переподключились или станцию включили заново
+                    self.retry_at = None
+                elif self.player.error and not self.player.is_connecting() and self.retry_at is None:
+                    delay = self._dropped(self.player.error) or delay  # попытка не удалась - следующая
+        return delay
+
+    def left(self):
+        """Сколько сек до попытки переподключения; None - попытка не ждет"""
+        return None if self.retry_at is None else self.retry_at - time.monotonic()
+
+    def retrying(self):
+        """Интерфейс начал попытку переподключения"""
+        self.retry_at = None
+        self._quiet_since = None
+
+    def close(self):
+        self._closed.set()
+
+    def _dropped(self, reason):
+        if self.retry_at is not None:
+            return None  # обрыв уже замечен, попытка ждет
+        if not self.attempts:
+            self.drops[self.station] += 1
+        self.reason = reason
+        self._version = self.player.version
+        delay = min(self.base_delay * 2 ** self.attempts, self.max_delay)
+        # разброс: станции, оборванные одним сбоем сети, не переподключаются в одну и ту же секунду
+        delay = random.uniform(delay / 2, delay)
+        self.attempts += 1
+        self.retry_at = time.monotonic() + delay
+        return delay
+
+    def _run(self):
+        while not self._closed.wait(self.interval):
+            if self.station is not None and self.retry_at is None:
+                reason = self.check()
+                if reason:
+                    self.bus.publish(DROP, reason)
+
+    def check(self):
+        """Причина обрыва играющего потока или None; вызывается из фонового потока"""
+        version = self.player.version
+        state = self.player.check()
+        received = self.player.received()
+        if state is None or version != self.player.version:
+            self._quiet_since = None  # нечего проверять или поток сменился, пока его спрашивали
+            return None
+        if state == "error":
+            return "поток оборвался"
+        # поток, остановившийся сам (stopped), и счетчик байт, который не растет, - молчание, а не сбой;
+        # нулевой счетчик - бэкенд байты не считает
+        flowing = state == "playing" and (not received or received != self._received)
+        self._received = received
+        now = time.monotonic()
+        if flowing:
+            self._quiet_since = None
+        elif self._quiet_since is None:
+            self._quiet_since = now
+        elif now - self._quiet_since >= self.stall:
+            self._quiet_since = None
+            return "поток молчит"
+        return None
@@ -0,0 +1,335 @@
+import bisect
+import collections
+import csv
+import mmap
+import os
+import sys
+import threading
+from array import array
+
+# ленивый список станций для больших каталогов: строки CSV разбираются только при обращении
+
+BLOCK_SIZE = 64 * 1024  # байт файла в одном блоке индекса
+CACHED_BLOCKS = 64
+SNAPSHOT_MIN_SIZE = 1 << 20  # файлы меньше считаются быстрее, чем читается снимок индекса
+
+
+def parse_row(line: bytes, categories=False):
+    """
+    Строка CSV `Name;URL` -> (name, url); если в заголовке есть Category (categories),
+    `Name;URL;Category` с непустой категорией -> (name, url, category). Лишние колонки без
+    такого заголовка, как и раньше, отбрасываются. Категории повторяются у тысяч станций
+    и хранятся одной строкой на категорию.
+    """
+    text = line.decode("utf-8").rstrip("\r\n")
+    if '"' in text:
+        row = next(csv.reader([text], delimiter=';'))
+    else:
+        row = text.split(";")
+    if categories and len(row) > 2 and row[2]:
+        return row[0], row[1], sys.intern(row[2])
+    return row[0], row[1] if len(row) > 1 else ""
+
+
+def category_of(station) -> str:
+    """Категория записи станции; у (name, url) - пустая"""
+    return station[2] if len(station) > 2 else ""
+
+
+class CsvRows:
+    """
+    Неизменяемые строки файла станций. Файл отображается в память (в Windows читается целиком,
+    иначе его нельзя подменить при сохранении), при открытии только считаются переводы строк в блоках
+    по BLOCK_SIZE байт. Блок делится на строки при первом обращении, последние CACHED_BLOCKS блоков кэшируются.
+    Индекс блоков большого файла берется из двоичного снимка (storage/snapshot.py), если снимок сделан
+    с этого же файла, иначе считается и снимок пишется в фоне; snapshot=False - всегда считать.
+    """
+
+    def __init__(self, filename, snapshot=True):
+        with open(filename, "rb") as file:
+            stat = os.fstat(file.fileno())
+            size = stat.st_size
+            if size and os.name != "nt":
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = file.read()
+        data = self.data
+        self._blocks = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.sign = None  # чем снимок индекса привязан к файлу; None - файл мал для снимка
+        if size >= SNAPSHOT_MIN_SIZE:
+            from storage.snapshot import load_snapshot, signature
+            self.sign = signature(stat, data)
+            index = load_snapshot(filename, self.sign) if snapshot else None
+            if index is not None:
+                self.has_categories, self.count, self.block_starts, self.first_rows = index
+                return
+        header_end = data.find(b"\n")
+        position = header_end + 1 if header_end >= 0 else size
+        # третья колонка Category необязательна: в старых файлах только Name;URL
+        self.has_categories = b";Category" in data[:max(header_end, 0)]
+        self.block_starts = []
+        self.first_rows = []  # номер первой строки в каждом блоке
+        rows = 0
+        while position < size:
+            end = data.find(b"\n", min(position + BLOCK_SIZE, size))
+            end = size if end < 0 else end + 1
+            self.block_starts.append(position)
+            self.first_rows.append(rows)
+            block = data[position:end]  # у mmap нет count, блок копируется один раз при открытии
+            rows += block.count(b"\n") + (0 if block.endswith(b"\n") else 1)
+            position = end
+        self.block_starts.append(size)
+        self.count = rows
+        if snapshot and self.sign is not None:
+            # следующее открытие - по снимку; открытие его не ждет
+            from storage.snapshot import save_snapshot
+            threading.Thread(target=save_snapshot, args=(filename, self.sign, self),
+                             name="atradio-snapshot", daemon=True).start()
+
+    def __len__(self):
+        return self.count
+
+    def row(self, index):
+        """Запись строки: (name, url) или (name, url, category)"""
+        block_index = bisect.bisect_right(self.first_rows, index) - 1
+        with self._lock:
+            block = self._blocks.get(block_index)
+            if block is None:
+                block = self._split(block_index)
+                self._blocks[block_index] = block
+                if len(self._blocks) > CACHED_BLOCKS:
+                    self._blocks.popitem(last=False)
+            else:
+                self._blocks.move_to_end(block_index)
+            line = index - self.first_rows[block_index]
+            station = block[line]
+            if type(station) is bytes:
+                station = block[line] = parse_row(station, self.has_categories)
+        return station
+
+    def __iter__(self):
+        # подряд по всем блокам без кэша: так сохраняется весь список
+        for block_index in range(len(self.first_rows)):
+            for line in self._split(block_index):
+                yield parse_row(line, self.has_categories)
+
+    def _split(self, block_index):
+        lines = self.data[self.block_starts[block_index]:self.block_starts[block_index + 1]].split(b"\n")
+        if not lines[-1]:
+            lines.pop()
+        return lines
+
+
+class StationCatalog:
+    """
+    Список станций поверх CsvRows с тем же интерфейсом, что у list кортежей (name, url).
+    Порядок строк хранится массивом номеров: неотрицательный - строка файла, отрицательный - станция,
+    добавленная или измененная в программе (-1 - added[0]). Пока список не менялся, массива нет совсем.
+    Категория станции хранится третьим элементом записи (name, url, category) и отдается
+    отдельно (category, records): станции списка всегда пары.
+    Номер станции в order постоянный (id_at): по нему станция находится после перестановок (index_of).
+    Память на станцию ограничена: 8 байт порядка и 8 байт обратного индекса для поиска, строки файла
+    разбираются только для видимой части списка.
+    """
+
+    def __init__(self, rows, order=None, added=None):
+        self.rows = rows
+        self.order = order  # array('q') или None - строки файла по порядку
+        self.added = added if added is not None else []  # только дополняется, копии списка делят его
+        # строки списка по номерам станций: (массив для строк файла, массив для добавленных), -1 - станции нет;
+        # строится для поиска
+        self._positions = None
+        self._found = (0, 0)  # последний ответ index_of: (номер станции, строка)
+
+    @classmethod
+    def open(cls, filename):
+        return cls(CsvRows(filename))
+
+    def __len__(self):
+        return len(self.rows) if self.order is None else len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._station(self._id(index))
+
+    def __setitem__(self, index, station):
+        """Замена станции; у пары (name, url) остается прежняя категория"""
+        index = self._index(index)
+        if len(station) == 2 and self.category(index):
+            station = (*station, self.category(index))
+        order = self._order(keep_positions=True)
+        station_id = self._add(station)
+        self._place(order[index], -1)
+        self._place(station_id, index)
+        order[index] = station_id
+
+    def __delitem__(self, index):
+        del self._order()[self._index(index)]
+
+    def __iter__(self):
+        if self.order is None:
+            for station in self.rows:
+                yield station if len(station) == 2 else station[:2]
+        else:
+            for station_id in self.order:
+                yield self._station(station_id)
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def append(self, station):
+        order = self._order(keep_positions=True)
+        station_id = self._add(station)
+        self._place(station_id, len(order))
+        order.append(station_id)
+
+    def insert(self, index, station):
+        self._order().insert(index, self._add(station))
+
+    def pop(self, index=-1):
+        station = self[index]
+        del self[index]
+        return station
+
+    def move(self, source, target):
+        """Переставляет станцию с source на target без разбора строк"""
+        order = self._order()
+        station_id = order.pop(self._index(source))
+        order.insert(target, station_id)
+
+    def swap(self, i, j):
+        order = self._order(keep_positions=True)
+        order[i], order[j] = order[j], order[i]
+        self._place(order[i], i)
+        self._place(order[j], j)
+
+    def id_at(self, index):
+        """Постоянный номер станции: не меняется при перемещениях, правке и удалении других станций"""
+        return self._id(index)
+
+    def index_of(self, station_id):
+        """
+        Строка списка станции с постоянным номером station_id или -1, если станции нет.
+        Запоминается последний ответ: станция находится за O(1) на прежней строке или соседней (перестановка,
+        удаление или вставка выше), иначе - одним просмотром массива порядка.
+        """
+        order = self.order
+        if order is None:
+            return station_id if 0 <= station_id < len(self.rows) else -1
+        found_id, found = self._found
+        if found_id == station_id:
+            for position in (found, found - 1, found + 1):
+                if 0 <= position < len(order) and order[position] == station_id:
+                    self._found = (station_id, position)
+                    return position
+        if self._positions is not None:
+            position = self._lookup(station_id)
+        else:
+            try:
+                position = order.index(station_id)
+            except ValueError:
+                return -1
+        if position >= 0:
+            self._found = (station_id, position)
+        return position
+
+    def items(self):
+        """Пары (номер станции, станция) по порядку списка"""
+        if self.order is None:
+            return enumerate(iter(self))
+        return ((station_id, self._station(station_id)) for station_id in self.order)
+
+    def category(self, index) -> str:
+        return category_of(self._record(self._id(index)))
+
+    def records(self):
+        """Записи (name, url[, category]) по порядку списка - для сохранения"""
+        if self.order is None:
+            return iter(self.rows)
+        return (self._record(station_id) for station_id in self.order)
+
+    def has_categories(self) -> bool:
+        return self.rows.has_categories or any(len(station) > 2 for station in self.added)
+
+    def positions(self, ids):
+        """Строки списка для номеров станций, по возрастанию; удаленные номера пропускаются"""
+        if self.order is None:
+            return sorted(ids)
+        if self._positions is None:
+            # обратный индекс строится один раз после перестановок, дальше обновляется точечно
+            in_file, added = array("q", [-1]) * len(self.rows), array("q", [-1]) * len(self.added)
+            for position, station_id in enumerate(self.order):
+                if station_id >= 0:
+                    in_file[station_id] = position
+                else:
+                    added[-1 - station_id] = position
+            self._positions = (in_file, added)
+        lookup = self._lookup
+        return sorted(position for position in map(lookup, ids) if position >= 0)
+
+    def extend_rows(self, rows):
+        """
+        Переход на rows - файл, который начинается строками прежнего файла каталога (импорт дописал станции
+        в конец): номера и порядок станций не меняются, новые строки встают в конец списка
+        """
+        if len(rows) < len(self.rows):
+            raise ValueError("в новом файле меньше строк, чем в прежнем")
+        if self.order is not None:
+            if self._positions is not None:
+                self._positions[0].extend(range(len(self.order), len(self.order) + len(rows) - len(self.rows)))
+            self.order.extend(range(len(self.rows), len(rows)))
+        self.rows = rows
+
+    def copy(self):
+        """Копия порядка строк: сами станции не копируются и не разбираются"""
+        return StationCatalog(self.rows, None if self.order is None else array("q", self.order), self.added)
+
+    def _order(self, keep_positions=False):
+        if self.order is None:
+            self.order = array("q", range(len(self.rows)))
+        if not keep_positions:
+            self._positions = None  # строки сдвинулись
+        return self.order
+
+    def _lookup(self, station_id):
+        in_file, added = self._positions
+        table, slot = (in_file, station_id) if station_id >= 0 else (added, -1 - station_id)
+        return table[slot] if slot < len(table) else -1
+
+    def _place(self, station_id, position):
+        """Точечное обновление обратного индекса: станция встала на position (-1 - ушла из списка)"""
+        if self._positions is None:
+            return
+        in_file, added = self._positions
+        if station_id < 0:
+            slot = -1 - station_id
+            if slot >= len(added):
+                added.extend([-1] * (slot + 1 - len(added)))
+            added[slot] = position
+        else:
+            in_file[station_id] = position
+
+    def _index(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("индекс станции вне списка")
+        return index
+
+    def _id(self, index):
+        index = self._index(index)
+        return index if self.order is None else self.order[index]
+
+    def _record(self, station_id):
+        return self.rows.row(station_id) if station_id >= 0 else self.added[-1 - station_id]
+
+    def _station(self, station_id):
+        station = self._record(station_id)
+        return station if len(station) == 2 else station[:2]
+
+    def _add(self, station):
+        self.added.append(tuple(station))
+        return -len(self.added)
@@ -0,0 +1,150 @@
+import bisect
+import threading
+from array import array
+
+from player.events import CATEGORIES
+from storage.catalog import category_of
+
+# вкладки по категориям станций: готовые номера строк списка для каждой категории
+
+
+class CategoryIndex:
+    """
+    Для каждой категории - строки списка ее станций по возрастанию (array('q')).
+    Вкладка показывает готовый массив (SearchView(stations, rows)), переключение вкладок ничего не фильтрует.
+    Добавление, удаление, правка и перемещение станций правят массивы на месте: затрагиваются только
+    строки в пределах сдвига, а не весь список. Индекс строится в фоне по копии списка;
+    изменения, пришедшие во время построения, применяются после него в том же порядке.
+    """
+
+    def __init__(self, bus=None):
+        self.bus = bus  # шина событий интерфейса: сообщает о готовности индекса
+        self.rows = {}  # категория -> array('q') строк списка
+        self.ready = False
+        self._pending = []  # изменения во время построения: (метод, аргументы)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def start(self, stations):
+        """Строит индекс по списку; каталог без категорий готов сразу"""
+        with self._lock:
+            self.rows = {}
+            self.ready = False
+            self._pending = []
+            self._generation += 1
+            generation = self._generation
+        if not stations.has_categories():
+            with self._lock:
+                self.ready = True
+            return
+        threading.Thread(target=self._build, args=(stations.copy(), generation), name="atradio-categories",
+                         daemon=True).start()
+
+    def names(self):
+        """Непустые категории по алфавиту - вкладки после «Все»"""
+        with self._lock:
+            return sorted(name for name, rows in self.rows.items() if rows)
+
+    def rows_of(self, category):
+        """Строки списка категории; массив живой - правки списка видны в нем сразу"""
+        return self.rows.get(category) or array("q")
+
+    def added(self, row, category):
+        """Станция добавлена в конец списка"""
+        self._change(self._added, row, category)
+
+    def deleted(self, row, category):
+        """Станция строки row удалена, строки ниже поднялись на одну"""
+        self._change(self._deleted, row, category)
+
+    def edited(self, row, old, new):
+        """У станции строки row сменилась категория"""
+        if old != new:
+            self._change(self._edited, row, old, new)
+
+    def swapped(self, i, j):
+        """Станции строк i и j поменялись местами"""
+        self._change(self._swapped, i, j)
+
+    def moved(self, source, target):
+        """Станция перенесена со строки source на target, станции между ними сдвинулись на одну"""
+        if source != target:
+            self._change(self._moved, source, target)
+
+    def _change(self, method, *args):
+        with self._lock:
+            if self.ready:
+                method(*args)
+            else:
+                self._pending.append((method, args))
+
+    def _build(self, stations, generation):
+        rows = {}
+        for row, record in enumerate(stations.records()):
+            category = category_of(record)
+            if category:
+                if category not in rows:
+                    rows[category] = array("q")
+                rows[category].append(row)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.rows = rows
+            for method, args in self._pending:
+                method(*args)
+            self._pending = []
+            self.ready = True
+        if self.bus is not None:
+            self.bus.publish(CATEGORIES)
+
+    def _added(self, row, category):
+        if category:
+            self.rows.setdefault(category, array("q")).append(row)
+
+    def _deleted(self, row, category):
+        for name, rows in self.rows.items():
+            start = bisect.bisect_left(rows, row)
+            if name == category and start < len(rows) and rows[start] == row:
+                del rows[start]
+            # строки ниже удаленной поднимаются на одну
+            for i in range(start, len(rows)):
+                rows[i] -= 1
+
+    def _edited(self, row, old, new):
+        if old:
+            rows = self.rows.get(old)
+            start = bisect.bisect_left(rows, row) if rows else 0
+            if rows and start < len(rows) and rows[start] == row:
+                del rows[start]
+        if new:
+            rows = self.rows.setdefault(new, array("q"))
+            rows.insert(bisect.bisect_left(rows, row), row)
+
+    def _swapped(self, i, j):
+        for rows in self.rows.values():
+            has_i = self._position(rows, i)
+            has_j = self._position(rows, j)
+            if (has_i is None) == (has_j is None):
+                continue  # обе станции в этой категории или обе не в ней - набор строк тот же
+            position, new = (has_i, j) if has_i is not None else (has_j, i)
+            del rows[position]
+            rows.insert(bisect.bisect_left(rows, new), new)
+
+    def _moved(self, source, target):
+        low, high = min(source, target), max(source, target)
+        shift = -1 if source < target else 1  # куда сдвигаются станции между source и target
+        for rows in self.rows.values():
+            start = bisect.bisect_left(rows, low)
+            end = bisect.bisect_right(rows, high)
+            if start == end:
+                continue
+            moved = self._position(rows, source) is not None
+            part = [row + shift for row in rows[start:end] if row != source]
+            if moved:
+                part.insert(0 if source > target else len(part), target)
+            rows[start:end] = array("q", part)
+
+    @staticmethod
+    def _position(rows, row):
+        position = bisect.bisect_left(rows, row)
+        return position if position < len(rows) and rows[position] == row else None
@@ -0,0 +1,288 @@
+import csv
+import hashlib
+import io
+import os
+import re
+import shutil
+import threading
+import time
+
+from player.events import IMPORT
+from storage.catalog import CsvRows
+
+# импорт станций из больших файлов M3U, PLS, JSON и CSV: файл читается потоком, в памяти - только ключи адресов
+
+# части адреса разбираются тем же шаблоном, которым он проверяется
+URL_PATTERN = re.compile(
+    r'^(?P<scheme>https?|ftp)://'  # http://, https:// или ftp://
+    r'(?P<host>(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # домен...
+    r'localhost|'  # или localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...или IP
+    r'(?::(?P<port>\d+))?'  # необязательный порт
+    r'(?P<rest>/?|[/?]\S+)$', re.IGNORECASE)
+FORMATS = {".m3u": "m3u", ".m3u8": "m3u", ".pls": "pls", ".json": "json", ".jsonl": "json", ".csv": "csv"}
+DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+EXTINF = re.compile(r'#EXTINF:[^,"]*(?:"[^"]*"[^,"]*)*,(.*)')  # запятые внутри атрибутов в кавычках не считаются
+GROUP_TITLE = re.compile(r'group-title="([^"]*)"')
+PLS_ENTRY = re.compile(r"(File|Title)(\d+)=(.*)", re.IGNORECASE)
+JSON_SEPARATORS = re.compile(r"[\s,\[\]]*")
+CHUNK_SIZE = 1 << 20
+
+
+def is_valid_url(url: str) -> bool:
+    """Проверяет, является ли строка валидным URL."""
+    return URL_PATTERN.match(url) is not None
+
+
+def normalize_url(url: str) -> str:
+    """
+    Проверенный адрес для хранения и сравнения: схема и хост в нижнем регистре, без порта по умолчанию
+    и #фрагмента. ValueError - некорректный адрес.
+    """
+    match = URL_PATTERN.match(url.strip())
+    if match is None:
+        raise ValueError(f"некорректный адрес: {url}")
+    scheme, host, port, rest = match.group("scheme", "host", "port", "rest")
+    scheme, host = scheme.lower(), host.lower()
+    if port is not None and int(port) != DEFAULT_PORTS[scheme]:
+        host += f":{int(port)}"
+    rest = rest.partition("#")[0]
+    return f"{scheme}://{host}{rest if rest.startswith('/') else '/' + rest}"
+
+
+def file_format(path: str, head: bytes = b""):
+    """m3u, pls, json или csv по расширению, иначе по началу файла"""
+    format_name = FORMATS.get(os.path.splitext(path)[1].lower())
+    if format_name:
+        return format_name
+    head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"#EXTM3U"):
+        return "m3u"
+    if head[:10].lower().startswith(b"[playlist]"):
+        return "pls"
+    if head[:1] in (b"[", b"{"):
+        return "json"
+    return "csv"
+
+
+def read_m3u(file):
+    """M3U и EXTM3U: название и group-title (или #EXTGRP) из #EXTINF, следом строка адреса"""
+    name = category = ""
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXTINF"):
+            match = EXTINF.match(line)
+            name = match.group(1) if match else ""
+            group = GROUP_TITLE.search(line)
+            category = group.group(1) if group else ""
+        elif line.startswith("#EXTGRP:"):
+            category = line[8:]
+        elif not line.startswith("#"):
+            yield name.strip() or line, line, category.strip()
+            name = category = ""
+
+
+def read_pls(file):
+    """PLS: FileN= и TitleN=; запись отдается, как только у нее есть и адрес, и название"""
+    pending = {}
+    for line in file:
+        match = PLS_ENTRY.match(line.strip())
+        if not match:
+            continue
+        entry = pending.setdefault(match.group(2), {})
+        entry[match.group(1).lower()] = match.group(3).strip()
+        if "file" in entry and "title" in entry:
+            del pending[match.group(2)]
+            yield entry["title"] or entry["file"], entry["file"], ""
+    for entry in pending.values():
+        if "file" in entry:
+            yield entry["file"], entry["file"], ""
+
+
+def read_json(file):
+    """
+    Массив объектов JSON (выгрузки каталогов вроде radio-browser) или JSON Lines: объекты разбираются
+    по одному из куска файла. Адрес - url_resolved или url, категория - category или genre.
+    Объект-обертка со списком внутри разбирается целиком.
+    """
+    import json
+    decoder = json.JSONDecoder()
+    buffer, position, finished = "", 0, False
+    while True:
+        position = JSON_SEPARATORS.match(buffer, position).end()
+        try:
+            if position == len(buffer):
+                raise ValueError("конец куска")
+            item, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if finished:
+                if position < len(buffer):
+                    raise ValueError(f"некорректный JSON: {buffer[position:position + 40]!r}")
+                return
+            chunk = file.read(CHUNK_SIZE)
+            buffer, position, finished = buffer[position:] + chunk, 0, not chunk
+            continue
+        yield from json_stations(item)
+
+
+def json_stations(item):
+    if isinstance(item, list):
+        for element in item:
+            yield from json_stations(element)
+    elif isinstance(item, dict):
+        url = item.get("url_resolved") or item.get("url") or item.get("stream")
+        if isinstance(url, str) and url:
+            name = item.get("name") or item.get("title") or url
+            category = item.get("category") or item.get("genre") or ""
+            yield str(name), url, category if isinstance(category, str) else ""
+        else:
+            for value in item.values():
+                if isinstance(value, list):
+                    yield from json_stations(value)
+
+
+def read_csv(file):
+    """CSV программы: Name;URL[;Category], заголовок необязателен"""
+    for row in csv.reader(file, delimiter=";"):
+        if len(row) < 2 or row[:2] == ["Name", "URL"]:
+            continue
+        yield row[0], row[1], row[2] if len(row) > 2 else ""
+
+
+READERS = {"m3u": read_m3u, "pls": read_pls, "json": read_json, "csv": read_csv}
+
+
+def url_key(url: str) -> bytes:
+    """Ключ адреса для поиска повторов: 16 байт blake2b, совпадение у разных адресов практически исключено"""
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+class StationImporter:
+    """
+    Импорт станций из файла в конец списка. Файл читается потоком, адреса проверяются и приводятся
+    к одному виду, повторы - в файле и с уже имеющимися станциями - отбрасываются по ключам адресов (url_key).
+    Новые станции пишутся во временный файл, затем собирается output: строки файла каталога без изменений
+    и следом новые. Каталог переходит на него (StationCatalog.extend_rows): номера прежних станций
+    не меняются, правки списка во время импорта сохраняются. Ход импорта - в счетчиках,
+    bus получает IMPORT не чаще раза в progress_interval сек и по окончании.
+    """
+
+    def __init__(self, path, stations, output, bus=None, progress_interval=0.2):
+        self.path = path
+        self.output = output
+        self.bus = bus
+        self.progress_interval = progress_interval
+        self.base = stations.rows  # файл каталога, к строкам которого дописываются новые
+        self.existing = stations.copy()
+        self.total = os.path.getsize(path)
+        self.position = 0  # сколько байт файла прочитано
+        self.read = 0
+        self.added = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.rows = None  # CsvRows собранного файла, когда импорт закончен
+        self.error = None
+        self.done = False
+        self.started = None
+        self.finished = None
+        self.cancelled = threading.Event()
+        self._published = 0.0
+
+    def start(self):
+        threading.Thread(target=self.run, name="atradio-import", daemon=True).start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def progress(self) -> float:
+        return self.position / self.total if self.total else 1.0
+
+    def rate(self) -> float:
+        """Станций в секунду"""
+        elapsed = (self.finished or time.monotonic()) - (self.started or time.monotonic())
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def run(self):
+        self.started = time.monotonic()
+        new_path = f"{self.output}.new"
+        try:
+            seen = set()  # ключи адресов
+            for name, url in self.existing:
+                for part in url.split():
+                    try:
+                        seen.add(url_key(normalize_url(part)))
+                    except ValueError:
+                        seen.add(url_key(part))
+            with open(new_path, "w", encoding="utf-8", newline="") as out:
+                with_categories = self._import(csv.writer(out, delimiter=";"), seen)
+            if not self.cancelled.is_set():
+                self._assemble(new_path, with_categories)
+        except (OSError, ValueError, UnicodeError, csv.Error) as e:
+            self.error = str(e)
+        finally:
+            try:
+                os.remove(new_path)
+            except OSError:
+                pass
+            self.finished = time.monotonic()
+            self.done = True
+            if self.bus is not None:
+                self.bus.publish(IMPORT, "done")
+
+    def _import(self, writer, seen):
+        """Пишет новые станции в writer; возвращает, есть ли у них категории"""
+        with_categories = False
+        with open(self.path, "rb") as raw:
+            format_name = file_format(self.path, raw.peek(64)[:64])
+            text = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+            for name, url, category in READERS[format_name](text):
+                self.read += 1
+                if self.read % 4096 == 0:
+                    self.position = raw.tell()
+                    if self.cancelled.is_set():
+                        break
+                    self._publish()
+                try:
+                    url = normalize_url(url)
+                except ValueError:
+                    self.invalid += 1
+                    continue
+                key = url_key(url)
+                if key in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(key)
+                name = " ".join(name.split()) or url
+                category = " ".join(category.split())
+                writer.writerow([name, url, category] if category else [name, url])
+                with_categories = with_categories or bool(category)
+                self.added += 1
+            self.position = self.total
+        return with_categories
+
+    def _assemble(self, new_path, with_categories):
+        """output: заголовок, строки файла каталога байт в байт, новые станции"""
+        data = self.base.data
+        header_end = data.find(b"\n")
+        body_start = header_end + 1 if header_end >= 0 else len(data)
+        categories = with_categories or self.base.has_categories
+        temp_path = f"{self.output}.tmp"
+        with open(temp_path, "wb") as out:
+            out.write(b"Name;URL;Category\n" if categories else b"Name;URL\n")
+            with memoryview(data) as view:
+                for start in range(body_start, len(data), CHUNK_SIZE):
+                    out.write(view[start:start + CHUNK_SIZE])
+            if len(data) > body_start and data[-1:] != b"\n":
+                out.write(b"\n")
+            with open(new_path, "rb") as new:
+                shutil.copyfileobj(new, out, CHUNK_SIZE)
+        os.replace(temp_path, self.output)
+        self.rows = CsvRows(self.output)
+
+    def _publish(self):
+        now = time.monotonic()
+        if self.bus is not None and now - self._published >= self.progress_interval:
+            self._published = now
+            self.bus.publish(IMPORT)
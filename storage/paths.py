@@ -0,0 +1,58 @@
+import os
+
+# расположение служебных файлов программы
+
+
+def cache_path(name: str) -> str:
+    """Путь к файлу кэша в ~/.cache/atradio (или $XDG_CACHE_HOME/atradio), каталог создается при необходимости"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    directory = os.path.join(base, "atradio")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def socket_path(name: str = "atradio.sock") -> str:
+    """Путь к управляющему сокету демона: $XDG_RUNTIME_DIR/atradio (доступен только пользователю) или каталог кэша"""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime:
+        return cache_path(name)
+    directory = os.path.join(runtime, "atradio")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def find_program(name: str):
+    """
+    Полный путь к программе из PATH (как which) или None.
+    Найденный путь запоминается в кэше; при следующем запуске хватает одного stat:
+    путь годен, пока PATH тот же, а файл на месте и его mtime не изменился.
+    """
+    import json
+    import shutil
+
+    cache_file = cache_path("programs.json")
+    search_path = os.environ.get("PATH", "")
+    try:
+        with open(cache_file, encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        cache = {}
+    entry = cache.get(name)
+    if entry and entry.get("search_path") == search_path:
+        try:
+            if os.stat(entry["path"]).st_mtime == entry["mtime"]:
+                return entry["path"]
+        except (OSError, KeyError):
+            pass
+    path = shutil.which(name)
+    if path is None:
+        return None
+    cache[name] = {"path": path, "mtime": os.stat(path).st_mtime, "search_path": search_path}
+    try:
+        temp = f"{cache_file}.tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump(cache, file)
+        os.replace(temp, cache_file)
+    except OSError:
+        pass  # без кэша путь просто ищется заново
+    return path
@@ -0,0 +1,256 @@
+import bisect
+import collections
+import re
+import threading
+import unicodedata
+from urllib.parse import urlsplit
+
+# поиск станций по словам названия и хоста url: индекс слов, а по словарю - триграммы и начала слов
+
+from player.events import INDEX
+
+WORD = re.compile(r"\w+")
+PREFIX_LENGTHS = (1, 2)  # слова запроса короче триграммы ищутся по началу слов
+EXACT_LIMIT = 20000  # больше совпадений - результат не собирается целиком, а досматривается по списку
+UNION_LIMIT = 200000  # слово запроса с меньшим числом совпадений проверяется по одному общему множеству
+
+
+def fold(text: str) -> str:
+    """Ключ для сравнения без учета регистра: ӘҠҘ -> әҡҙ, Ё -> е, совместимые символы Unicode приводятся к одному виду"""
+    return unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+
+
+def station_words(name: str, url: str):
+    """Слова названия и хоста станции"""
+    try:
+        host = urlsplit(url).hostname or ""
+    except ValueError:
+        host = ""
+    return set(WORD.findall(fold(f"{name} {host}")))
+
+
+def trigrams(word: str):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class SearchIndex:
+    """
+    Индекс для поиска по мере ввода. Станция подходит, если каждое слово запроса входит в какое-нибудь
+    ее слово (слово из одной-двух букв - с начала). Станции адресуются постоянными номерами каталога
+    (StationCatalog.id_at): перемещения индекс не трогают, а добавление, удаление и правка меняют одну станцию.
+    Триграммы строятся не по станциям, а по словарю слов, который в разы меньше.
+    Индекс строится в фоновом потоке; изменения, пришедшие во время построения, применяются после него.
+    """
+
+    def __init__(self, bus=None):
+        self.bus = bus  # шина событий интерфейса: сообщает о готовности индекса
+        self.stations = collections.defaultdict(set)  # слово -> номера станций
+        self.grams = collections.defaultdict(set)  # триграмма -> слова
+        self.prefixes = collections.defaultdict(set)  # начало слова -> слова
+        self.ready = False
+        self.built = 0  # сколько станций проиндексировано при построении
+        self.count = 0
+        self._pending = []  # изменения во время построения
+        self._generation = 0  # построение, начатое раньше последнего start, прекращается
+        self._lock = threading.Lock()
+
+    def start(self, items):
+        """Строит индекс в фоне; items - пары (номер станции, (name, url)), например StationCatalog.items()"""
+        with self._lock:
+            self.stations.clear()
+            self.grams.clear()
+            self.prefixes.clear()
+            self.ready = False
+            self.built = 0
+            self.count = 0
+            self._pending = []
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(target=self._build, args=(items, generation), name="atradio-search", daemon=True).start()
+
+    def add(self, station_id, name, url):
+        with self._lock:
+            if self.ready:
+                self._add(station_id, station_words(name, url))
+            else:
+                self._pending.append((self._add, station_id, name, url))
+
+    def remove(self, station_id, name, url):
+        """Удаляет станцию; name и url нужны, чтобы найти ее слова"""
+        with self._lock:
+            if self.ready:
+                self._remove(station_id, station_words(name, url))
+            else:
+                self._pending.append((self._remove, station_id, name, url))
+
+    def plan(self, query):
+        """
+        Для каждого слова запроса - множества станций подходящих слов словаря.
+        Станция подходит, если для каждого слова входит хотя бы в одно из его множеств.
+        None, если индекс еще строится или запрос пуст.
+        """
+        words = set(WORD.findall(fold(query)))
+        if not words:
+            return None
+        with self._lock:
+            if not self.ready:
+                return None
+            return [[self.stations[word] for word in self._words_with(part)] for part in words]
+
+    def search(self, query):
+        """Номера подходящих станций (set) или None, если индекс еще строится или запрос пуст"""
+        groups = self.plan(query)
+        return None if groups is None else matching(groups)
+
+    def _words_with(self, part):
+        """Слова словаря, содержащие part (короткий part - с начала слова)"""
+        if len(part) in PREFIX_LENGTHS:
+            return self.prefixes.get(part, ())
+        postings = sorted((self.grams.get(gram, set()) for gram in trigrams(part)), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return [word for word in candidates if part in word]
+
+    def _build(self, items, generation):
+        batch = []
+        for station_id, (name, url) in items:
+            batch.append((station_id, station_words(name, url)))
+            if len(batch) == 1000 and not self._add_batch(batch, generation):
+                return
+        if not self._add_batch(batch, generation):
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            for apply, station_id, name, url in self._pending:
+                apply(station_id, station_words(name, url))
+            self._pending = []
+            self.ready = True
+        if self.bus is not None:
+            self.bus.publish(INDEX)
+
+    def _add_batch(self, batch, generation):
+        # блокировка берется на пачку станций, а не на каждую: поиск во время построения не ждет долго
+        with self._lock:
+            if generation != self._generation:
+                return False
+            for station_id, words in batch:
+                self._add(station_id, words)
+            self.built += len(batch)
+        batch.clear()
+        return True
+
+    def _add(self, station_id, words):
+        self.count += 1
+        for word in words:
+            stations = self.stations.get(word)
+            if stations is None:
+                # новое слово в словаре
+                stations = self.stations[word] = set()
+                for gram in trigrams(word):
+                    self.grams[gram].add(word)
+                for length in PREFIX_LENGTHS:
+                    self.prefixes[word[:length]].add(word)
+            stations.add(station_id)
+
+    def _remove(self, station_id, words):
+        self.count -= 1
+        for word in words:
+            stations = self.stations.get(word)
+            if stations is None:
+                continue
+            stations.discard(station_id)
+            if not stations:
+                # слово больше не встречается - убираем его из словаря
+                del self.stations[word]
+                for gram in trigrams(word):
+                    self.grams[gram].discard(word)
+                for length in PREFIX_LENGTHS:
+                    self.prefixes[word[:length]].discard(word)
+
+
+def matching(groups):
+    """Точное множество станций по плану запроса; начинаем с самого редкого слова"""
+    found = None
+    for group in sorted(groups, key=lambda group: sum(map(len, group))):
+        if found is None:
+            found = set().union(*group)
+        else:
+            # пересечение перебирает меньшее из двух множеств, так что каждое слово стоит min(|found|, |ids|)
+            found = set().union(*(found & ids for ids in group))
+        if not found:
+            return set()
+    return found
+
+
+class SearchView:
+    """
+    Отфильтрованный список для интерфейса: rows - строки исходного списка по возрастанию.
+    Ведет себя как список станций, поэтому рисуется той же draw_stations_list.
+    При большом числе совпадений вместо rows задается match(номер станции): строки находятся
+    просмотром списка сверху по мере прокрутки (ensure), и первый экран готов сразу.
+    """
+
+    def __init__(self, stations, rows=None, match=None, estimate=0):
+        self.stations = stations
+        self.match = match
+        self.rows = [] if match is not None else rows  # None - весь список
+        self.complete = match is None
+        self.scanned = 0  # сколько строк списка уже просмотрено
+        self.estimate = estimate if match is not None else len(self)
+
+    def __len__(self):
+        return len(self.stations) if self.rows is None else len(self.rows)
+
+    def __getitem__(self, index):
+        return self.stations[self.row(index)]
+
+    def row(self, index):
+        """Строка исходного списка для строки представления"""
+        return index if self.rows is None else self.rows[index]
+
+    def index_of(self, row):
+        """Строка представления для строки исходного списка или -1"""
+        if self.rows is None:
+            return row
+        index = bisect.bisect_left(self.rows, row)
+        return index if index < len(self.rows) and self.rows[index] == row else -1
+
+    def ensure(self, count):
+        """Досматривает список, пока не найдено count строк или список не кончился"""
+        if self.complete:
+            return
+        rows, match, id_at = self.rows, self.match, self.stations.id_at
+        total = len(self.stations)
+        position = self.scanned
+        while len(rows) < count and position < total:
+            if match(id_at(position)):
+                rows.append(position)
+            position += 1
+        self.scanned = position
+        self.complete = position >= total
+
+
+def search_view(stations, index, query, exact_limit=EXACT_LIMIT):
+    """Представление списка для запроса; None, если индекс еще строится"""
+    if not query.strip():
+        return SearchView(stations)
+    groups = index.plan(query)
+    if groups is None:
+        return None if not index.ready else SearchView(stations, [])
+    # оценка числа совпадений в предположении, что слова запроса встречаются независимо
+    total = max(len(stations), 1)
+    estimate = total
+    for group in groups:
+        estimate *= min(sum(map(len, group)), total) / total
+    estimate = int(estimate)
+    if estimate <= exact_limit:
+        return SearchView(stations, stations.positions(matching(groups)))
+
+    # много мелких множеств одного слова дешевле один раз объединить, чем проверять каждое
+    groups = [[set().union(*group)] if len(group) > 1 and sum(map(len, group)) <= UNION_LIMIT else group
+              for group in groups]
+
+    def match(station_id):
+        return all(any(station_id in ids for ids in group) for group in groups)
+
+    return SearchView(stations, match=match, estimate=estimate)
@@ -0,0 +1,87 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from storage.paths import cache_path
+
+# двоичный снимок индекса строк файла станций: большой каталог открывается без подсчета строк
+
+SAMPLE_SIZE = 64 * 1024  # байт начала и конца файла в хэше
+MAGIC = b"ATRIDX01"
+# магия, размер и mtime_ns файла, хэш начала и конца, есть ли категории, строк, границ блоков;
+# 64 байта: массивы после заголовка выровнены
+HEADER = struct.Struct("<8sqq16s?qq7x")
+
+
+def snapshot_path(filename) -> str:
+    """Файл снимка в кэше программы: свой для каждого пути к файлу станций"""
+    key = hashlib.blake2b(os.path.abspath(filename).encode("utf-8"), digest_size=8).hexdigest()
+    return cache_path(f"catalog-{key}.idx")
+
+
+def signature(stat, data):
+    """
+    Чем снимок привязан к файлу: размер, mtime_ns и хэш первых и последних SAMPLE_SIZE байт.
+    Хэш всего файла стоил бы столько же, сколько подсчет строк, который снимок и заменяет;
+    правка в середине файла того же размера с восстановленным mtime не замечается.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(data[:SAMPLE_SIZE])
+    digest.update(data[max(stat.st_size - SAMPLE_SIZE, 0):stat.st_size])
+    return stat.st_size, stat.st_mtime_ns, digest.digest()
+
+
+def load_snapshot(filename, sign):
+    """
+    Индекс строк из снимка, если он сделан с того же файла (sign - signature), иначе None:
+    (has_categories, строк, начала блоков, номера первых строк блоков). Снимок отображается в память,
+    массивы - представления поверх него, читается только заголовок.
+    """
+    try:
+        with open(snapshot_path(filename), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size:
+                return None
+            if os.name != "nt":
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = file.read()  # иначе снимок нельзя подменить новым
+    except OSError:
+        return None
+    magic, file_size, mtime_ns, digest, has_categories, count, bounds = HEADER.unpack_from(data)
+    if magic != MAGIC or (file_size, mtime_ns, digest) != sign or size != HEADER.size + 8 * (2 * bounds - 1):
+        return None
+    numbers = memoryview(data)[HEADER.size:].cast("q")
+    return has_categories, count, numbers[:bounds], numbers[bounds:]
+
+
+def save_snapshot(filename, sign, rows):
+    """Пишет снимок индекса строк rows (CsvRows файла filename) атомарно; без снимка файл просто считается заново"""
+    path = snapshot_path(filename)
+    temp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp, "wb") as file:
+            file.write(HEADER.pack(MAGIC, *sign, rows.has_categories, rows.count, len(rows.block_starts)))
+            file.write(array("q", rows.block_starts).tobytes())
+            file.write(array("q", rows.first_rows).tobytes())
+        os.replace(temp, path)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+def refresh_snapshot(filename):
+    """Пересобирает снимок после записи файла станций; вызывается из фонового потока"""
+    from storage.catalog import CsvRows
+
+    try:
+        rows = CsvRows(filename, snapshot=False)
+    except OSError:
+        return
+    if rows.sign is not None:
+        save_snapshot(filename, rows.sign, rows)
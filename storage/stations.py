@@ -0,0 +1,200 @@
+import csv
+import json
+import os
+import threading
+import time
+
+from storage.catalog import StationCatalog, category_of
+
+# список станций в CSV: атомарная запись и отложенное сохранение в фоне
+
+
+def load_stations(filename):
+    stations = []
+    with open(filename, mode='r', encoding='utf-8') as file:
+        reader = csv.DictReader(file, delimiter=';')
+        for row in reader:
+            stations.append((row['Name'], row['URL']))
+    return stations
+
+
+def save_stations(filename, stations):
+    """
+    Пишет во временный файл и подменяет им прежний: при сбое на диске остается целый список.
+    Колонка Category пишется, только если у станций каталога есть категории.
+    """
+    with_categories = isinstance(stations, StationCatalog) and stations.has_categories()
+    temp_path = f"{filename}.tmp"
+    with open(temp_path, mode='w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file, delimiter=';')
+        if with_categories:
+            writer.writerow(['Name', 'URL', 'Category'])  # Заголовки
+            for record in stations.records():
+                writer.writerow([record[0], record[1], category_of(record)])
+        else:
+            writer.writerow(['Name', 'URL'])  # Заголовки
+            for name, url in stations:
+                writer.writerow([name, url])
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, filename)
+
+
+def apply_change(stations, change):
+    """Применяет к списку запись журнала: add, delete, edit или move"""
+    op = change[0]
+    if op == "add":
+        stations.append(tuple(change[1:]))  # name, url[, category]
+    elif op == "delete":
+        del stations[change[1]]
+    elif op == "edit":
+        stations[change[1]] = tuple(change[2:])
+    elif op == "move":
+        stations.move(change[1], change[2])
+    else:
+        raise ValueError(f"неизвестная операция журнала: {op}")
+
+
+class StationStore:
+    """
+    Сохранение списка станций без ожидания диска в интерфейсе.
+    Изменения копятся и пишутся в фоновом потоке после паузы delay сек: серия правок - одна запись файла.
+    С journal каждая правка сразу дописывается одной строкой в журнал (имя файла + .journal),
+    а CSV переписывается только при выходе или когда журнал вырос до compact_after записей.
+    """
+
+    def __init__(self, filename, delay: float = 0.5, journal: bool = False, compact_after: int = 1000):
+        self.filename = filename
+        self.journal_path = f"{filename}.journal"
+        self.delay = delay
+        self.journal = journal
+        self.compact_after = compact_after
+        self.writes = 0  # перезаписей CSV
+        self.journal_writes = 0  # дозаписей журнала
+        self.error = None
+        self._snapshot = None  # копия списка для следующей записи CSV
+        self._dirty = False
+        self._changes = []  # записи журнала, еще не попавшие на диск
+        self._journal_size = 0
+        self._changed_at = 0.0
+        self._closing = False
+        self._writing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="atradio-store", daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """Открывает CSV как ленивый каталог и доигрывает журнал, оставшийся после аварийного завершения"""
+        stations = StationCatalog.open(self.filename)
+        replayed = 0
+        try:
+            with open(self.journal_path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        apply_change(stations, json.loads(line))
+                    except (ValueError, IndexError, TypeError):
+                        break  # недописанная последняя строка
+                    replayed += 1
+        except OSError:
+            pass
+        if replayed or os.path.exists(self.journal_path):
+            # переносим доигранные правки в CSV и очищаем журнал
+            with self._cond:
+                self._snapshot = stations.copy()
+                self._dirty = True
+                self._changed_at = 0.0
+                self._cond.notify()
+        return stations
+
+    def changed(self, stations, change=None):
+        """
+        Сообщает об изменении списка; не блокирует.
+        change - запись журнала ("add", name, url[, category]), ("delete", i), ("edit", i, name, url[, category]),
+        ("move", i, j)
+        или None, если список заменен целиком.
+        """
+        snapshot = stations.copy()  # у каталога копируется только порядок строк
+        with self._cond:
+            self._snapshot = snapshot
+            self._changed_at = time.monotonic()
+            if self.journal and change is not None:
+                self._changes.append(change)
+                self._journal_size += 1
+                if self._journal_size >= self.compact_after:
+                    self._dirty, self._changed_at = True, 0.0
+            else:
+                self._dirty = True
+            self._cond.notify()
+
+    @property
+    def pending(self) -> bool:
+        """Есть изменения, еще не записанные на диск"""
+        return self._dirty or bool(self._changes) or self._writing
+
+    def flush(self):
+        """Пишет все накопленное прямо сейчас и ждет окончания записи"""
+        with self._cond:
+            if self._dirty:
+                self._changed_at = 0.0
+            self._cond.notify()
+            while self.pending and self._thread.is_alive():
+                self._cond.wait(0.05)
+
+    def close(self):
+        """Дописывает изменения; журнал сжимается в CSV и удаляется"""
+        with self._cond:
+            if self.journal and (self._journal_size or self._changes) and self._snapshot is not None:
+                self._dirty = True
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closing and not self._changes:
+                    if self._dirty:
+                        remaining = self._changed_at + self.delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                closing = self._closing
+                snapshot = None
+                if self._dirty and (closing or self._changed_at + self.delay <= time.monotonic()):
+                    # CSV включает все правки, журнал для них больше не нужен
+                    snapshot, self._snapshot, self._dirty = self._snapshot, None, False
+                    self._changes, self._journal_size = [], 0
+                changes, self._changes = self._changes, []
+                self._writing = True
+            try:
+                if changes:
+                    self._append_journal(changes)
+                if snapshot is not None:
+                    save_stations(self.filename, snapshot)
+                    self.writes += 1
+                    self._clear_journal()
+                    from storage.snapshot import refresh_snapshot
+                    refresh_snapshot(self.filename)  # следующий запуск откроет файл по снимку
+            except OSError as e:
+                self.error = str(e)
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+            if closing:
+                return
+
+    def _append_journal(self, changes):
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            for change in changes:
+                file.write(json.dumps(change, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.journal_writes += 1
+
+    def _clear_journal(self):
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from storage.catalog import StationCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "stations.csv"
+    path.write_text("Name;URL;Category\n" + "".join(
+        f"Station {number};http://s{number}.example.com/live;{'Jazz' if number % 2 else ''}\n"
+        for number in range(100)), encoding="utf-8")
+    return StationCatalog.open(str(path))
+
+
+def check(catalog, model):
+    """model - список (постоянный номер, станция) в порядке списка"""
+    assert list(catalog) == [station for _, station in model]
+    assert [catalog.id_at(index) for index in range(len(catalog))] == [station_id for station_id, _ in model]
+    for index, (station_id, _) in enumerate(model):
+        assert catalog.index_of(station_id) == index
+
+
+def test_ids_before_edits(catalog):
+    assert len(catalog) == 100
+    assert catalog.id_at(7) == 7 and catalog.index_of(7) == 7
+    assert catalog.index_of(100) == -1 and catalog.index_of(-1) == -1
+    assert catalog[7] == ("Station 7", "http://s7.example.com/live")
+    assert catalog.category(7) == "Jazz" and catalog.category(8) == ""
+
+
+def test_ids_follow_stations(catalog):
+    model = [(catalog.id_at(index), station) for index, station in enumerate(catalog)]
+    playing = catalog.id_at(50)
+
+    catalog.move(50, 0)
+    model.insert(0, model.pop(50))
+    assert catalog.index_of(playing) == 0
+
+    catalog.swap(0, 1)
+    model[0], model[1] = model[1], model[0]
+    assert catalog.index_of(playing) == 1
+
+    del catalog[0]
+    del model[0]
+    assert catalog.index_of(playing) == 0
+
+    catalog.insert(0, ("New", "http://new.example.com/"))
+    model.insert(0, (catalog.id_at(0), ("New", "http://new.example.com/")))
+    assert catalog.index_of(playing) == 1
+    check(catalog, model)
+
+
+def test_edited_station_gets_new_id(catalog):
+    old_id = catalog.id_at(3)
+    catalog[3] = ("Renamed", "http://s3.example.com/live")
+    assert catalog.index_of(old_id) == -1
+    assert catalog.id_at(3) < 0 and catalog.index_of(catalog.id_at(3)) == 3
+    assert catalog.category(3) == "Jazz"
+
+
+def test_removed_station(catalog):
+    station_id = catalog.id_at(10)
+    assert catalog.index_of(station_id) == 10
+    catalog.pop(10)
+    assert catalog.index_of(station_id) == -1
+
+
+def test_random_edits(catalog):
+    rng = random.Random(1)
+    model = [(catalog.id_at(index), station) for index, station in enumerate(catalog)]
+    for step in range(500):
+        operation = rng.choice(["swap", "move", "set", "append", "delete", "insert", "positions"])
+        size = len(model)
+        i, j = rng.randrange(size), rng.randrange(size)
+        if operation == "swap":
+            catalog.swap(i, j)
+            model[i], model[j] = model[j], model[i]
+        elif operation == "move":
+            catalog.move(i, j)
+            model.insert(j, model.pop(i))
+        elif operation == "set":
+            station = (f"Edited {step}", f"http://e{step}.example.com/")
+            catalog[i] = station
+            model[i] = (catalog.id_at(i), station)
+        elif operation == "append":
+            station = (f"Added {step}", f"http://a{step}.example.com/")
+            catalog.append(station)
+            model.append((catalog.id_at(-1), station))
+        elif operation == "insert":
+            station = (f"Inserted {step}", f"http://i{step}.example.com/")
+            catalog.insert(i, station)
+            model.insert(i, (catalog.id_at(i), station))
+        elif operation == "delete" and size > 10:
+            del catalog[i]
+            del model[i]
+        elif operation == "positions":
+            ids = [station_id for station_id, _ in rng.sample(model, 5)]
+            assert catalog.positions(ids) == sorted(catalog.index_of(station_id) for station_id in ids)
+        # играющая станция: ищется после каждой правки, как в главном цикле
+        station_id, _ = model[rng.randrange(len(model))]
+        assert model[catalog.index_of(station_id)][0] == station_id
+    check(catalog, model)
+
+
+def test_copy_keeps_ids(catalog):
+    catalog.move(5, 0)
+    copy = catalog.copy()
+    copy.move(0, 50)
+    assert catalog.index_of(catalog.id_at(0)) == 0
+    assert copy.index_of(catalog.id_at(0)) == 50
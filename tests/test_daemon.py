@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from benchmarks.bench_daemon import NullPlayer
+from player.daemon import VOLUME_MAX, PlayerDaemon, parse_request
+from player.events import EventBus
+from player.remote import DaemonClient, RemotePlayer
+
+STATIONS = [(f"Station {number}", f"http://s{number}.example.com/live") for number in range(5)]
+
+
+@pytest.mark.parametrize("line, request_", [
+    ("now", {"cmd": "now"}),
+    ("PLAY 3", {"cmd": "play", "station": 3}),
+    ("play http://s1.example.com/live", {"cmd": "play", "station": "http://s1.example.com/live"}),
+    ("Volume +10", {"cmd": "volume", "value": "+10"}),
+    ("list 100 20", {"cmd": "list", "offset": 100, "limit": 20}),
+    ('{"cmd": "play", "station": 3, "id": 1}', {"cmd": "play", "station": 3, "id": 1}),
+])
+def test_parse_request(line, request_):
+    assert parse_request(line) == request_
+
+
+def test_parse_request_rejects_broken_json():
+    with pytest.raises(ValueError):
+        parse_request('{"cmd": "play", ')
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def daemon():
+    """Демон с плеером без звука в фоновом asyncio-цикле; отдает путь к сокету"""
+    if not hasattr(socket, "AF_UNIX"):
+        pytest.skip("нужны unix-сокеты")
+    with tempfile.TemporaryDirectory() as directory:  # короткий путь: у сокета он ограничен
+        path = os.path.join(directory, "atradio.sock")
+        daemon = PlayerDaemon(NullPlayer(), STATIONS)
+        loop = asyncio.new_event_loop()
+        task = loop.create_task(daemon.serve(path))
+
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        assert wait_for(lambda: os.path.exists(path))
+        yield path
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join(5)
+        loop.close()
+        assert not os.path.exists(path)
+
+
+def test_commands_round_trip(daemon):
+    client = DaemonClient(daemon)
+    try:
+        assert client.request("now")["now"]["state"] == "stopped"
+        listed = client.request("list", offset=3, limit=10)
+        assert listed["total"] == 5 and listed["offset"] == 3
+        assert listed["stations"] == [list(station) for station in STATIONS[3:]]
+        now = client.request("play", station=1)["now"]
+        assert (now["index"], now["name"], now["url"]) == (1, "Station 1", "http://s1.example.com/live")
+        assert client.request("volume", value=VOLUME_MAX + 100)["volume"] == VOLUME_MAX
+        assert client.request("volume", value="-12")["volume"] == VOLUME_MAX - 12
+        assert client.request("stop")["now"]["state"] == "stopped"
+        with pytest.raises(ValueError, match="нет станции 9"):
+            client.request("play", station=9)
+        with pytest.raises(ValueError, match="неизвестная команда"):
+            client.request("dance")
+        assert client.request("now")["now"]["volume"] == VOLUME_MAX - 12  # соединение живо после ошибок
+    finally:
+        client.close()
+
+
+def test_short_form_and_ids(daemon):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(daemon)
+        file = sock.makefile("rwb")
+        # запросы без ожидания ответов: ответы приходят в том же порядке, id возвращается
+        file.write(b"volume 100\n\n" + json.dumps({"cmd": "now", "id": 7}).encode() + b"\nNOW\n{broken\n")
+        file.flush()
+        responses = [json.loads(file.readline()) for _ in range(4)]
+    assert responses[0] == {"ok": True, "volume": 100}
+    assert responses[1]["id"] == 7 and responses[1]["now"]["volume"] == 100
+    assert responses[2]["ok"] and "id" not in responses[2]
+    assert responses[3]["ok"] is False and responses[3]["error"]
+
+
+def test_remote_player(daemon):
+    bus = EventBus()
+    remote = RemotePlayer(daemon, bus)
+    other = DaemonClient(daemon)
+    try:
+        assert not remote.is_active()
+        remote.play("http://s2.example.com/live")
+        assert remote.url == "http://s2.example.com/live" and remote.is_active()
+        assert wait_for(lambda: remote.state == "playing")
+        remote.set_volume(300)
+        assert remote.volume == 300
+        # команды другого клиента приходят событиями watch
+        other.request("play", station=4)
+        assert wait_for(lambda: remote.index == 4 and remote.url == "http://s4.example.com/live")
+        assert bus.drain()
+        other.request("stop")
+        assert wait_for(lambda: not remote.is_active())
+        remote.switch("http://s3.example.com/live")
+        assert wait_for(lambda: remote.state == "playing" and remote.index is None)
+        remote.stop()
+        assert remote.state == "stopped"
+    finally:
+        other.close()
+        remote.close()
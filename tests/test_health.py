@@ -0,0 +1,83 @@
+import asyncio
+import socket
+
+import pytest
+
+from benchmarks.fake_stream import FakeStreamServer
+from player.health import check_urls, probe
+
+
+@pytest.fixture
+def server():
+    pages = {"/missing": (404, {}, b""),
+             "/moved": (302, {"Location": "/stream"}, b"")}
+    with FakeStreamServer(pages=pages) as fake:
+        yield fake
+
+
+def free_port():
+    """Порт, на котором никто не слушает"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_probe_ok(server):
+    result = asyncio.run(probe(server.url(), timeout=5))
+    assert result["ok"] and result["status"] == 200 and result["error"] is None
+    assert result["content_type"] == "audio/mpeg" and result["bitrate"] == 128
+    assert result["ttfb"] > 0
+
+
+def test_probe_http_error(server):
+    result = asyncio.run(probe(server.url("/missing"), timeout=5))
+    assert not result["ok"] and result["status"] == 404 and result["error"] == "HTTP 404"
+
+
+def test_probe_follows_redirect(server):
+    result = asyncio.run(probe(server.url("/moved"), timeout=5))
+    assert result["ok"] and result["status"] == 200
+    assert [path for _, path in server.requests] == ["/moved", "/stream"]
+
+
+def test_probe_connection_refused():
+    result = asyncio.run(probe(f"http://127.0.0.1:{free_port()}/stream", timeout=5))
+    assert not result["ok"] and result["status"] is None and result["error"]
+
+
+def test_probe_timeout():
+    with FakeStreamServer(response_delay=1.0) as server:
+        result = asyncio.run(probe(server.url(), timeout=0.2))
+    assert not result["ok"] and result["error"] == "таймаут"
+
+
+@pytest.mark.parametrize("url", ["http:///stream", "ftp://example.com/stream"])
+def test_probe_rejects_bad_url(url):
+    result = asyncio.run(probe(url, timeout=0.2))
+    assert not result["ok"] and result["status"] is None and result["error"]
+
+
+def test_check_urls_per_host_limit():
+    delay = 0.2
+    with FakeStreamServer(response_delay=delay) as server:
+        urls = [server.url(f"/stream{number}") for number in range(4)]
+        seen = []
+        results = asyncio.run(check_urls(urls + urls[:1], per_host=1, timeout=5,
+                                         on_result=lambda url, result: seen.append(url)))
+    assert sorted(results) == sorted(urls) and sorted(seen) == sorted(urls)
+    assert all(result["ok"] for result in results.values())
+    # к одному серверу - по одному подключению: запросы приходят не чаще раза в response_delay
+    moments = sorted(moment for moment, _ in server.requests)
+    assert len(moments) == len(urls)
+    assert all(later - earlier >= delay * 0.9 for earlier, later in zip(moments, moments[1:]))
+
+
+def test_check_urls_hosts_in_parallel():
+    delay = 0.3
+    with FakeStreamServer(response_delay=delay) as server:
+        # один сервер под двумя именами - для ограничения это разные хосты
+        urls = [server.url("/first"), server.url("/second").replace("127.0.0.1", "localhost")]
+        results = asyncio.run(check_urls(urls, per_host=1, timeout=5))
+    assert all(result["ok"] for result in results.values())
+    first, second = sorted(moment for moment, _ in server.requests)
+    assert second - first < delay
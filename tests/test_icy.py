@@ -0,0 +1,103 @@
+import asyncio
+import io
+import threading
+
+import pytest
+
+from benchmarks.fake_stream import MP3_FRAME, FakeStreamServer, IcyWriter, icy_block
+from player.icy import IcyProtocol, IcyReader, decode_title
+
+METAINT = 100
+HEAD = b"ICY 200 OK\r\nicy-name: Test\r\nicy-metaint: 100\r\n\r\n"
+
+
+class FakeTransport:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def stream(titles, audio=METAINT):
+    """Тело потока: после каждых METAINT байт звука - блок с очередным названием"""
+    out = io.BytesIO()
+    names = iter(titles)
+    writer = IcyWriter(out, METAINT, lambda: next(names))
+    writer.write(MP3_FRAME[:audio] * len(titles))
+    return out.getvalue()
+
+
+def feed(data, chunk_size):
+    """Отдает data протоколу кусками chunk_size байт, как сокет; возвращает протокол и названия"""
+    async def run():
+        titles = []
+        protocol = IcyProtocol(titles.append)
+        protocol.connection_made(FakeTransport())
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            buffer = protocol.get_buffer(len(chunk))
+            buffer[:len(chunk)] = chunk
+            protocol.buffer_updated(len(chunk))
+        return protocol, titles
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 99, 100, 101, 117, 4096])
+def test_titles_across_chunk_boundaries(chunk_size):
+    titles = ["Artist - First", "Artist - First", "Исполнитель - Вторая", "Third; with 'quotes'", "x" * 300]
+    protocol, seen = feed(HEAD + stream(titles), chunk_size)
+    assert protocol.metaint == METAINT and protocol.headers_ready.result()[0] == 200
+    # повтор названия не сообщается
+    assert seen == ["Artist - First", "Исполнитель - Вторая", "Third; with 'quotes'", "x" * 300]
+    assert protocol.state == "audio" and protocol.left == METAINT
+
+
+def test_empty_blocks_and_partial_block():
+    # блок нулевой длины - названия нет; последний блок оборван - название еще не готово
+    body = (MP3_FRAME[:METAINT] + icy_block("One") + MP3_FRAME[:METAINT] + b"\0"
+            + MP3_FRAME[:METAINT] + icy_block("Two")[:10])
+    protocol, seen = feed(HEAD + body, 13)
+    assert seen == ["One"] and protocol.state == "meta"
+
+
+def test_block_without_title():
+    block = b"StreamUrl='http://example.com';"
+    length = (len(block) + 15) // 16
+    body = MP3_FRAME[:METAINT] + bytes([length]) + block.ljust(length * 16, b"\0")
+    protocol, seen = feed(HEAD + body + MP3_FRAME[:METAINT] + icy_block("After"), 5)
+    assert seen == ["After"]
+
+
+def test_station_without_metadata():
+    protocol, seen = feed(b"HTTP/1.0 200 OK\r\nContent-Type: audio/mpeg\r\n\r\n" + MP3_FRAME, 7)
+    assert protocol.metaint == 0 and protocol.state == "done" and protocol.transport.closed
+    assert seen == []
+
+
+def test_broken_head():
+    protocol, _ = feed(b"garbage\r\n\r\n", 4)
+    assert protocol.error and protocol.state == "done" and protocol.transport.closed
+
+
+def test_decode_title():
+    assert decode_title("Песня".encode("utf-8")) == "Песня"
+    assert decode_title("Песня".encode("cp1251")) == "Песня"
+
+
+def test_reader_gets_title_from_server():
+    with FakeStreamServer(metaint=1000, realtime=False, title="Live - Song") as server:
+        got = threading.Event()
+        titles = []
+
+        def on_title(url, title):
+            titles.append((url, title))
+            got.set()
+
+        reader = IcyReader(server.url(), on_title, timeout=5)
+        reader.start()
+        try:
+            assert got.wait(5)
+        finally:
+            reader.stop()
+    assert titles[0] == (server.url(), "Live - Song") and reader.has_metadata
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from storage.catalog import StationCatalog
+from storage.importer import StationImporter, normalize_url, url_key
+
+EXISTING = "Name;URL\nFirst;http://first.example.com/live\n"
+
+
+def run_import(tmp_path, name, content):
+    stations_file = tmp_path / "stations.csv"
+    stations_file.write_text(EXISTING, encoding="utf-8")
+    source = tmp_path / name
+    source.write_text(content, encoding="utf-8")
+    importer = StationImporter(str(source), StationCatalog.open(str(stations_file)), str(tmp_path / "imported.csv"))
+    importer.run()
+    assert importer.error is None and importer.done
+    return importer
+
+
+def urls_of(importer):
+    return [station[1] for station in importer.rows]
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Radio.Example.COM/Live", "http://radio.example.com/Live"),
+    ("http://radio.example.com:80/live", "http://radio.example.com/live"),
+    ("https://radio.example.com:443/live#top", "https://radio.example.com/live"),
+    ("http://radio.example.com:8000", "http://radio.example.com:8000/"),
+    ("  http://10.0.0.1/live  ", "http://10.0.0.1/live"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_normalize_url_invalid():
+    with pytest.raises(ValueError):
+        normalize_url("radio.example.com/live")
+
+
+def test_url_key():
+    assert len(url_key("http://a.example.com/")) == 16
+    assert url_key("http://a.example.com/") != url_key("http://b.example.com/")
+
+
+def test_m3u(tmp_path):
+    importer = run_import(tmp_path, "list.m3u", (
+        "#EXTM3U\n"
+        '#EXTINF:-1 group-title="Jazz, Blues",Jazz One\n'
+        "http://jazz.example.com/live\n"
+        "#EXTINF:-1,Jazz Again\n"
+        "HTTP://JAZZ.example.com:80/live#x\n"
+        "#EXTINF:-1,Old\n"
+        "http://First.Example.com/live\n"
+        "#EXTINF:-1,Broken\n"
+        "not a url\n"))
+    assert (importer.added, importer.duplicates, importer.invalid) == (1, 2, 1)
+    assert list(importer.rows)[1:] == [("Jazz One", "http://jazz.example.com/live", "Jazz, Blues")]
+
+
+def test_pls(tmp_path):
+    importer = run_import(tmp_path, "list.pls", (
+        "[playlist]\n"
+        "File1=http://pls.example.com:8000/a\n"
+        "Title1=PLS A\n"
+        "File2=http://PLS.example.com:8000/a\n"
+        "Title2=PLS A again\n"
+        "File3=http://first.example.com:80/live\n"
+        "NumberOfEntries=3\n"))
+    assert (importer.added, importer.duplicates, importer.invalid) == (1, 2, 0)
+    assert urls_of(importer) == ["http://first.example.com/live", "http://pls.example.com:8000/a"]
+
+
+@pytest.mark.parametrize("name, content", [
+    ("list.json", json.dumps({"stations": [
+        {"name": "Json A", "url_resolved": "https://json.example.com/a", "genre": "Rock"},
+        {"name": "Json A copy", "url": "https://json.example.com:443/a"},
+        {"name": "Old", "url": "http://first.example.com/live"}]})),
+    ("list.jsonl", '{"name": "Json A", "url": "https://json.example.com/a", "category": "Rock"}\n'
+                   '{"name": "Json A copy", "url": "HTTPS://json.example.com/a"}\n'
+                   '{"name": "Old", "url": "http://first.example.com/live"}\n'),
+])
+def test_json(tmp_path, name, content):
+    importer = run_import(tmp_path, name, content)
+    assert (importer.added, importer.duplicates, importer.invalid) == (1, 2, 0)
+    assert list(importer.rows)[1:] == [("Json A", "https://json.example.com/a", "Rock")]
+
+
+def test_csv(tmp_path):
+    importer = run_import(tmp_path, "list.csv", (
+        "Name;URL;Category\n"
+        "Csv A;http://csv.example.com/a;News\n"
+        "Csv B;http://csv.example.com/b\n"
+        "Csv A copy;http://CSV.example.com:80/a;News\n"
+        "Old;http://first.example.com/live\n"))
+    assert (importer.added, importer.duplicates, importer.invalid) == (2, 2, 0)
+    assert urls_of(importer) == ["http://first.example.com/live", "http://csv.example.com/a",
+                                 "http://csv.example.com/b"]
+
+
+def test_import_keeps_existing_rows(tmp_path):
+    importer = run_import(tmp_path, "list.m3u", "#EXTM3U\nhttp://new.example.com/live\n")
+    assert list(importer.rows) == [("First", "http://first.example.com/live"),
+                                   ("http://new.example.com/live", "http://new.example.com/live")]
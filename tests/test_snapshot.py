@@ -0,0 +1,112 @@
+import os
+import time
+
+import pytest
+
+from storage.catalog import SNAPSHOT_MIN_SIZE, CsvRows
+from storage.snapshot import HEADER, load_snapshot, refresh_snapshot, snapshot_path
+
+
+@pytest.fixture
+def stations_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = tmp_path / "stations.csv"
+    lines = [f"Station {number};http://s{number}.example.com/live\n" for number in range(40000)]
+    path.write_text("Name;URL\n" + "".join(lines), encoding="utf-8")
+    assert path.stat().st_size >= SNAPSHOT_MIN_SIZE
+    refresh_snapshot(str(path))
+    return str(path)
+
+
+def current_sign(filename):
+    return CsvRows(filename, snapshot=False).sign
+
+
+def wait_snapshot(filename, sign, timeout=10.0):
+    """Снимок пишется в фоне: ждет, пока он станет годен для sign"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        index = load_snapshot(filename, sign)
+        if index is not None:
+            return index
+        time.sleep(0.01)
+    return None
+
+
+def rewrite(filename, offset, data, keep_mtime=True):
+    """Правка на месте без смены размера; keep_mtime - с прежним временем изменения"""
+    stat = os.stat(filename)
+    with open(filename, "r+b") as file:
+        file.seek(offset)
+        file.write(data)
+    if keep_mtime:
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def test_snapshot_matches_counted_rows(stations_file):
+    counted = CsvRows(stations_file, snapshot=False)
+    index = load_snapshot(stations_file, counted.sign)
+    assert index is not None
+    has_categories, count, block_starts, first_rows = index
+    assert (has_categories, count) == (counted.has_categories, counted.count)
+    assert list(block_starts) == counted.block_starts and list(first_rows) == counted.first_rows
+    loaded = CsvRows(stations_file)
+    assert len(loaded) == 40000 and loaded.row(39999) == ("Station 39999", "http://s39999.example.com/live")
+
+
+def test_append_invalidates_snapshot(stations_file):
+    old_sign = current_sign(stations_file)
+    with open(stations_file, "a", encoding="utf-8") as file:
+        file.write("New;http://new.example.com/live\n")
+    sign = current_sign(stations_file)
+    assert sign != old_sign and load_snapshot(stations_file, sign) is None
+    rows = CsvRows(stations_file)
+    assert len(rows) == 40001 and rows.row(40000) == ("New", "http://new.example.com/live")
+    # новый снимок пишется в фоне, следующее открытие идет по нему
+    assert wait_snapshot(stations_file, rows.sign)[1] == 40001
+
+
+@pytest.mark.parametrize("where", ["head", "tail"])
+def test_same_size_edit_with_old_mtime_is_noticed_at_ends(stations_file, where):
+    sign = current_sign(stations_file)
+    offset = len("Name;URL\n") if where == "head" else os.path.getsize(stations_file) - len("live\n")
+    rewrite(stations_file, offset, b"X")
+    new_sign = current_sign(stations_file)
+    assert new_sign[:2] == sign[:2] and new_sign != sign
+    assert load_snapshot(stations_file, new_sign) is None
+
+
+def test_same_size_edit_in_middle_is_noticed_by_mtime(stations_file):
+    sign = current_sign(stations_file)
+    rewrite(stations_file, os.path.getsize(stations_file) // 2, b"X", keep_mtime=False)
+    os.utime(stations_file, ns=(sign[1] + 1_000_000, sign[1] + 1_000_000))
+    assert load_snapshot(stations_file, current_sign(stations_file)) is None
+
+
+def test_same_size_edit_in_middle_with_old_mtime_is_not_noticed(stations_file):
+    # известное ограничение: весь файл не хэшируется
+    sign = current_sign(stations_file)
+    rewrite(stations_file, os.path.getsize(stations_file) // 2, b"X")
+    assert current_sign(stations_file) == sign
+    assert load_snapshot(stations_file, sign) is not None
+
+
+def test_damaged_snapshot_is_ignored(stations_file):
+    sign = current_sign(stations_file)
+    path = snapshot_path(stations_file)
+    with open(path, "r+b") as file:
+        file.truncate(HEADER.size + 8)
+    assert load_snapshot(stations_file, sign) is None
+    with open(path, "wb") as file:
+        file.write(b"garbage")
+    assert load_snapshot(stations_file, sign) is None
+    assert len(CsvRows(stations_file)) == 40000
+
+
+def test_small_file_has_no_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = tmp_path / "small.csv"
+    path.write_text("Name;URL\nOne;http://one.example.com/\n", encoding="utf-8")
+    assert CsvRows(str(path)).sign is None
+    refresh_snapshot(str(path))
+    assert not os.path.exists(snapshot_path(str(path)))
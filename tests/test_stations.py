@@ -0,0 +1,112 @@
+import os
+import time
+
+import pytest
+
+from storage.catalog import StationCatalog
+from storage.stations import StationStore, apply_change, load_stations, save_stations
+
+STATIONS = [(f"Station {number}", f"http://s{number}.example.com/live") for number in range(10)]
+
+
+@pytest.fixture
+def stations_file(tmp_path):
+    path = str(tmp_path / "stations.csv")
+    save_stations(path, STATIONS)
+    return path
+
+
+def edit(store, stations, change):
+    apply_change(stations, change)
+    store.changed(stations, change)
+
+
+def test_save_and_load(stations_file):
+    assert load_stations(stations_file) == STATIONS
+    assert list(StationCatalog.open(stations_file)) == STATIONS
+    assert not os.path.exists(f"{stations_file}.tmp")
+
+
+def test_failed_save_keeps_old_file(stations_file):
+    def broken():
+        yield "New", "http://new.example.com/"
+        raise OSError("диск отвалился")
+
+    with pytest.raises(OSError):
+        save_stations(stations_file, broken())
+    assert load_stations(stations_file) == STATIONS
+
+
+def test_changes_are_debounced(stations_file):
+    store = StationStore(stations_file, delay=0.3)
+    stations = store.load()
+    for number in range(20):
+        edit(store, stations, ("edit", 0, f"Renamed {number}", "http://s0.example.com/live"))
+    assert store.pending and store.writes == 0
+    time.sleep(0.1)
+    assert store.writes == 0  # серия правок еще идет
+    deadline = time.monotonic() + 5
+    while store.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.writes == 1 and store.error is None
+    assert load_stations(stations_file)[0] == ("Renamed 19", "http://s0.example.com/live")
+    store.close()
+    assert store.writes == 1
+
+
+def test_flush_writes_at_once(stations_file):
+    store = StationStore(stations_file, delay=60)
+    stations = store.load()
+    edit(store, stations, ("add", "New", "http://new.example.com/"))
+    store.flush()
+    assert store.writes == 1 and not store.pending
+    assert load_stations(stations_file)[-1] == ("New", "http://new.example.com/")
+    store.close()
+
+
+def test_journal_defers_csv_until_close(stations_file):
+    store = StationStore(stations_file, delay=0, journal=True)
+    stations = store.load()
+    edit(store, stations, ("move", 0, 9))
+    edit(store, stations, ("delete", 0))
+    store.flush()
+    assert store.writes == 0 and store.journal_writes >= 1
+    assert os.path.exists(store.journal_path)
+    assert load_stations(stations_file) == STATIONS
+    store.close()
+    assert store.writes == 1 and not os.path.exists(store.journal_path)
+    assert load_stations(stations_file) == STATIONS[2:] + STATIONS[:1]
+
+
+def test_journal_compacts(stations_file):
+    store = StationStore(stations_file, delay=0, journal=True, compact_after=3)
+    stations = store.load()
+    for number in range(3):
+        edit(store, stations, ("add", f"New {number}", f"http://new{number}.example.com/"))
+    store.flush()
+    assert store.writes == 1 and not os.path.exists(store.journal_path)
+    assert len(load_stations(stations_file)) == 13
+    store.close()
+
+
+def test_journal_replay_after_crash(stations_file):
+    store = StationStore(stations_file, delay=0, journal=True)
+    stations = store.load()
+    edit(store, stations, ("add", "New", "http://new.example.com/", "Jazz"))
+    edit(store, stations, ("edit", 1, "Renamed", "http://s1.example.com/live"))
+    edit(store, stations, ("move", 10, 0))
+    store.flush()
+    expected = list(stations)
+    # процесс упал, не закрыв хранилище: последняя строка журнала дописана наполовину
+    with open(store.journal_path, "a", encoding="utf-8") as file:
+        file.write('["delete", ')
+
+    restarted = StationStore(stations_file, delay=0, journal=True)
+    replayed = restarted.load()
+    assert list(replayed) == expected
+    assert replayed.category(0) == "Jazz"
+    restarted.flush()
+    # доигранные правки перенесены в CSV, журнал очищен
+    assert restarted.writes == 1 and not os.path.exists(restarted.journal_path)
+    assert load_stations(stations_file) == expected
+    restarted.close()
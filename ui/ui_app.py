@@ -9,7 +9,24 @@ def draw_header(stdscr, title, sub_title):
     sub_title_x = max(0, w//2 - len(sub_title)//2)
     stdscr.addstr(1, sub_title_x, sub_title, curses.A_DIM)
 
-def draw_stations_list(stdscr, stations, current_row, offset, playing_index, move_mode, max_display):
+def draw_tabs(stdscr, tabs, active):
+    """Вкладки категорий в строке над списком; если не помещаются, сдвигаются так, чтобы была видна активная"""
+    h, w = stdscr.getmaxyx()
+    labels = [f" {name} " for name in tabs]
+    first = 0
+    while first < active and sum(len(label) + 1 for label in labels[first:active + 1]) > w:
+        first += 1
+    x = 0
+    for index in range(first, len(labels)):
+        if x + len(labels[index]) > w:
+            break
+        try:
+            stdscr.addstr(2, x, labels[index], curses.A_REVERSE if index == active else curses.A_DIM)
+        except curses.error:
+            pass
+        x += len(labels[index]) + 1
+
+def draw_stations_list(stdscr, stations, current_row, offset, playing_index, move_mode, max_display, badge=None):
     h, w = stdscr.getmaxyx()
     for idx in range(offset, min(offset + max_display, len(stations))):
         name, url = stations[idx]
@@ -17,6 +34,16 @@ def draw_stations_list(stdscr, stations, current_row, offset, playing_index, mov
         y = idx - offset + 3
         
         try:
+            # значок доступности потока в первой колонке
+            if badge is not None:
+                mark = badge(url)
+                if mark == "●":
+                    try:
+                        stdscr.addstr(y, 0, mark, curses.color_pair(2))
+                    except curses.error:
+                        stdscr.addstr(y, 0, mark)
+                else:
+                    stdscr.addstr(y, 0, mark, curses.A_DIM)
             if idx == current_row:
                 if move_mode:
                     try:
@@ -44,7 +71,7 @@ def draw_stations_list(stdscr, stations, current_row, offset, playing_index, mov
         except curses.error:
             pass
 
-def draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index):
+def draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index, player_info="", now_title=""):
     h, w = stdscr.getmaxyx()
     
     # Инициализируем status_text значением по умолчанию
@@ -52,13 +79,24 @@ def draw_status_lines(stdscr, stations, current_row, playing_index, current_volu
     
     # Строка состояния проигрывания
     status_line = h-3
+    # название песни из метаданных потока
+    title_part = f" «{now_title}»" if now_title else ""
     if playing_index >= 0:
         if move_mode_playing:
-            status_text = f"Сейчас играет: {stations[moving_index][0]} -> громкость {current_volume} из 512"
+            status_text = f"Сейчас играет: {stations[moving_index][0]}{title_part} -> громкость {current_volume} из 512"
         else:
             if not move_mode:
-                status_text = f"Сейчас играет: {stations[playing_index][0]} -> громкость {current_volume} из 512"
+                status_text = f"Сейчас играет: {stations[playing_index][0]}{title_part} -> громкость {current_volume} из 512"
+        # состояние плеера: подключение, время старта звука, ошибка
+        if player_info:
+            status_text = f"{status_text} | {player_info}"
 
+    try:
+        # строка обновляется без полной перерисовки, стираем остаток прошлого текста
+        stdscr.move(status_line, 0)
+        stdscr.clrtoeol()
+    except curses.error:
+        pass
     try:
         stdscr.addstr(status_line, 0, status_text, curses.color_pair(2) | curses.A_BOLD)
     except:
@@ -81,7 +119,7 @@ def draw_status_lines(stdscr, stations, current_row, playing_index, current_volu
         pass
 def draw_help_line(stdscr, move_mode):
     h, w = stdscr.getmaxyx()
-    help_line = " Ins: добавить | Del: удалить | F2: сохранить |F3: переместить | F4: изменить | F5: загрузить |F10: выход "
+    help_line = " ←/→: вкладки | /: поиск | Ins: добавить | Del: удалить | F2: сохранить |F3: переместить | F4: изменить | F5: загрузить |F10: выход "
     help_line_f3 = " ↑: переместить вверх | ↓: переместить вниз | Enter: закрепить перемешение | Esc: отмена перемещения"
     title_x = max(0, w//2 - len(help_line)//2)
     try:
@@ -92,8 +130,48 @@ def draw_help_line(stdscr, move_mode):
     except curses.error:
         pass
 
-def full_redraw(stdscr, stations, current_row, offset, playing_index, move_mode, move_mode_playing, current_volume, moving_index):
-    stdscr.clear()
+def draw_overlay(stdscr, text):
+    """Строка замеров (--profile) вместо подзаголовка"""
+    h, w = stdscr.getmaxyx()
+    try:
+        stdscr.move(1, 0)
+        stdscr.clrtoeol()
+        stdscr.addstr(1, 0, text[:w - 1], curses.A_REVERSE)
+    except curses.error:
+        pass
+
+def draw_search_line(stdscr, query, found):
+    """Строка поиска вместо строки подсказки"""
+    h, w = stdscr.getmaxyx()
+    text = f" /{query}"
+    try:
+        stdscr.move(h-1, 0)
+        stdscr.clrtoeol()
+        stdscr.addstr(h-1, 0, text, curses.A_BOLD)
+        stdscr.addstr(h-1, len(text) + 2, f"{found} | Enter: играть | Esc: выход из поиска", curses.A_DIM)
+    except curses.error:
+        pass
+
+def search_redraw(stdscr, stations, view, search_row, search_offset, current_row, playing_index, current_volume, query, found, player_info="", badge=None, now_title=""):
+    """Экран поиска: список найденных станций; строки состояния - по всему списку"""
+    stdscr.erase()
+    h, w = stdscr.getmaxyx()
+    if h < 5 or w < 40:
+        stdscr.addstr(0, 0, "Terminal too small! Please resize.", curses.A_BOLD)
+        stdscr.refresh()
+        return False
+    draw_header(stdscr, "Поиск радиостанций", "(набирайте название или адрес, ↑/↓ - выбор)")
+    draw_stations_list(stdscr, view, search_row, search_offset, view.index_of(playing_index), False, h - 6, badge)
+    draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, False, False, -1, player_info, now_title)
+    draw_search_line(stdscr, query, found)
+    stdscr.refresh()
+    return True
+
+def full_redraw(stdscr, stations, current_row, offset, playing_index, move_mode, move_mode_playing, current_volume, moving_index, player_info="", badge=None, now_title="", view=None, tabs=None, tab=0):
+    # view - станции вкладки категории (SearchView): current_row и offset считаются в нем,
+    # а строки состояния показывают станции всего списка
+    # erase, а не clear: curses перерисует только изменившиеся символы, а не весь терминал
+    stdscr.erase()
     h, w = stdscr.getmaxyx()
     
     # Проверяем минимальный размер терминала
@@ -105,11 +183,40 @@ def full_redraw(stdscr, stations, current_row, offset, playing_index, move_mode,
     max_display = h - 6
     
     draw_header(stdscr, "Список радиостанций", "(Enter - играть, ESC - остановить, q - выход)")
-    draw_stations_list(stdscr, stations, current_row, offset, playing_index, move_mode, max_display)
-    draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index)
+    if tabs:
+        draw_tabs(stdscr, tabs, tab)
+    if view is not None:
+        draw_stations_list(stdscr, view, current_row, offset, view.index_of(playing_index), move_mode, max_display, badge)
+        current_row = view.row(current_row) if len(view) else 0
+    else:
+        draw_stations_list(stdscr, stations, current_row, offset, playing_index, move_mode, max_display, badge)
+    draw_status_lines(stdscr, stations, current_row, playing_index, current_volume, move_mode, move_mode_playing, moving_index, player_info, now_title)
     draw_help_line(stdscr, move_mode)
     
     stdscr.refresh()
     return True
 
-# END функции перерисовки частей интерфейса UI
\ No newline at end of file
+# END функции перерисовки частей интерфейса UI
+
+# навигация по списку: только арифметика над номерами строк, станции не перебираются
+
+def scroll_offset(row, offset, max_display):
+    """Смещение списка, при котором строка row видна на экране"""
+    if row < offset:
+        return row
+    if row >= offset + max_display:
+        return row - max_display + 1
+    return offset
+
+def page_position(key, current_row, offset, max_display, count):
+    """Новые (current_row, offset) для PgUp, PgDn, Home и End"""
+    max_display = max(max_display, 1)
+    last_offset = max(count - max_display, 0)
+    if key == curses.KEY_HOME:
+        return 0, 0
+    if key == curses.KEY_END:
+        return count - 1, last_offset
+    step = max_display if key == curses.KEY_NPAGE else -max_display
+    row = min(max(current_row + step, 0), count - 1)
+    offset = min(max(offset + step, 0), last_offset)
+    return row, scroll_offset(row, offset, max_display)
\ No newline at end of file
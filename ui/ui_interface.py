@@ -1,5 +1,8 @@
+import collections
 import curses
-import re
+import os
+import select
+import sys
 
 
 def get_input(stdscr, prompt, y, x):
@@ -11,6 +14,63 @@ def get_input(stdscr, prompt, y, x):
     return input_str
 
 
+def read_key(stdscr, wide=False):
+    """Код клавиши; с wide символы возвращаются строкой (get_wch), чтобы вводить кириллицу. -1 - клавиши нет"""
+    if not wide:
+        return stdscr.getch()
+    try:
+        return stdscr.get_wch()
+    except curses.error:
+        return -1
+
+
+def read_pending(stdscr, wide=False):
+    """Клавиши, уже лежащие в буфере ввода, без ожидания"""
+    keys = []
+    stdscr.timeout(0)
+    while True:
+        key = read_key(stdscr, wide)
+        if key == -1:
+            break
+        keys.append(key)
+    stdscr.timeout(-1)
+    return keys
+
+
+def wait_keys(stdscr, wakeup=None, wide=False, timeout=None):
+    """
+    Ждет нажатия клавиши, сигнала от wakeup (объект с fileno(), например шина событий плеера)
+    или истечения timeout сек и забирает все накопившиеся клавиши разом: при автоповторе и вставке
+    текста интерфейс обрабатывает пачку, а не перерисовывается после каждой клавиши.
+    Пустой список - ожидание прервало событие или таймаут.
+    """
+    keys = read_pending(stdscr, wide)  # клавиши могли уже лежать в буфере curses
+    if keys:
+        return keys
+    if os.name == "nt":
+        # в Windows select не работает с консолью, ждем клавишу с коротким таймаутом
+        stdscr.timeout(100 if timeout is None else min(100, int(timeout * 1000)))
+        key = read_key(stdscr, wide)
+        stdscr.timeout(-1)
+        return [key] + read_pending(stdscr, wide) if key != -1 else []
+    select.select([sys.stdin] + ([wakeup] if wakeup is not None else []), [], [], timeout)
+    return read_pending(stdscr, wide)
+
+
+def unread_keys(keys):
+    """
+    Возвращает клавиши в буфер curses в прежнем порядке: их прочитает диалог или режим,
+    которому они предназначались. keys - пары (клавиша, сколько раз подряд)
+    """
+    for key, repeat in reversed(keys):
+        if isinstance(key, str):
+            for char in reversed(key * repeat):
+                curses.unget_wch(char)
+        else:
+            for _ in range(repeat):
+                curses.ungetch(key)
+
+
 def text_field(stdscr, y, x, width, initial_text="", russian=False):
     """
     если нажали Esc, то возвращается None, иначе возвращается строка
@@ -74,26 +134,31 @@ def text_field_unicode(stdscr, y, x, width, initial_text="", russian=False):
     text = list(initial_text)
     cursor_pos = len(text)
     curses.curs_set(1)
+    pending = collections.deque()  # клавиши, пришедшие пачкой (вставка текста): поле рисуется раз на пачку
     
     while True:
-        # Отрисовываем текущий текст
-        stdscr.addstr(y, x, " " * width)
-        display_text = "".join(text)[:width]
-        try:
-            stdscr.addstr(y, x, display_text)
-        except curses.error:
-            pass
-        
-        stdscr.move(y, x + min(cursor_pos, width-1))
-        
-        try:
-            # Используем get_wch() для Unicode символов
-            if hasattr(stdscr, 'get_wch'):
-                key = stdscr.get_wch()
-            else:
-                key = stdscr.getch()
-        except curses.error:
-            continue
+        if pending:
+            key = pending.popleft()
+        else:
+            # Отрисовываем текущий текст
+            stdscr.addstr(y, x, " " * width)
+            display_text = "".join(text)[:width]
+            try:
+                stdscr.addstr(y, x, display_text)
+            except curses.error:
+                pass
+
+            stdscr.move(y, x + min(cursor_pos, width-1))
+
+            try:
+                # Используем get_wch() для Unicode символов
+                if hasattr(stdscr, 'get_wch'):
+                    key = stdscr.get_wch()
+                else:
+                    key = stdscr.getch()
+            except curses.error:
+                continue
+            pending.extend(read_pending(stdscr, wide=hasattr(stdscr, 'get_wch')))
         
         # Обработка специальных клавиш (числовые коды)
         if isinstance(key, int):
@@ -272,21 +337,9 @@ def show_confirmation(stdscr, message, options=["Да", "Нет"], default=0):
     return result
 
 
-def is_valid_url(url: str) -> bool:
-    """Проверяет, является ли строка валидным URL."""
-    # Простая проверка URL (можно расширить при необходимости)
-    url_pattern = re.compile(
-        r'^(https?|ftp)://'  # http://, https:// или ftp://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # домен...
-        r'localhost|'  # или localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...или IP
-        r'(?::\d+)?'  # необязательный порт
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    
-    return re.match(url_pattern, url) is not None
-
 def get_valid_url(stdscr, y, x, max_len, initial_text=""):
     """Запрашивает URL с проверкой корректности, повторяя ввод при ошибке"""
+    from storage.importer import is_valid_url  # шаблоны импорта компилируются при первом диалоге, не при запуске
     while True:
         # Очищаем строку с предыдущим сообщением об ошибке
         stdscr.addstr(y+1, x, " " * 50)  # Очищаем строку под полем ввода
@@ -298,9 +351,10 @@ def get_valid_url(stdscr, y, x, max_len, initial_text=""):
         if not url:
             return None
         
-        # Проверяем корректность URL
-        if is_valid_url(url.strip()):
-            return url.strip()
+        # Проверяем корректность URL; варианты качества станции - несколько адресов через пробел
+        urls = url.split()
+        if urls and all(is_valid_url(part) for part in urls):
+            return " ".join(urls)
         else:
             error_msg = "Некорректный URL! Пример: http://example.com"
             stdscr.addstr(y+1, x, error_msg, curses.color_pair(1))
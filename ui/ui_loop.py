@@ -0,0 +1,59 @@
+import curses
+import heapq
+import itertools
+import time
+
+# цикл интерфейса: клавиши пачками, не больше одного кадра за FRAME_TIME, таймеры через шину событий
+
+FRAME_TIME = 1 / 30  # сек между кадрами: быстрее терминал все равно не покажет
+MOVES = {curses.KEY_UP: -1, curses.KEY_DOWN: 1}
+REPEATED = (curses.KEY_PPAGE, curses.KEY_NPAGE, curses.KEY_BACKSPACE, ord('['), ord(']'))
+
+
+def coalesce_keys(keys):
+    """
+    Клавиши пачки -> пары (клавиша, сколько раз подряд).
+    Серия ↑/↓ сливается в одно итоговое перемещение, повторы PgUp/PgDn, Backspace и перемотки [ ] - в одну клавишу
+    с числом повторов, подряд набранные символы (get_wch) - в одну строку.
+    """
+    result = []
+    for key in keys:
+        last, repeat = result[-1] if result else (None, 0)
+        if key in MOVES and last in MOVES:
+            delta = MOVES[last] * repeat + MOVES[key]
+            result[-1] = (curses.KEY_DOWN if delta >= 0 else curses.KEY_UP, abs(delta))
+        elif key in REPEATED and key == last:
+            result[-1] = (key, repeat + 1)
+        elif isinstance(key, str) and key.isprintable() and isinstance(last, str) and last.isprintable():
+            result[-1] = (last + key, 1)
+        else:
+            result.append((key, 1))
+    return result
+
+
+class Timers:
+    """
+    Отложенные события интерфейса. В срок событие публикуется в шину (EventBus) и обрабатывается
+    вместе с событиями плеера; цикл интерфейса ждет ближайший срок тем же select, что и клавиши.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._heap = []
+        self._order = itertools.count()  # события с одним сроком - в порядке добавления
+
+    def call_later(self, delay, kind, detail=None):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), kind, detail))
+
+    def timeout(self):
+        """Сколько можно ждать до ближайшего срока; None - таймеров нет"""
+        if not self._heap:
+            return None
+        return max(self._heap[0][0] - time.monotonic(), 0)
+
+    def fire(self):
+        """Публикует события, срок которых наступил"""
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, kind, detail = heapq.heappop(self._heap)
+            self.bus.publish(kind, detail)
@@ -0,0 +1,111 @@
+import curses
+import os
+import signal
+import sys
+
+from player.events import RESIZE
+
+# модель экрана: кадр рисуется в память, в терминал выводятся только изменившиеся строки
+
+
+class Frame:
+    """
+    Кадр - то, что должно быть на экране. Понимает те вызовы окна curses, которые делают функции
+    отрисовки ui_app (getmaxyx, addstr, move, clrtoeol, erase, refresh), поэтому рисуется ими же.
+    Строка кадра - список отрезков (x, текст, атрибуты) в порядке вывода.
+    """
+
+    def __init__(self, h, w):
+        self.h = h
+        self.w = w
+        self.rows = [[] for _ in range(h)]
+        self.y = self.x = 0  # позиция для clrtoeol
+
+    def getmaxyx(self):
+        return self.h, self.w
+
+    def addstr(self, y, x, text, attr=0):
+        if not (0 <= y < self.h and 0 <= x < self.w):
+            raise curses.error("addstr вне экрана")
+        # длинный текст обрезается по краю, а не переносится на следующую строку
+        self.rows[y].append((x, text[:self.w - x], attr))
+
+    def move(self, y, x):
+        if not (0 <= y < self.h and 0 <= x < self.w):
+            raise curses.error("move вне экрана")
+        self.y, self.x = y, x
+
+    def clrtoeol(self):
+        x = self.x
+        self.rows[self.y] = [(start, text[:x - start], attr) for start, text, attr in self.rows[self.y] if start < x]
+
+    def erase(self):
+        self.rows = [[] for _ in range(self.h)]
+
+    def refresh(self):
+        pass  # кадр выводит Screen.show
+
+
+class Screen:
+    """
+    Помнит, какие строки сейчас на экране, и переписывает в окне curses только отличающиеся.
+    Все изменения кадра уходят в терминал одним doupdate. Диалоги, рисующие прямо в окне curses,
+    после себя вызывают invalidate: модель больше не совпадает с экраном.
+    """
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self.shown = None  # строки на экране; None - экран неизвестен
+        self.width = 0
+        self.rows_drawn = 0  # сколько строк переписано всего
+
+    def frame(self):
+        h, w = self.stdscr.getmaxyx()
+        return Frame(h, w)
+
+    def show(self, frame):
+        if self.shown is None or len(self.shown) != frame.h or self.width != frame.w:
+            self.shown = [None] * frame.h
+            self.width = frame.w
+        stdscr = self.stdscr
+        for y, row in enumerate(frame.rows):
+            if row == self.shown[y]:
+                continue
+            self.shown[y] = row
+            self.rows_drawn += 1
+            try:
+                stdscr.move(y, 0)
+                stdscr.clrtoeol()
+            except curses.error:
+                continue
+            for x, text, attr in row:
+                try:
+                    stdscr.addstr(y, x, text, attr)
+                except curses.error:
+                    pass  # правый нижний угол: символ выведен, но курсору некуда сдвинуться
+        stdscr.noutrefresh()
+        curses.doupdate()
+
+    def invalidate(self):
+        self.shown = None
+
+    def resize(self):
+        """Терминал изменил размер: curses подстраивается, экран перерисовывается целиком"""
+        try:
+            size = os.get_terminal_size(sys.__stdout__.fileno())
+            # после KEY_RESIZE curses уже знает размер, а resizeterm снова положил бы KEY_RESIZE во ввод
+            if curses.is_term_resized(size.lines, size.columns):
+                curses.resizeterm(size.lines, size.columns)
+        except (OSError, ValueError, AttributeError, curses.error):
+            pass
+        curses.update_lines_cols()
+        self.stdscr.clear()
+        self.shown = None
+
+    def watch_resize(self, bus):
+        """
+        SIGWINCH будит цикл интерфейса событием RESIZE: иначе curses узнает о новом размере
+        только при следующем нажатии клавиши. В Windows curses сам возвращает KEY_RESIZE.
+        """
+        if hasattr(signal, "SIGWINCH"):
+            signal.signal(signal.SIGWINCH, lambda signum, frame: bus.publish(RESIZE))